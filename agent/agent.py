@@ -1,17 +1,28 @@
 import logging
 import os
-import json
 import asyncio
-from datetime import datetime
+import httpx
+import openai as openai_sdk
 from dotenv import load_dotenv
 
-from livekit.agents import AutoSubscribe, JobContext, WorkerOptions, cli, llm
+from livekit.agents import AutoSubscribe, JobContext, JobProcess, WorkerOptions, cli, llm
 from livekit.agents.pipeline import VoicePipelineAgent
 from livekit.plugins import deepgram, openai, silero
 
 from database import DatabaseManager
 from session import SessionManager
-from rag import KnowledgeBase
+from session_store import create_session_store
+from prefetch import LookupPrefetcher
+from stt_tap import TranscriptTapSTT
+from phrase_cache import PhraseAudioCache
+from cached_tts import CachedTTS
+from context_manager import ContextManager
+from publisher import RoomPublisher
+from tools import build_function_context
+from call_recorder import CallRecorder
+from tracing import TurnTracer, serve_metrics
+from prompts import DEALERSHIP_NAME, PromptCacheMonitor, static_instructions
+from rag import KnowledgeBase, RetrievalRuntime
 
 load_dotenv()
 
@@ -24,168 +35,145 @@ logger.setLevel(logging.INFO)
 logger.info("Preloading VAD model...")
 vad_model = silero.VAD.load()
 
+GREETING = f"{DEALERSHIP_NAME} Service. How may I assist you?"
+# Fixed utterances from the system prompt, played from the phrase cache.
+CACHED_PHRASES = [GREETING, "Checking availability...", "Submitting your request..."]
+TTS_VOICE = os.getenv("TTS_VOICE", "aura-asteria-en")
+prompt_cache = PromptCacheMonitor()
+
+def prewarm(proc: JobProcess):
+    # Embedder + index client are loaded once per worker process, not per call.
+    proc.userdata["retrieval"] = RetrievalRuntime.load()
+    proc.userdata["metrics_server"] = serve_metrics()
+    # One write-behind store per worker process, shared by its calls.
+    proc.userdata["sessions"] = create_session_store()
+    proc.userdata["phrases"] = PhraseAudioCache(os.getenv("TTS_PHRASE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tts_cache")))
+
 async def warmup_pipeline(llm_instance, tts_instance):
     logger.info("🔥 Warming up LLM & TTS connection...")
     try:
         await asyncio.gather(
             llm_instance.chat(chat_ctx=llm.ChatContext().append(text="ping", role="user")),
-            tts_instance.synthesize(" ") 
+            # No-op for phrases already cached by this worker or on disk.
+            tts_instance.warm(CACHED_PHRASES)
         )
     except Exception:
         pass 
 
 async def entrypoint(ctx: JobContext):
     db_manager = DatabaseManager()
-    knowledge_base = KnowledgeBase()
+    knowledge_base = KnowledgeBase(runtime=ctx.proc.userdata.get("retrieval"))
     session = SessionManager()
+    prefetcher = LookupPrefetcher(db_manager, session)
+    context = ContextManager()
+    # No-op after the first job on this worker.
+    asyncio.create_task(db_manager.ensure_indexes())
+    asyncio.create_task(db_manager.load_matcher())
+    db_manager.watch_customers()
     
-    await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
-    
-    fnc_ctx = llm.FunctionContext()
-
-    @fnc_ctx.ai_callable()
-    async def lookup_customer(identifier: str):
-        """
-        Search for a customer profile by Name or Phone. 
-        RETURNS: JSON with 'name', 'vehicle', 'phone'.
-        """ 
-        logger.info(f"🔎 LOOKUP REQUEST: {identifier}")
-        clean_id = session.normalize_phone(identifier)
-        query = clean_id if clean_id else identifier 
-        user_data = await db_manager.get_customer_by_lookup(query)
-        
-        if user_data:
-            session.set_customer(user_data)
-            return json.dumps({
-                "status": "success", 
-                "data": {
-                    "name": user_data['name'], 
-                    "vehicle": user_data['vehicle'],
-                    "phone": user_data.get('phone', 'Unknown')
-                }
-            })
-        return json.dumps({"status": "not_found", "message": "User not found. Ask for spelling or phone number."})
-
-    @fnc_ctx.ai_callable()
-    async def check_availability(date: str):
-        """
-        Check if a date is POTENTIALLY available. 
-        Note: Availability is not guaranteed until validated by the manager.
-        """
-        is_open = await db_manager.check_availability(date)
-        return json.dumps({"available": is_open, "date": date})
-    
-    @fnc_ctx.ai_callable()
-    async def consult_policy(topic: str):
-        """Search Knowledge Base for policies (e.g., 'oil change included?')."""
-        logger.info(f"📚 RAG LOOKUP: {topic}")
-        return knowledge_base.search(topic)
-
-    @fnc_ctx.ai_callable()
-    async def submit_booking_request(date: str, service_type: str):
-        """
-        Submit a service request to the validation queue.
-        DO NOT say 'Confirmed'. Say 'Submitted for approval'.
-        """
-        if not session.is_authenticated:
-            return json.dumps({"status": "error", "message": "Authentication required. Identify customer first."})
-        
-        request_payload = {
-            "name": session.customer.name,
-            "phone": session.customer.phone,
-            "vehicle": session.customer.vehicle,
-            "requested_date": date,
-            "requested_service": service_type
-        }
-        
-        result = await db_manager.queue_booking_request(request_payload)
-        return json.dumps(result)
-
-    now = datetime.now().strftime("%A, %B %d, %Y")
-
-    system_instruction = f"""
-    You are Auralis, the Front Desk for Rolls-Royce.
-    
-    --- TEMPORAL CONTEXT ---
-    **Today is: {now}**
-    
-    --- CONTEXT & MEMORY ---
-    1. **Session Awareness:** Once `lookup_customer` succeeds, you KNOW the Name, Vehicle, and Phone. NEVER ask again.
-    2. **Vehicle Confirmation:** Always confirm the vehicle model found (e.g., "I see you have the Phantom...").
-    
-    --- PROTOCOL: REQUEST QUEUE ---
-    **CRITICAL:** You CANNOT "confirm" bookings. You can only "submit requests".
-    - **Bad:** "I have booked your appointment."
-    - **Good:** "I have submitted your request for Tuesday. You will receive a confirmation once approved."
-    
-    --- VOICE RULES ---
-    1. **Conciseness:** Keep responses under 10 words (unless explaining policy).
-    2. **Verbal Bridges:** Speak BEFORE tool usage.
-       - "Checking availability..." -> `check_availability`
-       - "Submitting your request..." -> `submit_booking_request`
+    sessions = ctx.proc.userdata.get("sessions") or create_session_store()
+    # A re-dispatched room picks up the caller identified before the drain/crash.
+    await asyncio.gather(
+        sessions.rehydrate(session, ctx.job.room.name),
+        ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
+    )
+    caller_left = False
+
+    @ctx.room.on("participant_disconnected")
+    def on_participant_disconnected(participant):
+        # A normal hang-up: the next call in a reused room name must start unidentified.
+        nonlocal caller_left
+        caller_left = True
+        session.detach_store()
+        asyncio.create_task(sessions.forget(ctx.job.room.name))
+
+    async def close_session():
+        # Only a drain or crash keeps the state, for the re-dispatched job.
+        if not caller_left:
+            await sessions.flush()
+    ctx.add_shutdown_callback(close_session)
+
+    # One write-behind recorder per worker process; it also replays anything spilled while MongoDB was down,
+    # including booking requests deferred by submit_booking_request.
+    recorder = ctx.proc.userdata.get("recorder")
+    if recorder is None:
+        recorder = ctx.proc.userdata["recorder"] = CallRecorder(db_manager.db)
+    recorder.start()
+    call_log = recorder.call(ctx.job.room.name)
+
+    async def end_call():
+        outcome = "request_submitted" if session.pending_request else "identified" if session.is_authenticated else "anonymous"
+        customer = {"name": session.customer.name, "phone": session.customer.phone} if session.is_authenticated else None
+        await call_log.end(outcome, customer=customer, pending_request=session.pending_request)
+    ctx.add_shutdown_callback(end_call)
     
-    --- WORKFLOW ---
-    1. **Identify:** Ask Name/Phone -> `lookup_customer` -> Confirm Vehicle.
-    2. **Service Check:** If user asks "Is X included?", run `consult_policy`.
-    3. **Schedule:** - Ask Date -> `check_availability`.
-       - If open -> `submit_booking_request`.
-       - **Closing:** "Request submitted. We will notify you shortly."
-    """
+    tracer = TurnTracer(ctx.room.name, on_turn=call_log.turn)
+    fnc_ctx = build_function_context(session, db_manager, knowledge_base, prefetcher, tracer, outbox=recorder)
 
     initial_ctx = llm.ChatContext().append(
         role="system",
-        text=system_instruction
+        text=static_instructions()
     )
 
-    llm_instance = openai.LLM(model="gpt-4o-mini")
-    tts_instance = deepgram.TTS()
+    # Same client settings the plugin uses by default, plus cached-token accounting.
+    llm_client = openai_sdk.AsyncClient(max_retries=0, http_client=httpx.AsyncClient(timeout=httpx.Timeout(connect=15.0, read=5.0, write=5.0, pool=5.0), follow_redirects=True))
+    llm_instance = openai.LLM(model="gpt-4o-mini", client=prompt_cache.instrument(llm_client))
+    tts_instance = CachedTTS(deepgram.TTS(model=TTS_VOICE), ctx.proc.userdata.get("phrases") or PhraseAudioCache(), TTS_VOICE)
 
     asyncio.create_task(warmup_pipeline(llm_instance, tts_instance))
 
+    def before_llm(agent, chat_ctx):
+        # Token-budgeted per-turn prompt; the stored history keeps everything.
+        context.compact(chat_ctx, session.facts())
+
     agent = VoicePipelineAgent(
         vad=vad_model,
-        stt=deepgram.STT(),
+        stt=TranscriptTapSTT(deepgram.STT(), prefetcher.on_transcript),
         llm=llm_instance,
         tts=tts_instance,
         chat_ctx=initial_ctx,
         fnc_ctx=fnc_ctx,
         allow_interruptions=True,
-        min_endpointing_delay=0.3 
+        min_endpointing_delay=0.3,
+        before_llm_cb=before_llm
     )
 
+    tracer.attach(agent)
+    publisher = RoomPublisher(ctx.room.local_participant).start()
+    ctx.add_shutdown_callback(publisher.aclose)
+
     @agent.on("user_speech_committed")
     def on_user_speech(msg):
         if isinstance(msg, list): msg = msg[-1]
-        asyncio.create_task(ctx.room.local_participant.publish_data(
-            json.dumps({"type": "user_transcript", "data": {"text": msg.content}})
-        ))
+        publisher.publish("user_transcript", {"text": msg.content})
+        call_log.event("user", text=msg.content)
 
     @agent.on("agent_speech_committed")
     def on_agent_speech(msg):
         if isinstance(msg, list): msg = msg[-1]
         
-        if len(agent.chat_ctx.messages) > 10:
-            logger.info("✂️ Pruning chat history")
-            agent.chat_ctx.messages = [agent.chat_ctx.messages[0]] + agent.chat_ctx.messages[-9:]
+        context.trim_stored(agent.chat_ctx)
+
+        publisher.publish("agent_transcript", {"text": msg.content})
+        call_log.event("agent", text=msg.content)
 
-        asyncio.create_task(ctx.room.local_participant.publish_data(
-            json.dumps({"type": "agent_transcript", "data": {"text": msg.content}})
-        ))
+    @agent.on("agent_speech_interrupted")
+    def on_interrupted(msg):
+        if isinstance(msg, list): msg = msg[-1]
+        call_log.event("agent", text=msg.content, interrupted=True)
+
+    agent.on("function_calls_finished", call_log.tool_calls)
         
     @agent.on("agent_state_changed")
     def on_state_changed(state):
-        asyncio.create_task(ctx.room.local_participant.publish_data(
-             json.dumps({"type": "state", "data": {"status": state}})
-        ))
+        publisher.publish("state", {"status": state})
 
     agent.start(ctx.room)
     
-    greeting_text = "Rolls-Royce Service. How may I assist you?"
-    await ctx.room.local_participant.publish_data(
-        json.dumps({"type": "agent_transcript", "data": {"text": greeting_text}})
-    )
+    greeting_text = GREETING
+    publisher.publish("agent_transcript", {"text": greeting_text})
     
     await agent.say(greeting_text)
 
 if __name__ == "__main__":
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint))
\ No newline at end of file
+    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
\ No newline at end of file
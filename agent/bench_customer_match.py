@@ -0,0 +1,91 @@
+"""
+Synthetic benchmark: CustomerMatcher vs the old anchored case-insensitive
+`$regex` lookup. Without an index MongoDB evaluates that regex against every
+name (a collection scan), which is emulated here in-process so the comparison
+runs offline.
+
+    python bench_customer_match.py --customers 1000000 --queries 200
+"""
+import re
+import time
+import random
+import argparse
+import statistics
+
+from customer_matcher import CustomerMatcher
+
+FIRST = ["Meredith", "Christina", "Derek", "Mark", "Miranda", "Richard", "Callie", "Arizona", "Owen", "April",
+         "Jackson", "Alex", "Izzie", "George", "Lexie", "Teddy", "Amelia", "Maggie", "Andrew", "Jo"]
+LAST = ["Grey", "Yang", "Shepherd", "Sloan", "Bailey", "Webber", "Torres", "Robbins", "Hunt", "Kepner",
+        "Avery", "Karev", "Stevens", "O'Malley", "Altman", "Pierce", "DeLuca", "Wilson", "Burke", "Montgomery"]
+
+def synthetic_customers(n: int, rng: random.Random):
+    for i in range(n):
+        # Suffix keeps names realistic-but-distinct at 1M scale.
+        name = f"{rng.choice(FIRST)} {rng.choice(LAST)}{'' if i < 400 else ' ' + format(i, 'x')}"
+        yield {"_id": i, "name": name, "phone": f"98{i:08d}", "vehicle": "Rolls-Royce Ghost",
+               "vehicle_no": f"DL-{i % 99:02d}-AB-{i % 10000:04d}"}
+
+def stt_noise(name: str, rng: random.Random) -> str:
+    """
+    One STT-style slip: vowel swap, dropped letter or doubled letter.
+    """
+    chars = list(name)
+    positions = [i for i, c in enumerate(chars) if c.isalpha() and i > 0]
+    i = rng.choice(positions)
+    kind = rng.choice(["swap", "drop", "double"])
+    if kind == "swap" and chars[i].lower() in "aeiou":
+        chars[i] = rng.choice([v for v in "aeiou" if v != chars[i].lower()])
+    elif kind == "drop":
+        del chars[i]
+    else:
+        chars.insert(i, chars[i])
+    return "".join(chars)
+
+def percentile(samples: list, p: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--customers", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--regex-queries", type=int, default=5, help="Collection-scan emulation is slow; keep small")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    customers = list(synthetic_customers(args.customers, rng))
+
+    matcher = CustomerMatcher()
+    started = time.perf_counter()
+    for doc in customers:
+        matcher.add(doc)
+    print(f"🔤 Built matcher over {len(matcher):,} customers in {time.perf_counter() - started:.1f}s")
+
+    targets = [rng.choice(customers) for _ in range(args.queries)]
+    noisy = [stt_noise(t["name"], rng) for t in targets]
+
+    latencies, hits = [], 0
+    for target, query in zip(targets, noisy):
+        started = time.perf_counter()
+        results = matcher.match(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits += bool(results) and results[0]["customer"]["_id"] == target["_id"]
+
+    print(f"Matcher : p50 {statistics.median(latencies):.2f}ms  p95 {percentile(latencies, 95):.2f}ms  "
+          f"top-1 recall on noisy names {hits / len(noisy):.0%}")
+
+    names = [c["name"] for c in customers]
+    latencies, hits = [], 0
+    for target, query in list(zip(targets, noisy))[:args.regex_queries]:
+        pattern = re.compile(f"^{re.escape(query)}$", re.IGNORECASE)
+        started = time.perf_counter()
+        found = next((i for i, name in enumerate(names) if pattern.match(name)), None)
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits += found == target["_id"]
+
+    print(f"$regex  : p50 {statistics.median(latencies):.2f}ms  p95 {percentile(latencies, 95):.2f}ms  "
+          f"top-1 recall on noisy names {hits / len(latencies):.0%}  (collection scan)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import re
+import math
+from collections import Counter, defaultdict
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "do", "does", "did", "can", "could", "will", "would",
+    "i", "me", "my", "we", "our", "you", "your", "it", "its", "of", "to", "in", "on", "for", "at", "by",
+    "with", "and", "or", "what", "when", "how", "which", "who", "there", "this", "that", "any", "about",
+    "have", "has", "please", "tell"
+}
+
+def _stem(token: str) -> str:
+    # Deliberately tiny: enough to match "cancel/cancelled", "rate/rates", "include/included".
+    if token.isdigit() or len(token) <= 3:
+        return token
+    for suffix in ("ing", "ed", "es", "s", "ly"):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            token = token[:-len(suffix)]
+            break
+    if len(token) > 4 and token[-1] == token[-2]:
+        token = token[:-1]
+    if len(token) > 3 and token.endswith("e"):
+        token = token[:-1]
+    return token
+
+def tokenize(text: str) -> list:
+    return [_stem(t) for t in re.findall(r"[a-z0-9]+(?:\.[0-9]+)?%?", text.lower()) if t not in STOPWORDS]
+
+class BM25Index:
+    """
+    In-memory inverted index (Okapi BM25) over the chunks KnowledgeBase serves.
+    """
+    def __init__(self, documents: list, k1: float = 1.5, b: float = 0.75):
+        """
+        documents: [(id, text)]
+        """
+        self.k1 = k1
+        self.b = b
+        self.ids = [doc_id for doc_id, _ in documents]
+        self.texts = [text for _, text in documents]
+        self.lengths = []
+        self.postings = defaultdict(list)  # term -> [(doc index, term frequency)]
+
+        for i, text in enumerate(self.texts):
+            counts = Counter(tokenize(text))
+            self.lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings[term].append((i, tf))
+
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        n = len(self.texts)
+        self.idf = {term: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5)) for term, p in self.postings.items()}
+
+    def __len__(self):
+        return len(self.texts)
+
+    def search(self, query: str, top_k: int = 3):
+        """
+        Returns [(index, score, matched_terms)] best first; only documents sharing a term.
+        """
+        terms = set(tokenize(query))
+        scores = defaultdict(float)
+        matched = defaultdict(set)
+
+        for term in terms:
+            for i, tf in self.postings.get(term, ()):
+                norm = tf + self.k1 * (1 - self.b + self.b * self.lengths[i] / self.avg_length)
+                scores[i] += self.idf[term] * tf * (self.k1 + 1) / norm
+                matched[i].add(term)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [(i, score, matched[i]) for i, score in ranked]
+
+    def confident(self, query: str, hits: list, min_score: float, margin: float, min_coverage: float = 0.5) -> bool:
+        """
+        A keyword answer is trusted when the winner scores well, clearly beats
+        the runner-up, and covers most of the query's content terms.
+        """
+        if not hits:
+            return False
+        terms = set(tokenize(query))
+        top_score = hits[0][1]
+        runner_up = hits[1][1] if len(hits) > 1 else 0.0
+        coverage = len(hits[0][2]) / len(terms) if terms else 0.0
+        return top_score >= min_score and top_score >= margin * runner_up and coverage >= min_coverage
+
+def reciprocal_rank_fusion(rankings: list, k: int = 60) -> list:
+    """
+    rankings: lists of keys, best first. Returns keys ordered by fused score.
+    """
+    fused = defaultdict(float)
+    for ranking in rankings:
+        for rank, key in enumerate(ranking):
+            fused[key] += 1.0 / (k + rank + 1)
+    return [key for key, _ in sorted(fused.items(), key=lambda item: item[1], reverse=True)]
@@ -0,0 +1,158 @@
+import time
+import uuid
+import asyncio
+import logging
+
+from livekit import rtc
+from livekit.agents import tts
+
+import metrics
+from phrase_cache import PhraseAudioCache
+
+logger = logging.getLogger("auralis-tts")
+
+FRAME_MS = 100
+
+def _frames(pcm: bytes, sample_rate: int, num_channels: int):
+    # Short frames keep cached playback as interruptible as live synthesis.
+    step = sample_rate * FRAME_MS // 1000 * num_channels * 2
+    for start in range(0, len(pcm), step):
+        chunk = pcm[start:start + step]
+        yield rtc.AudioFrame(data=chunk, sample_rate=sample_rate, num_channels=num_channels, samples_per_channel=len(chunk) // (2 * num_channels))
+
+class CachedTTS(tts.TTS):
+    """
+    Wraps a TTS so fixed phrases (greeting, verbal bridges) play from a
+    PhraseAudioCache instead of a live synthesis round trip. Anything that
+    isn't an exact cached phrase streams through the wrapped TTS unchanged.
+    """
+    def __init__(self, inner: tts.TTS, cache: PhraseAudioCache, voice: str):
+        super().__init__(capabilities=inner.capabilities, sample_rate=inner.sample_rate, num_channels=inner.num_channels)
+        self._inner = inner
+        self._label = inner.label
+        self.cache = cache
+        self.voice = voice
+        self.first_audio_ms = metrics.histogram("tts_cached_first_audio_ms")
+
+        @inner.on("metrics_collected")
+        def _forward_metrics(*args, **kwargs):
+            self.emit("metrics_collected", *args, **kwargs)
+
+    async def warm(self, phrases: list):
+        """
+        Synthesizes any phrase not already cached (memory or disk), once per worker.
+        """
+        for text in phrases:
+            self.cache.register(self.voice, text)
+            if self.cache.get(self.voice, text) is not None:
+                continue
+            try:
+                frames = [ev.frame async for ev in self._inner.synthesize(text)]
+                if not frames:
+                    continue
+                pcm = b"".join(bytes(f.data) for f in frames)
+                self.cache.put(self.voice, text, pcm, frames[0].sample_rate, frames[0].num_channels)
+            except Exception as e:
+                logger.warning(f"Could not pre-synthesize '{text}': {e}")
+        logger.info(f"🔊 Phrase cache ready: {len(phrases)} phrases for {self.voice}")
+
+    def synthesize(self, text: str, *, conn_options=None):
+        return self._inner.synthesize(text, conn_options=conn_options)
+
+    def stream(self, *, conn_options=None):
+        return _CachedStream(self, conn_options)
+
+    def prewarm(self):
+        self._inner.prewarm()
+
+    async def aclose(self):
+        await self._inner.aclose()
+
+class _CachedStream:
+    """
+    Holds back streamed text only while it can still become a cached phrase;
+    on end of segment an exact match plays from cache, otherwise the text is
+    handed to a live stream of the wrapped TTS.
+    """
+    def __init__(self, owner: CachedTTS, conn_options):
+        self._owner = owner
+        self._conn_options = conn_options
+        self._pending = ""
+        self._live = None
+        self._forward_task = None
+        self._events = asyncio.Queue()
+        self._open = 1  # producers still writing to _events (this stream itself)
+        self._started = time.perf_counter()
+
+    def _go_live(self):
+        if self._live is None:
+            self._live = self._owner._inner.stream(conn_options=self._conn_options)
+            self._open += 1
+            self._forward_task = asyncio.create_task(self._forward())
+        if self._pending:
+            self._live.push_text(self._pending)
+            self._pending = ""
+
+    async def _forward(self):
+        try:
+            async for ev in self._live:
+                self._events.put_nowait(ev)
+        finally:
+            self._events.put_nowait(None)
+
+    def push_text(self, token: str):
+        if self._live is not None:
+            self._live.push_text(token)
+            return
+        self._pending += token
+        if not self._owner.cache.could_match(self._owner.voice, self._pending):
+            self._go_live()
+
+    def _end_segment(self) -> bool:
+        if self._live is None and self._pending:
+            audio = self._owner.cache.get(self._owner.voice, self._pending)
+            if audio is not None:
+                request_id = uuid.uuid4().hex[:12]
+                frames = list(_frames(*audio))
+                for i, frame in enumerate(frames):
+                    self._events.put_nowait(tts.SynthesizedAudio(frame=frame, request_id=request_id, is_final=i == len(frames) - 1, delta_text=self._pending if i == 0 else ""))
+                self._owner.first_audio_ms.observe((time.perf_counter() - self._started) * 1000)
+                self._pending = ""
+                return True
+        if self._pending:
+            self._go_live()
+        return False
+
+    def flush(self):
+        if not self._end_segment() and self._live is not None:
+            self._live.flush()
+
+    def end_input(self):
+        self._end_segment()
+        if self._live is not None:
+            self._live.end_input()
+        self._events.put_nowait(None)
+
+    async def aclose(self):
+        if self._live is not None:
+            await self._live.aclose()
+        if self._forward_task is not None:
+            self._forward_task.cancel()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while self._open:
+            ev = await self._events.get()
+            if ev is None:
+                self._open -= 1
+                continue
+            return ev
+        raise StopAsyncIteration
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
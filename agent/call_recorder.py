@@ -0,0 +1,270 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+
+from bson import json_util
+from pymongo.errors import BulkWriteError
+
+import metrics
+from resilience import DependencyUnavailable, guarded
+
+logger = logging.getLogger("auralis-recorder")
+
+CALL_RECORD_BATCH_SIZE = int(os.getenv("CALL_RECORD_BATCH_SIZE", "100"))
+CALL_RECORD_FLUSH_MS = int(os.getenv("CALL_RECORD_FLUSH_MS", "2000"))
+CALL_RECORD_MAX_BUFFER = int(os.getenv("CALL_RECORD_MAX_BUFFER", "5000"))
+CALL_RECORD_SPILL_PATH = os.getenv("CALL_RECORD_SPILL_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "call_records", "spill.jsonl"))
+CALL_RECORD_WRITE_BUDGET_MS = 2000
+# How often a spill file is retried once nothing else is buffered.
+REPLAY_RETRY_SECONDS = 30
+# Own breaker: a slow analytics batch must not trip the one the tools use for MongoDB.
+BREAKER = "mongo_records"
+MAX_TEXT_CHARS = 2000
+DUPLICATE_KEY = 11000
+
+def _clip(value):
+    return value[:MAX_TEXT_CHARS] if isinstance(value, str) else value
+
+class CallRecorder:
+    """
+    Write-behind persistence of call events (`call_events`) and per-call
+    summaries (`call_records`), shared by every call on a worker. Hooks only
+    append to an in-memory buffer; it is written with insert_many when it
+    reaches `batch_size`, every `flush_ms`, and when a call ends. When MongoDB
+    is down the batch is appended to a local spill file, replayed on the next
+    healthy flush. Every document has a deterministic _id, so a replayed
+    batch that partly landed before is not duplicated.
+    """
+    def __init__(self, db=None, batch_size: int = CALL_RECORD_BATCH_SIZE, flush_ms: int = CALL_RECORD_FLUSH_MS,
+                 max_buffer: int = CALL_RECORD_MAX_BUFFER, spill_path: str = CALL_RECORD_SPILL_PATH,
+                 write_budget_ms: float = CALL_RECORD_WRITE_BUDGET_MS):
+        self.db = db
+        self.write_budget_ms = write_budget_ms
+        self.batch_size = batch_size
+        self.flush_ms = flush_ms
+        self.max_buffer = max_buffer
+        self.spill_path = spill_path
+        self._buffer = deque()  # (collection, doc)
+        self._flush_task = None
+        self._full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._spill_lock = threading.Lock()
+        self.written = metrics.counter("call_records_written")
+        self.spilled = metrics.counter("call_records_spilled")
+        self.replayed = metrics.counter("call_records_replayed")
+        self.flush_ms_hist = metrics.histogram("call_record_flush_ms")
+        self.buffered = metrics.gauge("call_records_buffered")
+
+    def persist(self, collection: str, doc: dict):
+        """
+        For a document that must not be lost (a deferred booking request):
+        written on an immediate flush, else spilled and replayed until MongoDB
+        takes it. Needs a caller-assigned _id so a replay is idempotent.
+        """
+        self.append(collection, doc)
+        self._full.set()
+
+    def call(self, interaction_id: str) -> "CallLog":
+        return CallLog(self, interaction_id)
+
+    def append(self, collection: str, doc: dict):
+        self._buffer.append((collection, doc))
+        if len(self._buffer) > self.max_buffer:
+            # Bounded memory: the oldest batch goes straight to disk.
+            overflow = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+            self._spill_later(overflow)
+        self.buffered.set(len(self._buffer))
+        if len(self._buffer) >= self.batch_size:
+            self._full.set()
+        self._ensure_flusher()
+
+    def start(self):
+        """
+        Flushes right away (replaying anything spilled by an earlier job or
+        process) and keeps retrying the spill file while it exists.
+        """
+        self._full.set()
+        self._ensure_flusher()
+
+    def _ensure_flusher(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.flush_ms / 1000 if self._buffer else REPLAY_RETRY_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            await self.flush()
+            # Events appended while the last batch was in flight, or a spill still waiting for MongoDB.
+            if not self._buffer and not os.path.exists(self.spill_path):
+                return
+
+    async def flush(self):
+        """
+        Writes everything buffered so far, then replays any spill file.
+        What can't be written is spilled, never dropped.
+        """
+        async with self._flush_lock:
+            while self._buffer:
+                batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                self.buffered.set(len(self._buffer))
+                started = time.perf_counter()
+                try:
+                    written = await self._write(batch)
+                except asyncio.CancelledError:
+                    self._append_lines(batch)
+                    raise
+                if not written:
+                    await self._spill(batch + list(self._buffer))
+                    self._buffer.clear()
+                    self.buffered.set(0)
+                    return
+                self.flush_ms_hist.observe((time.perf_counter() - started) * 1000)
+            if os.path.exists(self.spill_path):
+                await self._replay()
+
+    async def _write(self, batch: list) -> bool:
+        if self.db is None:
+            return False
+        by_collection = {}
+        for collection, doc in batch:
+            by_collection.setdefault(collection, []).append(doc)
+        try:
+            for collection, docs in by_collection.items():
+                await guarded(BREAKER, lambda: self._insert(collection, docs), self.write_budget_ms)
+        except DependencyUnavailable:
+            return False
+        self.written.inc(len(batch))
+        return True
+
+    async def _insert(self, collection: str, docs: list):
+        try:
+            await self.db[collection].insert_many([dict(d) for d in docs], ordered=False)
+        except BulkWriteError as e:
+            # Already written by an earlier (replayed or timed-out) attempt.
+            if any(err.get("code") != DUPLICATE_KEY for err in e.details.get("writeErrors", [])):
+                raise
+
+    def _append_lines(self, batch: list):
+        with self._spill_lock:
+            os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for collection, doc in batch:
+                    # Extended JSON: ObjectIds and datetimes come back as they went in.
+                    f.write(json_util.dumps({"c": collection, "d": doc}) + "\n")
+
+    async def _spill(self, batch: list):
+        if not batch:
+            return
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._append_lines, batch)
+            self.spilled.inc(len(batch))
+            logger.warning(f"💾 Spilled {len(batch)} call events to {self.spill_path}")
+        except OSError as e:
+            logger.error(f"❌ Lost {len(batch)} call events (spill failed: {e})")
+
+    def _spill_later(self, batch: list):
+        try:
+            asyncio.get_running_loop().create_task(self._spill(batch))
+        except RuntimeError:
+            self._append_lines(batch)
+
+    def _claim_spill(self):
+        # A ".replaying" file left by a crash mid-replay goes first.
+        replaying = f"{self.spill_path}.replaying"
+        with self._spill_lock:
+            if not os.path.exists(replaying):
+                if not os.path.exists(self.spill_path):
+                    return None
+                os.replace(self.spill_path, replaying)
+        return replaying
+
+    def _read_chunk(self, f) -> list:
+        chunk = []
+        for line in f:
+            try:
+                row = json_util.loads(line)
+                chunk.append((row["c"], row["d"]))
+            except (ValueError, KeyError):
+                # A torn line from a crash mid-append.
+                continue
+            if len(chunk) >= self.batch_size:
+                break
+        return chunk
+
+    def _requeue(self, chunk: list, f):
+        self._append_lines(chunk)
+        with self._spill_lock, open(self.spill_path, "a", encoding="utf-8") as out:
+            for line in f:
+                out.write(line)
+
+    async def _replay(self):
+        """
+        Streams the spill file back in `batch_size` chunks; on the first
+        failure the unsent remainder goes back to the spill file.
+        """
+        loop = asyncio.get_running_loop()
+        path = await loop.run_in_executor(None, self._claim_spill)
+        if path is None:
+            return
+        replayed = 0
+        with open(path, encoding="utf-8") as f:
+            while True:
+                chunk = await loop.run_in_executor(None, self._read_chunk, f)
+                if not chunk:
+                    break
+                if not await self._write(chunk):
+                    await loop.run_in_executor(None, self._requeue, chunk, f)
+                    break
+                replayed += len(chunk)
+                self.replayed.inc(len(chunk))
+        os.remove(path)
+        if replayed:
+            logger.info(f"📼 Replayed {replayed} spilled call events")
+
+    async def aclose(self):
+        await self.flush()
+
+class CallLog:
+    """
+    One call's view of the recorder: numbered events plus a summary at the end.
+    """
+    def __init__(self, recorder: CallRecorder, interaction_id: str):
+        self.recorder = recorder
+        self.interaction_id = interaction_id
+        self.started = time.time()
+        # Distinguishes a re-dispatched job from the first one in the same room.
+        self.call_id = f"{interaction_id}:{int(self.started * 1000)}"
+        self.seq = 0
+        self.counts = {}
+
+    def event(self, type: str, **data):
+        self.seq += 1
+        self.counts[type] = self.counts.get(type, 0) + 1
+        doc = {"_id": f"{self.call_id}:{self.seq}", "call_id": self.call_id, "interaction_id": self.interaction_id,
+               "seq": self.seq, "ts": time.time(), "type": type}
+        doc.update({k: _clip(v) for k, v in data.items()})
+        self.recorder.append("call_events", doc)
+
+    def tool_calls(self, called_functions):
+        for called in called_functions:
+            self.event("tool", name=called.call_info.function_info.name, arguments=called.call_info.arguments,
+                       result=_clip(str(called.result)) if called.result is not None else None,
+                       error=repr(called.exception) if called.exception else None)
+
+    def turn(self, timeline: dict):
+        self.event("turn", timeline=timeline)
+
+    async def end(self, outcome: str, **summary):
+        ended = time.time()
+        doc = {"_id": self.call_id, "interaction_id": self.interaction_id, "started": self.started, "ended": ended,
+               "duration_s": round(ended - self.started, 1), "outcome": outcome, "events": self.seq, "counts": self.counts}
+        doc.update(summary)
+        self.recorder.append("call_records", doc)
+        await self.recorder.flush()
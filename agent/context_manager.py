@@ -0,0 +1,126 @@
+import os
+import json
+import logging
+
+from livekit.agents import llm
+
+import metrics
+from prompts import FACTS_MARKER, dynamic_context, is_dynamic_context
+
+logger = logging.getLogger("auralis-context")
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:
+    _encoding = None
+
+MESSAGE_OVERHEAD_TOKENS = 4
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    # ~4 characters per token for English; only used when tiktoken isn't installed.
+    return len(text) // 4 + 1
+
+def _text(message) -> str:
+    content = message.content
+    if isinstance(content, list):
+        content = " ".join(c for c in content if isinstance(c, str))
+    return content if isinstance(content, str) else ("" if content is None else str(content))
+
+def message_tokens(message) -> int:
+    tokens = MESSAGE_OVERHEAD_TOKENS + count_tokens(_text(message))
+    for call in message.tool_calls or ():
+        tokens += count_tokens(call.function_info.name) + count_tokens(call.raw_arguments)
+    return tokens
+
+def group_turns(messages: list) -> list:
+    """
+    Splits history into units that are kept or dropped together: an assistant
+    message with tool calls stays with the tool results answering it.
+    """
+    units, open_calls = [], set()
+    for message in messages:
+        if message.role == "tool" and message.tool_call_id in open_calls and units:
+            units[-1].append(message)
+            continue
+        units.append([message])
+        open_calls = {call.tool_call_id for call in message.tool_calls or ()}
+    return units
+
+def collapse_tool_output(content: str, max_chars: int = 160) -> str:
+    """
+    Old tool results keep their outcome, not their payload:
+    '{"status": "success", "data": {...}}' -> '{"status": "success"} [collapsed]'.
+    """
+    try:
+        data = json.loads(content)
+    except (TypeError, ValueError):
+        data = None
+    if isinstance(data, dict):
+        kept = {k: v for k, v in data.items() if k in ("status", "available", "date", "success", "error", "open_dates")}
+        return json.dumps(kept) + " [collapsed]"
+    return content if len(content) <= max_chars else content[:max_chars] + "… [collapsed]"
+
+class ContextManager:
+    """
+    Builds the per-turn prompt from the full chat history under a token budget:
+    pins session facts as one compact block after the system prompt, collapses
+    tool outputs older than the last `keep_tool_results` calls, and drops the
+    oldest turns (never splitting a tool call from its results) until it fits.
+    """
+    def __init__(self, token_budget: int = None, keep_tool_results: int = 2, max_stored_messages: int = 200):
+        self.token_budget = token_budget or int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+        self.keep_tool_results = keep_tool_results
+        self.max_stored_messages = max_stored_messages
+        self.prompt_tokens = metrics.histogram("llm_prompt_tokens", buckets=(250, 500, 1000, 2000, 3000, 4000, 6000, 8000, 16000))
+
+    def compact(self, chat_ctx, facts: dict = None):
+        """
+        Rewrites `chat_ctx.messages` in place. Meant for the per-turn copy the
+        pipeline hands to before_llm_cb, so the stored history is untouched.
+        """
+        messages = [m for m in chat_ctx.messages if not (m.role == "system" and is_dynamic_context(_text(m)))]
+        head = [messages.pop(0)] if messages and messages[0].role == "system" else []
+        if facts:
+            # Right after the static system prompt, so that prefix stays cacheable.
+            head.append(llm.ChatMessage.create(text=dynamic_context(facts), role="system"))
+
+        # A tool result whose call was trimmed earlier is invalid on its own.
+        units = [unit for unit in group_turns(messages) if unit[0].role != "tool"]
+        tool_units = [i for i, unit in enumerate(units) if unit[0].tool_calls]
+        for i in tool_units[:-self.keep_tool_results] if self.keep_tool_results else tool_units:
+            for message in units[i][1:]:
+                message.content = collapse_tool_output(_text(message))
+
+        budget = self.token_budget - sum(message_tokens(m) for m in head)
+        sizes = [sum(message_tokens(m) for m in unit) for unit in units]
+        dropped = 0
+        # The newest unit (the user's current turn) always stays.
+        while len(units) > 1 and sum(sizes) > budget:
+            units.pop(0)
+            sizes.pop(0)
+            dropped += 1
+
+        chat_ctx.messages = head + [m for unit in units for m in unit]
+        total = sum(message_tokens(m) for m in chat_ctx.messages)
+        self.prompt_tokens.observe(total)
+        if dropped:
+            logger.info(f"✂️ Context trimmed: dropped {dropped} old turns, ~{total} prompt tokens")
+        return total
+
+    def trim_stored(self, chat_ctx):
+        """
+        Caps the stored history so memory stays flat on very long calls.
+        """
+        messages = chat_ctx.messages
+        if len(messages) <= self.max_stored_messages:
+            return
+        head = [messages[0]] if messages[0].role == "system" else []
+        units = group_turns(messages[len(head):])
+        while units and (units[0][0].role == "tool" or len(head) + sum(len(u) for u in units) > self.max_stored_messages):
+            units.pop(0)
+        chat_ctx.messages = head + [m for unit in units for m in unit]
@@ -0,0 +1,221 @@
+import re
+import asyncio
+import logging
+import threading
+from itertools import product
+from array import array
+from collections import Counter, defaultdict
+
+from identity import name_key
+
+try:
+    from metaphone import doublemetaphone
+except ImportError:
+    doublemetaphone = None
+
+logger = logging.getLogger("auralis-db")
+
+def _fallback_phonetic(token: str) -> str:
+    # Crude consonant skeleton, used only when the Metaphone package is missing.
+    token = re.sub(r"[^a-z]", "", token.lower())
+    if not token:
+        return ""
+    for pattern, repl in (("ph", "f"), ("ck", "k"), ("sh", "x"), ("ch", "x"), ("gh", ""), ("th", "0")):
+        token = token.replace(pattern, repl)
+    head, tail = token[0], token[1:]
+    tail = re.sub(r"[aeiouyhw]", "", tail)
+    code = (head + tail).translate(str.maketrans("bcdgqvzs", "pktkkfss")).upper()
+    return re.sub(r"(.)\1+", r"\1", code)
+
+def phonetic_codes(token: str) -> set:
+    if doublemetaphone is not None:
+        return {code for code in doublemetaphone(token) if code}
+    code = _fallback_phonetic(token)
+    return {code} if code else set()
+
+def name_signatures(key: str) -> set:
+    """
+    Whole-name phonetic keys ("meredith gray" -> {"MRT0 KR", "MRTT KR"}).
+    Far more selective than per-token codes at millions of customers.
+    """
+    per_token = [phonetic_codes(token) or {token.upper()} for token in key.split()[:4]]
+    return {" ".join(combo) for combo in product(*per_token)} if per_token else set()
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def plate_key(vehicle_no: str) -> str:
+    return re.sub(r"[^A-Z0-9]", "", (vehicle_no or "").upper())
+
+class CustomerMatcher:
+    """
+    In-memory fuzzy index over customer names and vehicle numbers, tolerant of
+    STT slips ("Meredith Gray" for "Meredith Grey", dropped letters).
+    Trigram postings are compact `array('I')` lists; phonetic postings map each
+    whole-name Double Metaphone signature to customers. Candidates come from the
+    phonetic signatures plus the rarest query trigrams, then get scored exactly.
+    """
+    def __init__(self, rare_trigrams: int = 6, max_candidates: int = 200, compact_ratio: float = 0.25, min_compact: int = 1000):
+        self.rare_trigrams = rare_trigrams
+        self.max_candidates = max_candidates
+        # Postings are rebuilt once tombstones pass this share of slots (and `min_compact`).
+        self.compact_ratio = compact_ratio
+        self.min_compact = min_compact
+        self.tombstones = 0
+        self._lock = threading.Lock()
+        self.docs = []             # slot -> compact customer dict (None once removed)
+        self.name_keys = []        # slot -> normalized name
+        self.plates = []           # slot -> normalized vehicle number
+        self.slot_by_id = {}       # customer _id -> slot
+        self.name_grams = defaultdict(lambda: array("I"))
+        self.plate_grams = defaultdict(lambda: array("I"))
+        self.phonetic = defaultdict(lambda: array("I"))
+        self.loaded = False
+
+    def __len__(self):
+        return len(self.slot_by_id)
+
+    def add(self, doc: dict):
+        """
+        Insert or replace a customer. Replaced slots are tombstoned, not
+        rewritten, until compaction rebuilds the postings.
+        """
+        customer = {
+            "_id": doc.get("_id"),
+            "name": doc.get("name", ""),
+            "phone": doc.get("phone", ""),
+            "vehicle": doc.get("vehicle", ""),
+            "vehicle_no": doc.get("vehicle_no", "")
+        }
+        with self._lock:
+            self._remove_locked(customer["_id"])
+            self._insert_locked(customer)
+            self._maybe_compact_locked()
+
+    def _insert_locked(self, customer: dict):
+        key = name_key(customer["name"]) or ""
+        plate = plate_key(customer["vehicle_no"])
+        slot = len(self.docs)
+        self.docs.append(customer)
+        self.name_keys.append(key)
+        self.plates.append(plate)
+        if customer["_id"] is not None:
+            self.slot_by_id[customer["_id"]] = slot
+
+        for gram in trigrams(key):
+            self.name_grams[gram].append(slot)
+        for gram in trigrams(plate):
+            self.plate_grams[gram].append(slot)
+        for signature in name_signatures(key):
+            self.phonetic[signature].append(slot)
+
+    def _maybe_compact_locked(self):
+        if self.tombstones >= self.min_compact and self.tombstones > self.compact_ratio * len(self.docs):
+            self._compact_locked()
+
+    def _compact_locked(self):
+        live = [doc for doc in self.docs if doc is not None]
+        logger.info(f"🔤 Compacting customer matcher: {self.tombstones} tombstones, {len(live)} live")
+        self.docs, self.name_keys, self.plates, self.slot_by_id = [], [], [], {}
+        self.name_grams.clear()
+        self.plate_grams.clear()
+        self.phonetic.clear()
+        self.tombstones = 0
+        for customer in live:
+            self._insert_locked(customer)
+
+    def add_many(self, docs: list):
+        for doc in docs:
+            self.add(doc)
+
+    def remove(self, customer_id):
+        with self._lock:
+            self._remove_locked(customer_id)
+            self._maybe_compact_locked()
+
+    def _remove_locked(self, customer_id):
+        slot = self.slot_by_id.pop(customer_id, None)
+        if slot is not None:
+            self.docs[slot] = None
+            self.tombstones += 1
+
+    @staticmethod
+    def _dice(a: set, b: set) -> float:
+        return 2 * len(a & b) / (len(a) + len(b)) if a and b else 0.0
+
+    def _rare_candidates(self, grams: set, postings) -> Counter:
+        lists = sorted((postings[g] for g in grams if g in postings), key=len)[:self.rare_trigrams]
+        # Very common trigrams ("ere", " ma") add cost but almost no signal.
+        cap = max(1000, len(self.docs) // 100)
+        lists = [p for p in lists if len(p) <= cap] or lists[:1]
+        candidates = Counter()
+        for posting in lists:
+            candidates.update(posting)
+        return candidates
+
+    def match(self, query: str, limit: int = 3, min_confidence: float = 0.45):
+        """
+        Returns [{"customer", "confidence", "matched_on"}] best first.
+        """
+        if not query:
+            return []
+
+        with self._lock:
+            results = {}
+            key = name_key(query) or ""
+
+            if key:
+                grams = trigrams(key)
+                codes = [phonetic_codes(t) for t in key.split()]
+                # Slots hit by several rare trigrams / phonetic codes are scored first.
+                hits = self._rare_candidates(grams, self.name_grams)
+                for signature in name_signatures(key):
+                    hits.update(self.phonetic.get(signature, ()))
+
+                for slot, _ in hits.most_common(self.max_candidates):
+                    if self.docs[slot] is None:
+                        continue
+                    candidate_key = self.name_keys[slot]
+                    candidate_codes = set()
+                    for token in candidate_key.split():
+                        candidate_codes |= phonetic_codes(token)
+                    phonetic_hit = sum(1 for token_codes in codes if token_codes & candidate_codes) / len(codes)
+                    confidence = 0.6 * self._dice(grams, trigrams(candidate_key)) + 0.4 * phonetic_hit
+                    results[slot] = (confidence, "name")
+
+            plate = plate_key(query)
+            if len(plate) >= 4 and any(c.isdigit() for c in plate):
+                grams = trigrams(plate)
+                for slot, _ in self._rare_candidates(grams, self.plate_grams).most_common(self.max_candidates):
+                    if self.docs[slot] is None:
+                        continue
+                    confidence = self._dice(grams, trigrams(self.plates[slot]))
+                    if confidence > results.get(slot, (0.0, ""))[0]:
+                        results[slot] = (confidence, "vehicle_no")
+
+            ranked = sorted(results.items(), key=lambda item: item[1][0], reverse=True)
+            return [
+                {"customer": dict(self.docs[slot]), "confidence": round(confidence, 3), "matched_on": field}
+                for slot, (confidence, field) in ranked[:limit]
+                if confidence >= min_confidence
+            ]
+
+    async def load(self, collection, batch_size: int = 5000):
+        """
+        Builds the index from the `customers` collection (motor). Cursor I/O is
+        async; indexing each batch runs in a thread so live calls keep flowing.
+        """
+        projection = {"name": 1, "phone": 1, "vehicle": 1, "vehicle_no": 1}
+        loop = asyncio.get_running_loop()
+        cursor = collection.find({}, projection, batch_size=batch_size)
+        count = 0
+        while True:
+            docs = await cursor.to_list(length=batch_size)
+            if not docs:
+                break
+            await loop.run_in_executor(None, self.add_many, docs)
+            count += len(docs)
+        self.loaded = True
+        logger.info(f"🔤 Customer matcher loaded: {count} customers")
+        return count
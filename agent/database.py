@@ -1,11 +1,54 @@
 import os
+import time
+import asyncio
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
 from pymongo.errors import DuplicateKeyError
 
+from identity import customer_keys, name_key, to_e164
+from customer_matcher import CustomerMatcher
+from profile_cache import ProfileCache
+from tracing import traced
+
 logger = logging.getLogger("auralis-db")
 
+DAILY_CAPACITY = int(os.getenv("DAILY_CAPACITY", "2"))
+OPEN_DATES_CACHE_SECONDS = float(os.getenv("OPEN_DATES_CACHE_SECONDS", "30"))
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+def is_iso_date(value) -> bool:
+    try:
+        datetime.strptime(value, "%Y-%m-%d")
+        return True
+    except (TypeError, ValueError):
+        return False
+
+def as_pending_request(booking_data: dict) -> dict:
+    # What the validation worker claims: status plus FIFO timestamp.
+    booking_data['status'] = 'pending_validation'
+    booking_data['submission_timestamp'] = datetime.utcnow()
+    return booking_data
+
+def next_open_dates(start: str, unavailable: set, limit: int = 3, weekday: str = None, horizon_days: int = 30):
+    """
+    Walks the calendar from `start`; days without a capacity document are open
+    at DAILY_CAPACITY, so only full/blocked days need to come from the database.
+    """
+    first = datetime.strptime(start, "%Y-%m-%d")
+    wanted = WEEKDAYS.index(weekday.lower()) if weekday else None
+    dates = []
+    for offset in range(horizon_days):
+        day = first + timedelta(days=offset)
+        key = day.strftime("%Y-%m-%d")
+        if key in unavailable or (wanted is not None and day.weekday() != wanted):
+            continue
+        dates.append(key)
+        if len(dates) >= limit:
+            break
+    return dates
+
 class DatabaseManager:
     _instance = None
 
@@ -17,6 +60,17 @@ class DatabaseManager:
 
     def __init__(self):
         if self._initialized: return
+
+        self._indexes_ready = False
+        self.matcher = CustomerMatcher()
+        self._matcher_task = None
+        self.profiles = ProfileCache(
+            max_entries=int(os.getenv("PROFILE_CACHE_SIZE", "10000")),
+            ttl_seconds=float(os.getenv("PROFILE_CACHE_TTL_SECONDS", "3600")),
+            fallback_ttl_seconds=float(os.getenv("PROFILE_CACHE_FALLBACK_TTL_SECONDS", "60"))
+        )
+        self._watch_task = None
+        self._open_dates_cache = {}  # (start, limit, weekday, service_type) -> (expires, dates)
         
         self.uri = os.getenv("MONGO_URI")
         self.client = None
@@ -42,57 +96,307 @@ class DatabaseManager:
         except Exception:
             return False
 
+    async def ensure_indexes(self):
+        """
+        Idempotent startup bootstrap for the normalized lookup keys.
+        """
+        if self.db is None or self._indexes_ready: return
+
+        try:
+            await self.db.customers.create_index([("phone_e164", ASCENDING)], name="phone_e164")
+            await self.db.customers.create_index([("name_key", ASCENDING)], name="name_key")
+            # Serves the validation worker's claim query (status, then oldest / expired lease first).
+            await self.db.pending_requests.create_index(
+                [("status", ASCENDING), ("lease_until", ASCENDING), ("submission_timestamp", ASCENDING)],
+                name="status_lease_fifo"
+            )
+            self._indexes_ready = True
+            logger.info("✅ Lookup and queue indexes ready")
+        except Exception as e:
+            logger.error(f"Index bootstrap failed: {e}")
+
+    async def migrate_customer_keys(self, batch_size: int = 500):
+        """
+        Backfills phone_e164 / name_key on customers written before they existed.
+        """
+        if self.db is None: return 0
+
+        missing = {"$or": [{"phone_e164": {"$exists": False}}, {"name_key": {"$exists": False}}]}
+        migrated = 0
+        ops = []
+        async for doc in self.db.customers.find(missing, {"name": 1, "phone": 1}):
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": customer_keys(doc)}))
+            if len(ops) >= batch_size:
+                await self.db.customers.bulk_write(ops, ordered=False)
+                migrated += len(ops)
+                ops = []
+        if ops:
+            await self.db.customers.bulk_write(ops, ordered=False)
+            migrated += len(ops)
+
+        logger.info(f"🔁 Migrated lookup keys on {migrated} customers")
+        return migrated
+
+    @traced("db.get_customer_by_lookup")
     async def get_customer_by_lookup(self, identifier: str):
         # 🛡️ FIX: Explicit None check prevents the crash
         if self.db is None: return None
-        
-        return await self.db.customers.find_one({
-            "$or": [
-                {"phone": identifier},
-                {"name": {"$regex": f"^{identifier}$", "$options": "i"}}
-            ]
-        })
-
-    async def check_availability(self, date: str):
+
+        # Equality on indexed, pre-normalized keys: no regex, no collection scan.
+        phone = to_e164(identifier)
+        key = name_key(identifier)
+        keys = ProfileCache.keys_for(phone, key)
+        if not keys: return None
+
+        cached = self.profiles.get(keys)
+        if cached is not None: return cached
+
+        clauses = []
+        if phone:
+            clauses.append({"phone_e164": phone})
+        if key:
+            clauses.append({"name_key": key})
+        customer = await self.db.customers.find_one({"$or": clauses})
+        if customer:
+            self.profiles.put(customer)
+        return customer
+
+    def cached_customer(self, identifier: str):
+        """
+        The last profile seen for `identifier`, ignoring the cache TTL: the
+        degraded answer when the database can't be reached in time.
+        """
+        keys = ProfileCache.keys_for(to_e164(identifier), name_key(identifier))
+        return self.profiles.get(keys, stale_ok=True) if keys else None
+
+    def watch_customers(self):
+        """
+        Starts (once per worker) the change-stream tail that keeps the profile
+        cache and the fuzzy matcher coherent with writes from anywhere.
+        """
+        if self.db is None or self._watch_task is not None: return
+        self._watch_task = asyncio.create_task(self.profiles.watch(self.db.customers, on_change=self._on_customer_change))
+
+    def _on_customer_change(self, change: dict):
+        if change["operationType"] == "delete":
+            self.matcher.remove(change["documentKey"]["_id"])
+        elif change.get("fullDocument"):
+            self.matcher.add(change["fullDocument"])
+
+    async def load_matcher(self):
+        """
+        Builds the fuzzy name/plate index once per worker; later calls await the same load.
+        """
+        if self.db is None: return
+        if self._matcher_task is None:
+            self._matcher_task = asyncio.ensure_future(self.matcher.load(self.db.customers))
+        try:
+            await asyncio.shield(self._matcher_task)
+        except Exception as e:
+            logger.error(f"Customer matcher load failed: {e}")
+            self._matcher_task = None
+
+    @traced("db.match_customers")
+    async def match_customers(self, query: str, limit: int = 3):
+        """
+        Ranked fuzzy candidates (STT-tolerant) with confidence, in a single call.
+        """
+        if not self.matcher.loaded: return []
+        loop = asyncio.get_running_loop()
+        # ~10-20ms of CPU at 1M customers: keep it off the audio loop.
+        return await loop.run_in_executor(None, self.matcher.match, query, limit)
+
+    async def upsert_customer(self, customer_data: dict):
+        """
+        Writes a customer keyed by E.164 phone and keeps the matcher current.
+        """
+        if self.db is None: return None
+
+        customer_data.update(customer_keys(customer_data))
+        doc = await self.db.customers.find_one_and_update(
+            {"phone_e164": customer_data["phone_e164"]},
+            {"$set": customer_data},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self.matcher.add(doc)
+        self.profiles.invalidate(doc["_id"])
+        return doc
+
+    @staticmethod
+    def _capacity_id(date: str, slot: str = None):
+        # One counter document per day, or per "date#slot" once slots are offered.
+        return f"{date}#{slot}" if slot else date
+
+    async def set_capacity(self, date: str, capacity: int, slot: str = None, blocked_services: list = None):
+        """
+        Opens (or resizes) a day/slot on the capacity calendar without touching reservations.
+        `blocked_services` lists service types not offered that day (e.g. ["detailing"]).
+        """
+        if self.db is None: return
+        fields = {"capacity": capacity}
+        if blocked_services is not None:
+            fields["blocked_services"] = [s.lower() for s in blocked_services]
+        await self.db.availability.update_one(
+            {"_id": self._capacity_id(date, slot)},
+            {"$set": fields, "$setOnInsert": {"date": date, "slot": slot, "reserved": 0}},
+            upsert=True
+        )
+        self.invalidate_open_dates()
+
+    @traced("db.check_availability")
+    async def check_availability(self, date: str, slot: str = None):
+        if self.db is None or not is_iso_date(date): return False
+
+        # O(1) point read on the capacity calendar; never scans bookings.
+        doc = await self.db.availability.find_one({"_id": self._capacity_id(date, slot)}, {"capacity": 1, "reserved": 1})
+        capacity = doc["capacity"] if doc else DAILY_CAPACITY
+        reserved = doc["reserved"] if doc else 0
+
+        logger.info(f"📅 Checking {date}: {reserved}/{capacity} slots booked.")
+        return reserved < capacity
+
+    async def reserve_capacity(self, date: str, slot: str = None, units: int = 1):
+        """
+        Atomically takes `units` of capacity (all or nothing). Returns False when
+        they don't fit. The conditional increment runs as a single document
+        update, so two concurrent callers can never both take the last unit.
+        """
         if self.db is None: return False
-        
-        # 📅 LOGIC UPDATE: Allow up to 2 slots per day
-        count = await self.db.bookings.count_documents({"date": date})
-        
-        logger.info(f"📅 Checking {date}: {count}/2 slots booked.")
-        return count < 2
+
+        capacity_id = self._capacity_id(date, slot)
+        for _ in range(2):
+            doc = await self.db.availability.find_one_and_update(
+                {"_id": capacity_id, "$expr": {"$lte": [{"$add": ["$reserved", units]}, "$capacity"]}},
+                {"$inc": {"reserved": units}}
+            )
+            if doc is not None:
+                return True
+            # Full, or a day nobody has opened yet ($expr can't be used in an upsert
+            # filter): open it at the default capacity and retry the increment once.
+            await self.db.availability.update_one(
+                {"_id": capacity_id},
+                {"$setOnInsert": {"date": date, "slot": slot, "capacity": DAILY_CAPACITY, "reserved": 0}},
+                upsert=True
+            )
+        return False
+
+    async def release_capacity(self, date: str, slot: str = None, units: int = 1):
+        if self.db is None: return
+        # A freed unit can reopen a day that cached answers skipped.
+        self.invalidate_open_dates()
+        await self.db.availability.update_one(
+            {"_id": self._capacity_id(date, slot), "reserved": {"$gte": units}},
+            {"$inc": {"reserved": -units}}
+        )
+
+    async def rebuild_capacity(self):
+        """
+        Recomputes reserved counters from the bookings collection (migration / repair).
+        """
+        if self.db is None: return 0
+
+        updated = 0
+        async for row in self.db.bookings.aggregate([{"$group": {"_id": "$date", "count": {"$sum": 1}}}]):
+            if not row["_id"]: continue
+            await self.db.availability.update_one(
+                {"_id": self._capacity_id(row["_id"])},
+                {"$set": {"reserved": row["count"]}, "$setOnInsert": {"date": row["_id"], "slot": None, "capacity": DAILY_CAPACITY}},
+                upsert=True
+            )
+            updated += 1
+        logger.info(f"🔁 Rebuilt capacity counters for {updated} days")
+        return updated
+
+    @traced("db.find_open_dates")
+    async def find_open_dates(self, limit: int = 3, start: str = None, weekday: str = None, service_type: str = None, horizon_days: int = 30):
+        """
+        Next `limit` bookable dates from `start` (default today), optionally only
+        on one weekday or excluding days that block a service type.
+        """
+        if self.db is None: return []
+        if weekday and weekday.lower() not in WEEKDAYS: return []
+
+        start = start or datetime.now().strftime("%Y-%m-%d")
+        cache_key = (start, limit, (weekday or "").lower(), (service_type or "").lower())
+        cached = self._open_dates_cache.get(cache_key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        end = (datetime.strptime(start, "%Y-%m-%d") + timedelta(days=horizon_days)).strftime("%Y-%m-%d")
+        closed = [{"$expr": {"$gte": ["$reserved", "$capacity"]}}]
+        if service_type:
+            closed.append({"blocked_services": service_type.lower()})
+
+        # One round trip: only the (few) full or blocked days in the window come back.
+        pipeline = [
+            {"$match": {"date": {"$gte": start, "$lt": end}, "slot": None, "$or": closed}},
+            {"$group": {"_id": None, "dates": {"$addToSet": "$date"}}}
+        ]
+        unavailable = set()
+        async for row in self.db.availability.aggregate(pipeline):
+            unavailable.update(row["dates"])
+
+        dates = next_open_dates(start, unavailable, limit, weekday, horizon_days)
+        self._open_dates_cache[cache_key] = (time.monotonic() + OPEN_DATES_CACHE_SECONDS, dates)
+        return dates
+
+    def invalidate_open_dates(self, date: str = None):
+        """
+        Drops cached answers that offered `date` (or everything when no date is given).
+        """
+        if date is None:
+            self._open_dates_cache.clear()
+            return
+        for key in [k for k, (_, dates) in self._open_dates_cache.items() if date in dates]:
+            self._open_dates_cache.pop(key, None)
 
     async def create_booking(self, booking_data: dict):
         if self.db is None: return None
+        # Spoken dates ("tomorrow") must go through dates.DateResolver first.
+        if not is_iso_date(booking_data.get('date')):
+            return {"success": False, "error": "INVALID_DATE"}
         
         idempotency_key = f"{booking_data['phone']}_{booking_data['date']}"
         booking_data['_id'] = idempotency_key 
         booking_data['created_at'] = datetime.utcnow()
 
+        # Reserve first: the counter, not a count over bookings, is what prevents overbooking.
+        if not await self.reserve_capacity(booking_data['date'], booking_data.get('slot')):
+            return {"success": False, "error": "FULLY_BOOKED"}
+
+        self.invalidate_open_dates(booking_data['date'])
         try:
             await self.db.bookings.insert_one(booking_data)
             return {"success": True, "id": idempotency_key}
         except DuplicateKeyError:
+            await self.release_capacity(booking_data['date'], booking_data.get('slot'))
             return {"success": False, "error": "BOOKING_EXISTS"}
         except Exception as e:
+            await self.release_capacity(booking_data['date'], booking_data.get('slot'))
             return {"success": False, "error": "DB_WRITE_FAILURE"}
         
 
+    @traced("db.queue_booking_request")
     async def queue_booking_request(self, booking_data: dict):
         """
         Pushes the appointment payload to a staging collection (Queue).
         This does NOT touch the official 'bookings' calendar.
         """
         if self.db is None: return {"success": False, "error": "DB_DISCONNECTED"}
+        if not is_iso_date(booking_data.get('requested_date')):
+            return {"success": False, "error": "INVALID_DATE"}
         
-        # Enforce 'Pending' status
-        booking_data['status'] = 'pending_validation'
-        booking_data['submission_timestamp'] = datetime.utcnow()
+        as_pending_request(booking_data)
         
         try:
             # We treat this collection as a FIFO queue
             result = await self.db.pending_requests.insert_one(booking_data)
+            self.invalidate_open_dates(booking_data.get('requested_date'))
             return {"success": True, "reference_id": str(result.inserted_id)}
+        except DuplicateKeyError:
+            # A retry of a request that already landed (caller-assigned _id).
+            return {"success": True, "reference_id": str(booking_data['_id'])}
         except Exception as e:
             logger.error(f"Queue push failed: {e}")
             return {"success": False, "error": "QUEUE_FAILURE"}
\ No newline at end of file
@@ -0,0 +1,200 @@
+import os
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+DEALERSHIP_TZ = os.getenv("DEALERSHIP_TZ", "Asia/Kolkata")
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+MONTHS = ["january", "february", "march", "april", "may", "june", "july", "august", "september", "october", "november", "december"]
+MONTH_ALIASES = {m[:3]: i + 1 for i, m in enumerate(MONTHS)} | {m: i + 1 for i, m in enumerate(MONTHS)} | {"sept": 9}
+NUMBER_WORDS = {"a": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10, "couple of": 2}
+# Spoken parts of the day map onto the service desk's standard slots.
+DAY_PARTS = {"morning": "09:00", "noon": "12:00", "midday": "12:00", "afternoon": "14:00", "evening": "17:00", "tonight": "17:00"}
+
+HOUR_WORDS = {w: i + 1 for i, w in enumerate(["one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten", "eleven", "twelve"])}
+MINUTE_WORDS = {"fifteen": 15, "thirty": 30, "forty five": 45, "forty-five": 45}
+# A time said without AM/PM ("Friday at 3") means opening hours: 1-6 is afternoon.
+LAST_PM_HOUR = 6
+
+_MONTH = "|".join(sorted(MONTH_ALIASES, key=len, reverse=True))
+_WEEKDAY = "|".join(WEEKDAYS)
+_TIME = re.compile(
+    r"\b(?:at\s+)?(?P<h12>\d{1,2})(?::(?P<m12>\d{2}))?\s*(?P<ampm>a\.?m\.?|p\.?m\.?)(?=\W|$)"
+    r"|\b(?:at\s+)?(?P<h24>[01]?\d|2[0-3]):(?P<m24>\d{2})\b"
+    r"|\bat\s+(?P<hour>\d{1,2})(?:\s*o'?clock)?\b(?!\s*[:/.-]\d)"
+    r"|\b(?P<oclock>\d{1,2})\s*o'?clock\b"
+)
+_HOUR_WORD = "|".join(HOUR_WORDS)
+_MINUTE_WORD = "|".join(MINUTE_WORDS)
+# "ten AM", "ten thirty", "at three": spelled hours next to a time marker.
+_SPELLED_TIME = re.compile(
+    rf"\b(?P<h>{_HOUR_WORD})(?:\s+(?P<m>{_MINUTE_WORD}))?(?=\s*(?:a\.?m|p\.?m|o'?clock)\b)"
+    rf"|(?<=\bat )(?P<at_h>{_HOUR_WORD})(?:\s+(?P<at_m>{_MINUTE_WORD}))?\b"
+)
+
+@dataclass(frozen=True)
+class ResolvedDate:
+    date: str            # ISO "YYYY-MM-DD"
+    slot: str = None     # "HH:MM" (24h) when a time was spoken
+
+    @property
+    def key(self):
+        # Same shape as the capacity calendar ids ("date" or "date#slot").
+        return f"{self.date}#{self.slot}" if self.slot else self.date
+
+def _clean(text: str) -> str:
+    # STT punctuates: "Tomorrow." / "Friday?"
+    text = re.sub(r"[.!?]+$", "", text.lower().strip()).replace(",", " ")
+    text = re.sub(r"(\d+)(st|nd|rd|th)\b", r"\1", text)
+    return " ".join(text.split())
+
+def _digits(match) -> str:
+    hour = HOUR_WORDS[match.group("h") or match.group("at_h")]
+    minute = match.group("m") or match.group("at_m")
+    return f"{hour}:{MINUTE_WORDS[minute]:02d}" if minute else str(hour)
+
+def _opening_hours(hour: int) -> int:
+    return hour + 12 if 1 <= hour <= LAST_PM_HOUR else hour
+
+def _time_of(text: str):
+    text = _SPELLED_TIME.sub(_digits, text)
+    match = _TIME.search(text)
+    if match:
+        if match.group("h12"):
+            hour, minute = int(match.group("h12")), int(match.group("m12") or 0)
+            if not 1 <= hour <= 12 or minute > 59:
+                return None, text
+            if match.group("ampm").startswith("p") and hour != 12:
+                hour += 12
+            elif match.group("ampm").startswith("a") and hour == 12:
+                hour = 0
+        elif match.group("h24"):
+            hour, minute = int(match.group("h24")), int(match.group("m24"))
+            if not match.group("h24").startswith("0"):
+                hour = _opening_hours(hour)
+        else:
+            hour, minute = _opening_hours(int(match.group("hour") or match.group("oclock"))), 0
+            if hour > 23:
+                return None, text
+        return f"{hour:02d}:{minute:02d}", (text[:match.start()] + text[match.end():]).strip()
+
+    for part, slot in DAY_PARTS.items():
+        if re.search(rf"\b{part}\b", text):
+            rest = re.sub(rf"\b(in the |this )?{part}\b", "", text).strip()
+            # "tonight" is also a day.
+            return slot, ("today " + rest).strip() if part == "tonight" else rest
+    return None, text
+
+def _safe_date(year: int, month: int, day: int):
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+def _day_of(text: str, today: date):
+    text = re.sub(r"\b(on|the|for|of|please|maybe|around|by)\b", " ", text)
+    text = " ".join(text.split())
+    if not text or text in ("today", "now"):
+        return today if text else None
+
+    if text in ("tomorrow", "tmrw", "tmr"):
+        return today + timedelta(days=1)
+    if text in ("day after tomorrow", "day after"):
+        return today + timedelta(days=2)
+
+    match = re.fullmatch(r"in (\d+|" + "|".join(NUMBER_WORDS) + r") (day|days|week|weeks)", text)
+    if match:
+        n = int(match.group(1)) if match.group(1).isdigit() else NUMBER_WORDS[match.group(1)]
+        return today + timedelta(days=n * (7 if match.group(2).startswith("week") else 1))
+    if text == "next week":
+        return today + timedelta(days=7 - today.weekday())
+
+    match = re.fullmatch(rf"(this |next |coming |this coming )?({_WEEKDAY})", text)
+    if match:
+        target = WEEKDAYS.index(match.group(2))
+        ahead = (target - today.weekday()) % 7 or 7
+        if (match.group(1) or "").strip() == "next":
+            # "next Friday" is Friday of next week.
+            monday = today + timedelta(days=7 - today.weekday())
+            return monday + timedelta(days=target)
+        return today + timedelta(days=ahead)
+
+    # "the 10th", "Tuesday the 11th": the next such day of the month.
+    match = re.fullmatch(rf"(?:({_WEEKDAY}) )?(\d{{1,2}})", text)
+    if match:
+        resolved = _safe_date(today.year, today.month, int(match.group(2)))
+        if resolved is None or resolved < today:
+            next_month = date(today.year + today.month // 12, today.month % 12 + 1, 1)
+            resolved = _safe_date(next_month.year, next_month.month, int(match.group(2)))
+        if resolved is None or (match.group(1) and resolved.weekday() != WEEKDAYS.index(match.group(1))):
+            return None
+        return resolved
+
+    match = re.fullmatch(r"(\d{4})-(\d{1,2})-(\d{1,2})", text)
+    if match:
+        return _safe_date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+
+    # "4 march", "march 4", optionally followed by a year.
+    match = re.fullmatch(rf"(\d{{1,2}}) ({_MONTH})(?: (\d{{4}}))?", text) or re.fullmatch(rf"({_MONTH}) (\d{{1,2}})(?: (\d{{4}}))?", text)
+    if match:
+        a, b, year = match.groups()
+        day, month = (int(a), MONTH_ALIASES[b]) if a.isdigit() else (int(b), MONTH_ALIASES[a])
+        return _upcoming(today, day, month, year)
+
+    # Numeric dates are day-first, as spoken and written locally: "4/3" is 4 March.
+    match = re.fullmatch(r"(\d{1,2})[/.-](\d{1,2})(?:[/.-](\d{4}))?", text)
+    if match:
+        return _upcoming(today, int(match.group(1)), int(match.group(2)), match.group(3))
+    return None
+
+def _upcoming(today: date, day: int, month: int, year):
+    if year:
+        return _safe_date(int(year), month, day)
+    resolved = _safe_date(today.year, month, day)
+    if resolved and resolved < today:
+        resolved = _safe_date(today.year + 1, month, day)
+    return resolved
+
+@lru_cache(maxsize=2048)
+def _resolve(text: str, today: date):
+    # Memoized on (phrase, anchor day): every caller saying "tomorrow at 10" today shares one parse.
+    # The flag is True when only a time was said, so the day can still roll over.
+    slot, rest = _time_of(_clean(text))
+    day = _day_of(rest, today) if rest else (today if slot else None)
+    if day is None or day < today:
+        return None
+    return ResolvedDate(day.isoformat(), slot), not rest
+
+class DateResolver:
+    """
+    Turns spoken dates ("tomorrow at 10 AM", "next Friday", "4th March") into
+    canonical ISO dates and HH:MM slots, anchored to the call's start time in
+    the dealership's timezone.
+    """
+    def __init__(self, now: datetime = None, tz: str = DEALERSHIP_TZ):
+        self.tz = ZoneInfo(tz)
+        self.now = now.astimezone(self.tz) if now and now.tzinfo else (now.replace(tzinfo=self.tz) if now else datetime.now(self.tz))
+
+    @property
+    def today(self) -> str:
+        return self.now.date().isoformat()
+
+    def resolve(self, text: str):
+        """
+        Returns a ResolvedDate, or None when the phrase is not a usable future date.
+        """
+        if not text or not text.strip():
+            return None
+        parsed = _resolve(text, self.now.date())
+        if parsed is None:
+            return None
+        resolved, time_only = parsed
+        if resolved.slot and resolved.date == self.today and resolved.slot <= self.now.strftime("%H:%M"):
+            # "10 AM" said at 11:30 means tomorrow; "today at 10 AM" has already passed.
+            if not time_only:
+                return None
+            return ResolvedDate((self.now.date() + timedelta(days=1)).isoformat(), resolved.slot)
+        return resolved
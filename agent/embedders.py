@@ -0,0 +1,104 @@
+import os
+import sys
+import shutil
+import logging
+import numpy as np
+
+logger = logging.getLogger("auralis-rag")
+
+MODEL_ID = "sentence-transformers/all-MiniLM-L6-v2"
+
+class SentenceTransformerEmbedder:
+    """
+    Reference backend: PyTorch SentenceTransformer (Transformer -> mean pool -> L2 normalize).
+    """
+    name = "torch"
+
+    def __init__(self):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+
+    def encode(self, texts):
+        return self.model.encode(texts)
+
+class OnnxEmbedder:
+    """
+    CPU-only MiniLM via onnxruntime + the fast tokenizer (no torch import).
+    Reproduces the SentenceTransformer head: mean pooling over the attention
+    mask, then L2 normalization. Point it at `model_quantized.onnx` for int8.
+    """
+    name = "onnx"
+
+    def __init__(self, model_dir: str, model_file: str = "model.onnx", max_length: int = 256, threads: int = 0):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def encode(self, texts):
+        single = isinstance(texts, str)
+        batch = self.tokenizer.encode_batch([texts] if single else list(texts))
+
+        input_ids = np.array([e.ids for e in batch], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in batch], dtype=np.int64)
+        feed = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feed["token_type_ids"] = np.zeros_like(input_ids)
+
+        hidden = self.session.run(None, feed)[0]
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+        return pooled[0] if single else pooled
+
+def load_embedder():
+    """
+    RAG_EMBEDDER=torch (default) | onnx. The ONNX backend reads
+    RAG_ONNX_MODEL_DIR and RAG_ONNX_MODEL_FILE (e.g. model_quantized.onnx).
+    """
+    backend = os.getenv("RAG_EMBEDDER", "torch").lower()
+    if backend == "onnx":
+        return OnnxEmbedder(
+            os.getenv("RAG_ONNX_MODEL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "minilm-onnx")),
+            model_file=os.getenv("RAG_ONNX_MODEL_FILE", "model.onnx"),
+            threads=int(os.getenv("RAG_ONNX_THREADS", "0"))
+        )
+    return SentenceTransformerEmbedder()
+
+def download(model_dir: str):
+    # The model repo ships a pre-exported ONNX graph, so no torch/optimum at build time.
+    from huggingface_hub import hf_hub_download
+
+    os.makedirs(model_dir, exist_ok=True)
+    for name in ("onnx/model.onnx", "tokenizer.json"):
+        shutil.copy(hf_hub_download(MODEL_ID, name), os.path.join(model_dir, os.path.basename(name)))
+    print(f"Downloaded {MODEL_ID} ONNX export to {model_dir}")
+
+def quantize(model_dir: str):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(
+        os.path.join(model_dir, "model.onnx"),
+        os.path.join(model_dir, "model_quantized.onnx"),
+        weight_type=QuantType.QInt8
+    )
+    print(f"Wrote int8 model to {model_dir}/model_quantized.onnx")
+
+if __name__ == "__main__":
+    # python embedders.py download models/minilm-onnx
+    # python embedders.py quantize models/minilm-onnx
+    command, target = sys.argv[1], sys.argv[2]
+    {"download": download, "quantize": quantize}[command](target)
@@ -0,0 +1,106 @@
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+
+import metrics
+
+logger = logging.getLogger("auralis-rag")
+
+class EmbeddingBatcher:
+    """
+    Collects encode requests from every session in the process and runs them
+    as one batched `encode` after at most `max_wait_ms`, or as soon as
+    `max_batch_size` requests are waiting. A single daemon thread owns the
+    embedder, so it works across event loops (thread-based job executors too).
+    """
+    def __init__(self, embedder, max_batch_size: int = 32, max_wait_ms: float = 3.0):
+        self.embedder = embedder
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+
+        # (text, future, enqueued_at)
+        self._pending = []
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self.batch_sizes = metrics.histogram("rag_embed_batch_size", buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+        self.queue_delay_ms = metrics.histogram("rag_embed_queue_delay_ms")
+        self.encode_ms = metrics.histogram("rag_embed_encode_ms")
+
+        self._thread = threading.Thread(target=self._run, name="rag-embed-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("EmbeddingBatcher is closed")
+            self._pending.append((text, future, time.perf_counter()))
+            self._cond.notify()
+        return future
+
+    async def encode(self, text: str):
+        # Cancelling the awaiting task cancels the request if it has not started yet.
+        return await asyncio.wrap_future(self.submit(text))
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=5)
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return None
+
+            deadline = self._pending[0][2] + self.max_wait
+            while len(self._pending) < self.max_batch_size and not self._closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            # Requests cancelled while queued are skipped, not encoded.
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            for _, _, enqueued_at in batch:
+                self.queue_delay_ms.observe((started - enqueued_at) * 1000)
+            self.batch_sizes.observe(len(batch))
+
+            try:
+                vectors = self.embedder.encode([text for text, _, _ in batch])
+            except Exception as e:
+                logger.error(f"Batched encode failed: {e}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            self.encode_ms.observe((time.perf_counter() - started) * 1000)
+            for (_, future, _), vector in zip(batch, vectors):
+                # .tolist() is required because Pinecone expects a list, not a numpy array
+                future.set_result(vector.tolist())
+
+    def stats(self) -> dict:
+        return {
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_delay_ms": self.queue_delay_ms.snapshot(),
+            "encode_ms": self.encode_ms.snapshot()
+        }
@@ -0,0 +1,399 @@
+"""
+In-process stand-ins for the services the agent talks to, for tests and
+offline runs. Only the calls the agent actually makes are implemented.
+"""
+import time
+import asyncio
+import itertools
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from context_manager import count_tokens
+
+class _ChangeStream:
+    def __init__(self, queue: asyncio.Queue, on_close):
+        self._queue = queue
+        self._on_close = on_close
+        self.resume_token = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self._on_close(self._queue)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        change = await self._queue.get()
+        self.resume_token = change["_id"]
+        return change
+
+def _value(doc: dict, operand):
+    # "$field" references and {"$add": [...]} inside $expr.
+    if isinstance(operand, dict) and "$add" in operand:
+        return sum(_value(doc, term) or 0 for term in operand["$add"])
+    return doc.get(operand[1:]) if isinstance(operand, str) and operand.startswith("$") else operand
+
+def _apply_update(doc: dict, update: dict, inserting: bool = False):
+    doc.update(update.get("$set", {}))
+    for field, amount in update.get("$inc", {}).items():
+        doc[field] = doc.get(field, 0) + amount
+    for field in update.get("$unset", {}):
+        doc.pop(field, None)
+    if inserting:
+        doc.update(update.get("$setOnInsert", {}))
+
+_COMPARE = {
+    "$gte": lambda a, b: a is not None and a >= b,
+    "$gt": lambda a, b: a is not None and a > b,
+    "$lte": lambda a, b: a is not None and a <= b,
+    "$lt": lambda a, b: a is not None and a < b,
+    "$ne": lambda a, b: a != b,
+    "$in": lambda a, b: a in b,
+}
+
+def _matches(doc: dict, query: dict) -> bool:
+    for field, expected in query.items():
+        if field == "$or":
+            if not any(_matches(doc, clause) for clause in expected):
+                return False
+        elif field == "$expr":
+            (op, (left, right)), = expected.items()
+            if not _COMPARE[op](_value(doc, left), _value(doc, right)):
+                return False
+        elif isinstance(expected, dict) and expected and all(k.startswith("$") for k in expected):
+            for op, operand in expected.items():
+                if op == "$exists":
+                    if (field in doc) != bool(operand):
+                        return False
+                elif not _COMPARE[op](doc.get(field), operand):
+                    return False
+        elif isinstance(doc.get(field), list) and not isinstance(expected, list):
+            # Array fields match any element, as in Mongo.
+            if expected not in doc[field]:
+                return False
+        elif doc.get(field) != expected:
+            return False
+    return True
+
+class _Cursor:
+    def __init__(self, docs: list):
+        self._docs = docs
+
+    def sort(self, field: str, direction: int = 1):
+        self._docs.sort(key=lambda doc: doc.get(field), reverse=direction < 0)
+        return self
+
+    def limit(self, count: int):
+        self._docs = self._docs[:count] if count else self._docs
+        return self
+
+    async def to_list(self, length: int = None):
+        batch = self._docs[:length] if length else self._docs
+        self._docs = self._docs[len(batch):]
+        return batch
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._docs:
+            raise StopAsyncIteration
+        return self._docs.pop(0)
+
+class InMemoryCollection:
+    """
+    Equality / comparison / $or / $expr filters, $set / $inc / $unset /
+    $setOnInsert updates (with upsert), a $match + $group aggregate and a
+    change stream, like motor's AsyncIOMotorCollection for the subset of calls
+    this codebase makes. `latency` (seconds) is added to every round trip for
+    load tests.
+    """
+    def __init__(self, supports_change_streams: bool = True, latency: float = 0.0):
+        self.docs = {}
+        self.supports_change_streams = supports_change_streams
+        self.latency = latency
+        self.reads = 0
+        self._ids = itertools.count(1)
+        self._tokens = itertools.count(1)
+        self._watchers = []
+
+    def _emit(self, operation: str, doc_id, doc=None):
+        change = {"_id": {"_data": next(self._tokens)}, "operationType": operation, "documentKey": {"_id": doc_id}, "fullDocument": doc}
+        for queue in self._watchers:
+            queue.put_nowait(change)
+
+    def watch(self, full_document=None, resume_after=None):
+        if not self.supports_change_streams:
+            raise RuntimeError("The $changeStream stage is only supported on replica sets")
+        queue = asyncio.Queue()
+        self._watchers.append(queue)
+        return _ChangeStream(queue, self._watchers.remove)
+
+    async def _round_trip(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def create_index(self, keys, name: str = None, **kwargs):
+        return name or "_".join(field for field, _ in keys)
+
+    def find(self, query: dict = None, projection=None, batch_size: int = None):
+        self.reads += 1
+        return _Cursor([dict(doc) for doc in self.docs.values() if _matches(doc, query or {})])
+
+    async def count_documents(self, query: dict):
+        await self._round_trip()
+        return sum(1 for doc in self.docs.values() if _matches(doc, query))
+
+    async def aggregate(self, pipeline: list):
+        await self._round_trip()
+        self.reads += 1
+        docs = list(self.docs.values())
+        for stage in pipeline:
+            (op, spec), = stage.items()
+            if op == "$match":
+                docs = [doc for doc in docs if _matches(doc, spec)]
+            elif op == "$group":
+                groups = {}
+                for doc in docs:
+                    group = groups.setdefault(_value(doc, spec["_id"]), {"_id": _value(doc, spec["_id"])})
+                    for field, accumulator in spec.items():
+                        if field == "_id":
+                            continue
+                        (acc, operand), = accumulator.items()
+                        if acc == "$addToSet":
+                            values = group.setdefault(field, [])
+                            if _value(doc, operand) not in values:
+                                values.append(_value(doc, operand))
+                        elif acc == "$sum":
+                            group[field] = group.get(field, 0) + (_value(doc, operand) or 0)
+                docs = list(groups.values())
+            else:
+                raise NotImplementedError(f"aggregate stage {op}")
+        for doc in docs:
+            yield dict(doc)
+
+    async def find_one(self, query: dict = None, projection=None, sort=None):
+        await self._round_trip()
+        self.reads += 1
+        docs = list(self.docs.values())
+        for field, direction in reversed(sort or []):
+            docs.sort(key=lambda doc: doc.get(field), reverse=direction < 0)
+        for doc in docs:
+            if _matches(doc, query or {}):
+                return dict(doc)
+        return None
+
+    async def insert_one(self, doc: dict):
+        await self._round_trip()
+        doc.setdefault("_id", next(self._ids))
+        if doc["_id"] in self.docs:
+            raise DuplicateKeyError("E11000 duplicate key error")
+        self.docs[doc["_id"]] = dict(doc)
+        self._emit("insert", doc["_id"], dict(doc))
+        return type("InsertOneResult", (), {"inserted_id": doc["_id"]})()
+
+    async def insert_many(self, docs: list, ordered: bool = True):
+        await self._round_trip()
+        inserted, errors = [], []
+        for index, doc in enumerate(docs):
+            doc.setdefault("_id", next(self._ids))
+            if doc["_id"] in self.docs:
+                errors.append({"index": index, "code": 11000, "errmsg": "E11000 duplicate key error"})
+                if ordered:
+                    break
+                continue
+            self.docs[doc["_id"]] = dict(doc)
+            self._emit("insert", doc["_id"], dict(doc))
+            inserted.append(doc["_id"])
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(inserted)})
+        return type("InsertManyResult", (), {"inserted_ids": inserted})()
+
+    def _update(self, query: dict, update: dict, upsert: bool):
+        # No await between match and write: atomic, like a single-document update in Mongo.
+        for doc in self.docs.values():
+            if _matches(doc, query):
+                before = dict(doc)
+                _apply_update(doc, update)
+                self._emit("update", doc["_id"], dict(doc))
+                return before, dict(doc)
+        if not upsert:
+            return None, None
+        doc = {field: value for field, value in query.items() if not field.startswith("$") and not isinstance(value, dict)}
+        doc.setdefault("_id", next(self._ids))
+        _apply_update(doc, update, inserting=True)
+        self.docs[doc["_id"]] = doc
+        self._emit("insert", doc["_id"], dict(doc))
+        return None, dict(doc)
+
+    async def update_one(self, query: dict, update: dict, upsert: bool = False):
+        await self._round_trip()
+        before, after = self._update(query, update, upsert)
+        matched = int(before is not None)
+        return type("UpdateResult", (), {"matched_count": matched, "modified_count": matched, "upserted_id": None if matched or after is None else after["_id"]})()
+
+    async def update_many(self, query: dict, update: dict):
+        await self._round_trip()
+        matched = [doc for doc in self.docs.values() if _matches(doc, query)]
+        for doc in matched:
+            _apply_update(doc, update)
+            self._emit("update", doc["_id"], dict(doc))
+        return type("UpdateResult", (), {"matched_count": len(matched), "modified_count": len(matched)})()
+
+    async def bulk_write(self, operations: list, ordered: bool = True):
+        # UpdateOne operations only.
+        await self._round_trip()
+        modified = sum(self._update(op._filter, op._doc, bool(op._upsert))[0] is not None for op in operations)
+        return type("BulkWriteResult", (), {"modified_count": modified})()
+
+    async def find_one_and_update(self, query: dict, update: dict, projection=None, upsert: bool = False, return_document: bool = False):
+        await self._round_trip()
+        before, after = self._update(query, update, upsert)
+        # ReturnDocument.AFTER is True, BEFORE is False.
+        return after if return_document else before
+
+    async def delete_one(self, query: dict):
+        doc = await self.find_one(query)
+        if doc is not None:
+            del self.docs[doc["_id"]]
+            self._emit("delete", doc["_id"])
+        return type("DeleteResult", (), {"deleted_count": int(doc is not None)})()
+
+class InMemoryDatabase:
+    def __init__(self, supports_change_streams: bool = True, latency: float = 0.0):
+        self.supports_change_streams = supports_change_streams
+        self.latency = latency
+        self._collections = {}
+
+    def __getattr__(self, name: str) -> InMemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name not in self._collections:
+            self._collections[name] = InMemoryCollection(self.supports_change_streams, self.latency)
+        return self._collections[name]
+
+    def __getitem__(self, name: str) -> InMemoryCollection:
+        return getattr(self, name)
+
+class FakeSTT:
+    """
+    Scripted speech recognition: hands an utterance to `on_transcript` as
+    growing interim transcripts, then the final one `latency` seconds after
+    the caller stops speaking.
+    """
+    def __init__(self, latency: float = 0.0, words_per_interim: int = 3):
+        self.latency = latency
+        self.words_per_interim = words_per_interim
+
+    async def transcribe(self, text: str, on_transcript=None) -> str:
+        words = text.split()
+        if on_transcript is not None:
+            for end in range(self.words_per_interim, len(words), self.words_per_interim):
+                on_transcript(" ".join(words[:end]), False)
+                await asyncio.sleep(0)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if on_transcript is not None:
+            on_transcript(text, True)
+        return text
+
+class FakeLLM:
+    """
+    Deterministic model: waits `ttft` plus `completion_tokens / tokens_per_second`
+    and returns a canned reply, so only the prompt size it is handed varies.
+    """
+    def __init__(self, ttft: float = 0.0, tokens_per_second: float = 0.0, reply: str = "Certainly."):
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.reply = reply
+        self.prompt_tokens = 0
+
+    async def complete(self, chat_ctx, completion_tokens: int = 12) -> str:
+        self.prompt_tokens += sum(count_tokens(m.content if isinstance(m.content, str) else "") for m in chat_ctx.messages)
+        delay = self.ttft + (completion_tokens / self.tokens_per_second if self.tokens_per_second else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        return self.reply
+
+class FakeTTS:
+    """
+    Synthesis that produces silent 16-bit PCM after `ttfb` seconds, one
+    100ms frame per ~12 characters.
+    """
+    def __init__(self, ttfb: float = 0.0, sample_rate: int = 24000):
+        self.ttfb = ttfb
+        self.sample_rate = sample_rate
+
+    async def synthesize(self, text: str) -> list:
+        if self.ttfb:
+            await asyncio.sleep(self.ttfb)
+        frame = bytes(self.sample_rate // 10 * 2)
+        return [frame] * max(1, len(text) // 12)
+
+class FakeKnowledgeBase:
+    def __init__(self, latency: float = 0.0, answer: str = "Scheduled servicing is included for the first four years."):
+        self.latency = latency
+        self.answer = answer
+
+    async def asearch(self, query: str, timeout: float = None, strict: bool = False):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.answer
+
+class _FakeRedisPipeline:
+    def __init__(self, redis):
+        self._redis = redis
+        self._commands = []
+
+    def set(self, key, value, ex=None):
+        self._commands.append((key, value, ex))
+        return self
+
+    async def execute(self):
+        await self._redis._round_trip()
+        for key, value, ex in self._commands:
+            self._redis._set(key, value, ex)
+        return [True] * len(self._commands)
+
+class FakeRedis:
+    """
+    The redis.asyncio calls session_store.py makes (get / set ex / delete /
+    non-transactional pipeline), with expiry and a round-trip counter.
+    """
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.round_trips = 0
+        self.down = False
+        self._data = {}  # key -> (expires_at or None, bytes)
+
+    async def _round_trip(self):
+        if self.down:
+            raise ConnectionError("Error 111 connecting to localhost:6379. Connection refused.")
+        self.round_trips += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def _set(self, key, value, ex=None):
+        self._data[key] = (time.monotonic() + ex if ex else None, value if isinstance(value, bytes) else str(value).encode())
+
+    def pipeline(self, transaction: bool = True):
+        return _FakeRedisPipeline(self)
+
+    async def set(self, key, value, ex=None):
+        await self._round_trip()
+        self._set(key, value, ex)
+        return True
+
+    async def get(self, key):
+        await self._round_trip()
+        entry = self._data.get(key)
+        if entry is None or (entry[0] is not None and entry[0] <= time.monotonic()):
+            self._data.pop(key, None)
+            return None
+        return entry[1]
+
+    async def delete(self, key):
+        await self._round_trip()
+        return int(self._data.pop(key, None) is not None)
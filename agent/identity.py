@@ -0,0 +1,52 @@
+import os
+import re
+import unicodedata
+
+DEFAULT_COUNTRY_CODE = os.getenv("DEFAULT_COUNTRY_CODE", "91")
+
+def to_e164(raw: str, country_code: str = DEFAULT_COUNTRY_CODE):
+    """
+    "98765 43210", "+91-9876543210", "0091 9876543210" -> "+919876543210".
+    Returns None when the input can't be a phone number.
+    """
+    if not raw:
+        return None
+    digits = re.sub(r"\D", "", raw)
+
+    if raw.strip().startswith("+"):
+        e164 = digits
+    elif digits.startswith("00"):
+        e164 = digits[2:]
+    elif len(digits) == 10:
+        e164 = country_code + digits
+    elif len(digits) == 11 and digits.startswith("0"):
+        e164 = country_code + digits[1:]
+    elif len(digits) > 10 and digits.startswith(country_code):
+        e164 = digits
+    else:
+        return None
+
+    # E.164 allows at most 15 digits.
+    if not 10 < len(e164) <= 15:
+        return None
+    return "+" + e164
+
+def name_key(name: str):
+    """
+    Case-folded, accent-stripped, punctuation-free name: "  Zoë O'Brien " -> "zoe o brien".
+    """
+    if not name:
+        return None
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    key = re.sub(r"[^\w]+", " ", stripped.casefold()).strip()
+    return key or None
+
+def customer_keys(doc: dict) -> dict:
+    """
+    Indexed lookup keys stored alongside every customer document.
+    """
+    return {
+        "phone_e164": to_e164(doc.get("phone", "")),
+        "name_key": name_key(doc.get("name", ""))
+    }
@@ -0,0 +1,162 @@
+import os
+import re
+import glob
+import hashlib
+import argparse
+import logging
+from dataclasses import dataclass, field
+from dotenv import load_dotenv
+
+from vector_store import LocalVectorIndex, write_remote_generation
+
+load_dotenv()
+logger = logging.getLogger("auralis-ingest")
+
+ID_PREFIX = "kb_"
+# Positional ids written by the old seed_knowledge.py; cleaned up on first run.
+LEGACY_PREFIXES = ("vec_",)
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "manuals")
+
+@dataclass
+class Chunk:
+    id: str
+    text: str
+    source: str
+    section: str = ""
+
+@dataclass
+class IngestPlan:
+    to_embed: list = field(default_factory=list)
+    to_delete: list = field(default_factory=list)
+    unchanged: int = 0
+
+def chunk_id(text: str) -> str:
+    # Content-addressed: an edited chunk gets a new id, an untouched one keeps its old id.
+    normalized = re.sub(r"\s+", " ", text).strip()
+    return ID_PREFIX + hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:24]
+
+def _split_long(text: str, max_chars: int):
+    if len(text) <= max_chars:
+        return [text]
+    pieces, current = [], ""
+    for sentence in re.split(r"(?<=[.!?])\s+", text):
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current:
+        pieces.append(current)
+    return pieces
+
+def chunk_document(source: str, content: str, max_chars: int = 500):
+    """
+    Paragraphs (and list items) become chunks; markdown headings are kept as
+    the chunk's section instead of being embedded on their own.
+    """
+    chunks, section = [], ""
+    for block in re.split(r"\n\s*\n", content):
+        block = block.strip()
+        if not block:
+            continue
+        if block.startswith("#"):
+            section = block.lstrip("#").strip()
+            continue
+
+        lines = [line.strip() for line in block.splitlines()]
+        if all(line.startswith(("- ", "* ")) for line in lines):
+            items = [line[2:].strip() for line in lines]
+        else:
+            items = [" ".join(block.split())]
+        for item in items:
+            for text in _split_long(item, max_chars):
+                chunks.append(Chunk(id=chunk_id(text), text=text, source=source, section=section))
+    return chunks
+
+def load_chunks(source_dir: str = SOURCE_DIR, max_chars: int = 500):
+    chunks = {}
+    for path in sorted(glob.glob(os.path.join(source_dir, "**", "*.md"), recursive=True) + glob.glob(os.path.join(source_dir, "**", "*.txt"), recursive=True)):
+        with open(path, "r", encoding="utf-8") as f:
+            for chunk in chunk_document(os.path.relpath(path, source_dir), f.read(), max_chars):
+                # Identical text in two documents is stored once.
+                chunks.setdefault(chunk.id, chunk)
+    return list(chunks.values())
+
+def existing_ids(index) -> set:
+    if isinstance(index, LocalVectorIndex):
+        return set(index.ids)
+    ids = set()
+    for prefix in (ID_PREFIX,) + LEGACY_PREFIXES:
+        for page in index.list(prefix=prefix):
+            ids.update(page)
+    return ids
+
+def plan(chunks: list, current_ids: set) -> IngestPlan:
+    wanted = {c.id for c in chunks}
+    return IngestPlan(
+        to_embed=[c for c in chunks if c.id not in current_ids],
+        to_delete=sorted(current_ids - wanted),
+        unchanged=len(wanted & current_ids)
+    )
+
+def _batches(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def apply(index, ingest_plan: IngestPlan, model, embed_batch: int = 64, upsert_batch: int = 100, delete_batch: int = 1000):
+    dimension = None
+    for batch in _batches(ingest_plan.to_embed, embed_batch):
+        vectors = model.encode([c.text for c in batch])
+        dimension = len(vectors[0])
+        records = [
+            {"id": c.id, "values": v.tolist(), "metadata": {"text": c.text, "source": c.source, "section": c.section}}
+            for c, v in zip(batch, vectors)
+        ]
+        for upsert in _batches(records, upsert_batch):
+            index.upsert(vectors=upsert)
+        print(f"  ⬆️  upserted {len(records)} chunks")
+
+    for batch in _batches(ingest_plan.to_delete, delete_batch):
+        index.delete(ids=batch)
+        print(f"  🗑️  deleted {len(batch)} stale chunks")
+
+    return dimension
+
+def open_index(target: str):
+    if target == "local":
+        return LocalVectorIndex(os.getenv("RAG_LOCAL_INDEX_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "local_index")))
+    from pinecone import Pinecone
+    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+    return pc.Index(os.getenv("PINECONE_INDEX", "dealership-knowledge"))
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally ingest policy manuals into the knowledge index.")
+    parser.add_argument("--source", default=SOURCE_DIR, help="Directory of .md/.txt documents")
+    parser.add_argument("--target", default=os.getenv("RAG_BACKEND", "pinecone").lower(), choices=["pinecone", "local"])
+    parser.add_argument("--max-chars", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    chunks = load_chunks(args.source, args.max_chars)
+    index = open_index(args.target)
+    ingest_plan = plan(chunks, existing_ids(index))
+
+    print(f"📚 {len(chunks)} chunks: {len(ingest_plan.to_embed)} new/changed, {len(ingest_plan.to_delete)} removed, {ingest_plan.unchanged} unchanged.")
+    if args.dry_run or not (ingest_plan.to_embed or ingest_plan.to_delete):
+        print("Nothing to do." if not args.dry_run else "Dry run: no writes.")
+        return
+
+    # Only loaded when something actually needs embedding.
+    model = None
+    if ingest_plan.to_embed:
+        from embedders import load_embedder
+        model = load_embedder()
+
+    dimension = apply(index, ingest_plan, model)
+    if args.target != "local":
+        # Tells running workers to drop cached answers from the old corpus.
+        write_remote_generation(index, dimension or index.describe_index_stats()["dimension"])
+    print("✅ Knowledge base is live.")
+
+if __name__ == "__main__":
+    main()
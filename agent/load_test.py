@@ -0,0 +1,302 @@
+"""
+Offline load test: scripted callers drive the real tool functions, session
+state, lookup prefetch and context budgeting concurrently on one event loop,
+with stand-in STT/LLM/TTS (fixed latencies) and an in-memory MongoDB. No
+LiveKit room or cloud service is needed, so it can run in CI.
+
+    python load_test.py --levels 1,10,50,100 --rounds 2
+    python load_test.py --levels 25 --max-tool-p95-ms 50 --max-loop-lag-ms 20 --json report.json
+
+Callers are seeded from bookings.json / appointments.json: identify by phone
+or name, ask a policy question, ask for their date, fall back to
+`find_open_dates` when it is full, then submit a request.
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+import resource
+
+from livekit.agents import llm
+
+import metrics
+from context_manager import ContextManager
+from customer_matcher import CustomerMatcher
+from database import DatabaseManager
+from dates import DateResolver
+from fakes import FakeKnowledgeBase, FakeLLM, FakeSTT, FakeTTS, InMemoryDatabase
+from identity import customer_keys
+from prefetch import LookupPrefetcher
+from profile_cache import ProfileCache
+from prompts import static_instructions
+from session import SessionManager
+from tools import build_function_context
+from tracing import TurnTracer
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Callers beyond the scripted ones reuse them on other days.
+DATE_VARIANTS = ["tomorrow", "day after tomorrow", "next monday", "in 3 days", "friday"]
+DIGIT_WORDS = ["zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine"]
+
+def percentile(samples: list, p: float):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))]
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # Peak, not current, off Linux; still shows growth between levels.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def load_scenarios(base_dir: str = BASE_DIR) -> list:
+    scenarios = []
+    with open(os.path.join(base_dir, "bookings.json")) as f:
+        for row in json.load(f):
+            scenarios.append({"name": row["name"], "phone": row.get("phone"), "service": row["service"], "date": row["date"]})
+    with open(os.path.join(base_dir, "appointments.json")) as f:
+        for row in json.load(f):
+            scenarios.append({"name": row["name"], "phone": None, "service": row["service"], "date": row["time"]})
+    return scenarios
+
+def scenario_for(i: int, scenarios: list) -> dict:
+    scenario = dict(scenarios[i % len(scenarios)])
+    if i >= len(scenarios):
+        scenario["date"] = DATE_VARIANTS[(i // len(scenarios)) % len(DATE_VARIANTS)]
+    return scenario
+
+def customers_for(scenarios: list, filler: int) -> list:
+    customers, seen = [], set()
+    for i, scenario in enumerate(scenarios):
+        phone = scenario["phone"] or f"99{i:08d}"
+        if phone in seen:
+            continue
+        seen.add(phone)
+        customers.append({"name": scenario["name"], "phone": phone, "vehicle": "Rolls-Royce Phantom"})
+    for i in range(filler):
+        customers.append({"name": f"Filler Customer {i:x}", "phone": f"97{i:08d}", "vehicle": "Rolls-Royce Ghost"})
+    for doc in customers:
+        doc.update(customer_keys(doc))
+    return customers
+
+async def prepare_database(customers: list, latency: float, full_dates: list = ()) -> DatabaseManager:
+    """
+    Points the DatabaseManager singleton at a fresh in-memory database.
+    """
+    db_manager = DatabaseManager()
+    db_manager.db = InMemoryDatabase(latency=latency)
+    db_manager.profiles = ProfileCache()
+    db_manager.matcher = CustomerMatcher()
+    db_manager._matcher_task = None
+    db_manager._open_dates_cache = {}
+    # Seeded directly: bulk loading shouldn't pay the simulated round trip.
+    for i, doc in enumerate(customers, 1):
+        db_manager.db.customers.docs[i] = dict(doc, _id=i)
+    for date in full_dates:
+        await db_manager.db.availability.insert_one({"_id": date, "date": date, "slot": None, "capacity": 2, "reserved": 2})
+    await db_manager.load_matcher()
+    return db_manager
+
+class LoopLagMonitor:
+    """
+    Samples how late the event loop wakes a `interval`-second sleep, plus RSS.
+    """
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.lag_ms = []
+        self.peak_rss = 0
+        self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lag_ms.append(max(0.0, (time.perf_counter() - started - self.interval) * 1000))
+            self.peak_rss = max(self.peak_rss, rss_bytes())
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+class ScriptedCaller:
+    def __init__(self, caller_id: int, scenario: dict, db_manager, stt: FakeSTT, model: FakeLLM, tts: FakeTTS, knowledge_base, tool_ms: dict):
+        self.caller_id = caller_id
+        self.scenario = scenario
+        self.session = SessionManager()
+        self.prefetcher = LookupPrefetcher(db_manager, self.session)
+        self.context = ContextManager()
+        self.tracer = TurnTracer(f"load-{caller_id}", path=os.devnull)
+        self.fnc_ctx = build_function_context(self.session, db_manager, knowledge_base, self.prefetcher, self.tracer)
+        self.chat_ctx = llm.ChatContext().append(role="system", text=static_instructions())
+        self.stt, self.model, self.tts = stt, model, tts
+        self.tool_ms = tool_ms
+        self.turn_ms = []
+        self.submitted = None
+
+    async def call_tool(self, name: str, **arguments) -> dict:
+        info = self.fnc_ctx.ai_functions[name]
+        started = time.perf_counter()
+        result = await info.callable(**arguments)
+        self.tool_ms.setdefault(name, []).append((time.perf_counter() - started) * 1000)
+        call = llm.FunctionCallInfo(tool_call_id=f"call_{len(self.chat_ctx.messages)}", function_info=info, raw_arguments=json.dumps(arguments), arguments=arguments)
+        self.chat_ctx.messages.append(llm.ChatMessage(role="assistant", tool_calls=[call], content=""))
+        self.chat_ctx.messages.append(llm.ChatMessage(role="tool", name=name, content=result, tool_call_id=call.tool_call_id))
+        try:
+            return json.loads(result)
+        except ValueError:
+            return {"text": result}
+
+    async def turn(self, utterance: str, act):
+        text = await self.stt.transcribe(utterance, self.prefetcher.on_transcript)
+        started = time.perf_counter()
+        self.chat_ctx.append(role="user", text=text)
+        prompt = self.chat_ctx.copy()
+        self.context.compact(prompt, self.session.facts())
+        await self.model.complete(prompt)
+        if act is not None:
+            await act()
+            prompt = self.chat_ctx.copy()
+            self.context.compact(prompt, self.session.facts())
+            await self.model.complete(prompt)
+        reply = self.model.reply
+        await self.tts.synthesize(reply)
+        self.turn_ms.append((time.perf_counter() - started) * 1000)
+        self.chat_ctx.append(role="assistant", text=reply)
+        self.context.trim_stored(self.chat_ctx)
+
+    async def run(self):
+        scenario = self.scenario
+        if scenario["phone"]:
+            spoken = " ".join(DIGIT_WORDS[int(d)] for d in scenario["phone"])
+            await self.turn(f"Hi, my number is {spoken}", lambda: self.call_tool("lookup_customer", identifier=scenario["phone"]))
+        else:
+            await self.turn(f"Hi, this is {scenario['name']} calling", lambda: self.call_tool("lookup_customer", identifier=scenario["name"]))
+        await self.turn(f"Is the {scenario['service']} included in my plan?", lambda: self.call_tool("consult_policy", topic=scenario["service"]))
+        await self.turn(f"Can I bring it in {scenario['date']}?", self.schedule)
+        await self.turn("Thank you, goodbye.", None)
+
+    async def schedule(self):
+        date = self.scenario["date"]
+        availability = await self.call_tool("check_availability", date=date)
+        if not availability.get("available"):
+            open_dates = (await self.call_tool("find_open_dates", count=3)).get("open_dates") or []
+            if not open_dates:
+                return
+            date = open_dates[0]
+        self.submitted = await self.call_tool("submit_booking_request", date=date, service_type=self.scenario["service"])
+
+async def run_level(concurrency: int, rounds: int, args, scenarios: list) -> dict:
+    customers = customers_for(scenarios, args.filler_customers)
+    db_manager = await prepare_database(customers, args.db_ms / 1000, full_dates=[DateResolver().resolve("tomorrow").date])
+    stt = FakeSTT(latency=args.stt_ms / 1000)
+    model = FakeLLM(ttft=args.llm_ttft_ms / 1000)
+    tts = FakeTTS(ttfb=args.tts_ms / 1000)
+    knowledge_base = FakeKnowledgeBase(latency=args.rag_ms / 1000)
+
+    tool_ms, turn_ms, errors, submitted = {}, [], 0, 0
+    baseline_rss = rss_bytes()
+    monitor = LoopLagMonitor()
+    monitor.start()
+    started = time.perf_counter()
+    for round_no in range(rounds):
+        callers = [ScriptedCaller(i, scenario_for(round_no * concurrency + i, scenarios), db_manager, stt, model, tts, knowledge_base, tool_ms) for i in range(concurrency)]
+        results = await asyncio.gather(*(c.run() for c in callers), return_exceptions=True)
+        errors += sum(isinstance(r, Exception) for r in results)
+        turn_ms.extend(ms for c in callers for ms in c.turn_ms)
+        submitted += sum(bool(c.submitted and c.submitted.get("success")) for c in callers)
+    elapsed = time.perf_counter() - started
+    await monitor.stop()
+    peak_rss = max(monitor.peak_rss, rss_bytes())
+
+    sessions = concurrency * rounds
+    return {
+        "concurrency": concurrency,
+        "sessions": sessions,
+        "errors": errors,
+        "requests_submitted": submitted,
+        "sessions_per_second": sessions / elapsed,
+        "turns_per_second": len(turn_ms) / elapsed,
+        "turn_ms": {"p50": percentile(turn_ms, 50), "p95": percentile(turn_ms, 95), "p99": percentile(turn_ms, 99)},
+        "loop_lag_ms": {"p50": percentile(monitor.lag_ms, 50), "p95": percentile(monitor.lag_ms, 95), "max": max(monitor.lag_ms, default=None)},
+        "tool_ms": {name: {"p50": percentile(s, 50), "p95": percentile(s, 95), "p99": percentile(s, 99), "count": len(s)} for name, s in sorted(tool_ms.items())},
+        "rss_per_session_kib": max(0, peak_rss - baseline_rss) / concurrency / 1024,
+    }
+
+def _fmt(value) -> str:
+    return "-" if value is None else f"{value:.1f}"
+
+def print_report(report: dict):
+    print(f"\n👥 {report['concurrency']} concurrent  ({report['sessions']} sessions, {report['errors']} errors, {report['requests_submitted']} requests queued)")
+    print(f"   throughput : {report['sessions_per_second']:.1f} sessions/s, {report['turns_per_second']:.1f} turns/s")
+    print(f"   turn       : p50 {_fmt(report['turn_ms']['p50'])}ms  p95 {_fmt(report['turn_ms']['p95'])}ms  p99 {_fmt(report['turn_ms']['p99'])}ms")
+    print(f"   loop lag   : p50 {_fmt(report['loop_lag_ms']['p50'])}ms  p95 {_fmt(report['loop_lag_ms']['p95'])}ms  max {_fmt(report['loop_lag_ms']['max'])}ms")
+    for name, stats in report["tool_ms"].items():
+        print(f"   {name:<22}: p50 {_fmt(stats['p50'])}ms  p95 {_fmt(stats['p95'])}ms  p99 {_fmt(stats['p99'])}ms  (n={stats['count']})")
+    print(f"   memory     : ~{report['rss_per_session_kib']:.0f} KiB RSS per session")
+
+def regressions(reports: list, max_tool_p95_ms: float = None, max_loop_lag_ms: float = None) -> list:
+    problems = []
+    for report in reports:
+        level = report["concurrency"]
+        if report["errors"]:
+            problems.append(f"{level} concurrent: {report['errors']} sessions failed")
+        if max_tool_p95_ms is not None:
+            for name, stats in report["tool_ms"].items():
+                if stats["p95"] is not None and stats["p95"] > max_tool_p95_ms:
+                    problems.append(f"{level} concurrent: {name} p95 {stats['p95']:.1f}ms > {max_tool_p95_ms}ms")
+        if max_loop_lag_ms is not None and (report["loop_lag_ms"]["p95"] or 0) > max_loop_lag_ms:
+            problems.append(f"{level} concurrent: loop lag p95 {report['loop_lag_ms']['p95']:.1f}ms > {max_loop_lag_ms}ms")
+    return problems
+
+async def run(args) -> list:
+    scenarios = load_scenarios(args.scenarios_dir)
+    reports = []
+    for concurrency in args.levels:
+        report = await run_level(concurrency, args.rounds, args, scenarios)
+        reports.append(report)
+        if not args.quiet:
+            print_report(report)
+    return reports
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline concurrent-call load test with stand-in STT/LLM/TTS and database.")
+    parser.add_argument("--levels", type=lambda v: [int(x) for x in v.split(",")], default=[1, 10, 50, 100], help="Comma-separated concurrent session counts")
+    parser.add_argument("--rounds", type=int, default=1, help="Batches of sessions per level")
+    parser.add_argument("--scenarios-dir", default=BASE_DIR)
+    parser.add_argument("--filler-customers", type=int, default=5000)
+    parser.add_argument("--stt-ms", type=float, default=150)
+    parser.add_argument("--llm-ttft-ms", type=float, default=300)
+    parser.add_argument("--tts-ms", type=float, default=120)
+    parser.add_argument("--db-ms", type=float, default=2)
+    parser.add_argument("--rag-ms", type=float, default=30)
+    parser.add_argument("--max-tool-p95-ms", type=float, default=None, help="Fail (exit 1) when any tool's p95 exceeds this")
+    parser.add_argument("--max-loop-lag-ms", type=float, default=None, help="Fail (exit 1) when event-loop lag p95 exceeds this")
+    parser.add_argument("--json", dest="json_path", default=None, help="Write the full report here")
+    parser.add_argument("--quiet", action="store_true")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    reports = asyncio.run(run(args))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"levels": reports, "metrics": metrics.snapshot()}, f, indent=2)
+    problems = regressions(reports, args.max_tool_p95_ms, args.max_loop_lag_ms)
+    for problem in problems:
+        print(f"❌ {problem}")
+    if not problems:
+        print("\n✅ Load test passed.")
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,98 @@
+import bisect
+import threading
+from collections import deque
+
+DEFAULT_MS_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+class Histogram:
+    """
+    Fixed-bucket histogram plus a bounded window of recent samples for p50/p95/p99.
+    Thread-safe: observed from executors and event loops alike.
+    """
+    def __init__(self, name: str, buckets=DEFAULT_MS_BUCKETS, window: int = 2048):
+        self.name = name
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            self._recent.append(value)
+
+    def percentile(self, p: float):
+        with self._lock:
+            samples = sorted(self._recent)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            buckets = {f"le_{b}": c for b, c in zip(self.buckets, self.counts)}
+            buckets["le_inf"] = self.counts[-1]
+            count, total = self.count, self.sum
+        return {
+            "count": count,
+            "mean": total / count if count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets": buckets
+        }
+
+class Counter:
+    def __init__(self, name: str):
+        self.name = name
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self) -> int:
+        return self.value
+
+class Gauge:
+    def __init__(self, name: str):
+        self.name = name
+        self.value = None
+
+    def set(self, value: float):
+        self.value = value
+
+    def snapshot(self):
+        return self.value
+
+# Process-wide registry, so every module reports through one place.
+_registry = {}
+_registry_lock = threading.Lock()
+
+def histogram(name: str, buckets=DEFAULT_MS_BUCKETS) -> Histogram:
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = Histogram(name, buckets)
+        return _registry[name]
+
+def counter(name: str) -> Counter:
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = Counter(name)
+        return _registry[name]
+
+def gauge(name: str) -> Gauge:
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = Gauge(name)
+        return _registry[name]
+
+def snapshot() -> dict:
+    with _registry_lock:
+        items = list(_registry.items())
+    return {name: metric.snapshot() for name, metric in items}
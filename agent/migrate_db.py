@@ -0,0 +1,19 @@
+import asyncio
+import logging
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from database import DatabaseManager
+
+logging.basicConfig(level=logging.INFO)
+
+async def migrate():
+    db = DatabaseManager()
+    await db.ensure_indexes()
+    count = await db.migrate_customer_keys()
+    days = await db.rebuild_capacity()
+    print(f"✅ Migration complete: {count} customers updated, {days} capacity counters rebuilt.")
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
@@ -0,0 +1,94 @@
+import os
+import re
+import struct
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger("auralis-tts")
+
+_HEADER = struct.Struct("<II")  # sample_rate, num_channels
+
+def normalize_phrase(text: str) -> str:
+    # "Checking availability..." and "checking availability" are the same utterance.
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s']", " ", text.lower())).strip()
+
+class PhraseAudioCache:
+    """
+    PCM for fixed utterances (greeting, verbal bridges), keyed by voice and
+    normalized text. Held in memory per worker and optionally persisted to
+    `cache_dir` so a restarted worker doesn't synthesize them again.
+    """
+    def __init__(self, cache_dir: str = None):
+        self.cache_dir = cache_dir
+        self._audio = {}  # key -> (pcm bytes, sample_rate, num_channels)
+        self._phrases = {}  # voice -> {normalized text}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(voice: str, text: str) -> str:
+        return hashlib.sha1(f"{voice}\n{normalize_phrase(text)}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pcm")
+
+    def get(self, voice: str, text: str):
+        """
+        (pcm, sample_rate, num_channels) for an exact phrase match, else None.
+        """
+        key = self.key(voice, text)
+        with self._lock:
+            audio = self._audio.get(key)
+        if audio is None and self.cache_dir and os.path.exists(self._path(key)):
+            audio = self._load(key)
+            if audio is not None:
+                self._remember(voice, text, key, audio)
+        if audio is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return audio
+
+    def put(self, voice: str, text: str, pcm: bytes, sample_rate: int, num_channels: int):
+        key = self.key(voice, text)
+        audio = (bytes(pcm), sample_rate, num_channels)
+        self._remember(voice, text, key, audio)
+        if self.cache_dir:
+            tmp = self._path(key) + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(_HEADER.pack(sample_rate, num_channels))
+                f.write(audio[0])
+            os.replace(tmp, self._path(key))
+
+    def register(self, voice: str, text: str):
+        """
+        Declares a phrase as cacheable so `could_match` can recognise its prefixes.
+        """
+        with self._lock:
+            self._phrases.setdefault(voice, set()).add(normalize_phrase(text))
+
+    def could_match(self, voice: str, partial: str) -> bool:
+        """
+        True while streamed text is still a prefix of some registered phrase.
+        """
+        partial = normalize_phrase(partial)
+        with self._lock:
+            return any(phrase.startswith(partial) for phrase in self._phrases.get(voice, ()))
+
+    def _remember(self, voice: str, text: str, key: str, audio: tuple):
+        with self._lock:
+            self._audio[key] = audio
+            self._phrases.setdefault(voice, set()).add(normalize_phrase(text))
+
+    def _load(self, key: str):
+        try:
+            with open(self._path(key), "rb") as f:
+                sample_rate, num_channels = _HEADER.unpack(f.read(_HEADER.size))
+                return f.read(), sample_rate, num_channels
+        except (OSError, struct.error) as e:
+            logger.warning(f"Ignoring unreadable phrase cache file {key}: {e}")
+            return None
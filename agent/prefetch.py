@@ -0,0 +1,131 @@
+import re
+import time
+import asyncio
+import logging
+
+import metrics
+from identity import name_key, to_e164
+from profile_cache import ProfileCache
+
+logger = logging.getLogger("auralis-prefetch")
+
+DIGIT_WORDS = {"zero": "0", "oh": "0", "o": "0", "one": "1", "two": "2", "three": "3", "four": "4",
+               "five": "5", "six": "6", "seven": "7", "eight": "8", "nine": "9"}
+REPEATS = {"double": 2, "triple": 3}
+NAME_PHRASE = re.compile(r"\b(?:my name is|name is|this is|i am|i'm|it's|its|under)\s+([a-z][a-z'\-]+(?:\s+[a-z][a-z'\-]+){0,2})", re.IGNORECASE)
+# Words that end a spoken name ("this is Meredith Grey calling about...").
+NAME_STOPWORDS = {"and", "calling", "here", "from", "i", "my", "about", "speaking", "with", "for", "the", "a", "to",
+                  "um", "uh", "phone", "number", "again", "just", "please", "so", "regarding"}
+
+def spoken_digits(text: str) -> str:
+    """
+    "nine eight seven double six" -> "98766". Digits already in the text pass through.
+    """
+    out, repeat = [], 1
+    for token in re.findall(r"[a-z]+|\d+", text.lower()):
+        if token.isdigit():
+            out.append(token * repeat if len(token) == 1 else token)
+            repeat = 1
+        elif token in REPEATS:
+            repeat = REPEATS[token]
+        elif token in DIGIT_WORDS:
+            out.append(DIGIT_WORDS[token] * repeat)
+            repeat = 1
+        else:
+            repeat = 1
+    return "".join(out)
+
+def phone_candidate(text: str, normalize_phone):
+    """
+    The phone number `SessionManager.normalize_phone` would accept, or None.
+    """
+    for raw in (text, spoken_digits(text)):
+        clean = normalize_phone(raw)
+        if clean and to_e164(clean):
+            return clean
+    return None
+
+def name_candidate(text: str):
+    match = NAME_PHRASE.search(text)
+    if not match:
+        return None
+    tokens = []
+    for token in match.group(1).split():
+        if token.lower() in NAME_STOPWORDS:
+            break
+        tokens.append(token)
+    # One word is usually still being spoken; wait for "Meredith Grey", not "Meredith".
+    return " ".join(tokens) if len(tokens) >= 2 else None
+
+class LookupPrefetcher:
+    """
+    Watches interim/final transcripts and starts `get_customer_by_lookup` as
+    soon as a phone number or a spoken name appears, so `lookup_customer`
+    usually finds the answer already in `session.prefetched`.
+    """
+    def __init__(self, db_manager, session):
+        self.db_manager = db_manager
+        self.session = session
+        self.saved_ms = metrics.histogram("prefetch_saved_ms")
+        self.hits = metrics.counter("prefetch_hit")
+        self.misses = metrics.counter("prefetch_miss")
+        self.started = metrics.counter("prefetch_started")
+
+    @staticmethod
+    def keys_for(identifier: str) -> list:
+        return ProfileCache.keys_for(to_e164(identifier), name_key(identifier))
+
+    def on_transcript(self, text: str, is_final: bool):
+        if not text or self.session.is_authenticated:
+            return
+        candidate = phone_candidate(text, self.session.normalize_phone)
+        if candidate is None and is_final:
+            # Interim names grow word by word; only finals are stable enough to look up.
+            candidate = name_candidate(text)
+        if candidate is not None:
+            self.prefetch(candidate)
+
+    def prefetch(self, identifier: str):
+        keys = self.keys_for(identifier)
+        if not keys or keys[0] in self.session.prefetched:
+            return
+        entry = {"task": None, "started": time.perf_counter(), "finished": None}
+        entry["task"] = asyncio.create_task(self._lookup(identifier, entry))
+        for key in keys:
+            self.session.prefetched[key] = entry
+        self.started.inc()
+        logger.info(f"⚡ Prefetching customer lookup for '{identifier}'")
+
+    async def _lookup(self, identifier: str, entry: dict):
+        try:
+            return await self.db_manager.get_customer_by_lookup(identifier)
+        except Exception as e:
+            logger.warning(f"Prefetch lookup failed: {e}")
+            return None
+        finally:
+            entry["finished"] = time.perf_counter()
+
+    async def take(self, identifier: str):
+        """
+        Returns (found, customer). `found` is False when nothing was prefetched
+        for this identifier and the caller should do the lookup itself.
+        """
+        entry = next((self.session.prefetched[k] for k in self.keys_for(identifier) if k in self.session.prefetched), None)
+        if entry is None:
+            self.misses.inc()
+            return False, None
+
+        requested = time.perf_counter()
+        # Shielded: a caller giving up (deadline, hedge) must not cancel the shared lookup.
+        customer = await asyncio.shield(entry["task"])
+        if customer is None:
+            # A miss is not cached: the tool falls back to its own (fuzzy) path.
+            return False, None
+
+        # Saved = the lookup round trip, minus whatever part of it the tool still waited for.
+        lookup_ms = (entry["finished"] - entry["started"]) * 1000
+        waited_ms = max(0.0, entry["finished"] - requested) * 1000
+        self.saved_ms.observe(lookup_ms - waited_ms)
+        self.hits.inc()
+        logger.info(f"⚡ Prefetched lookup saved {lookup_ms - waited_ms:.0f}ms of turn latency")
+        return True, customer
@@ -0,0 +1,145 @@
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+
+import metrics
+
+logger = logging.getLogger("auralis-db")
+
+class ProfileCache:
+    """
+    Read-through LRU in front of customer lookups, keyed by the same normalized
+    keys the database indexes ("phone:+91...", "name:meredith grey").
+    Entries are dropped by customer _id when the `customers` change stream
+    reports a write; when change streams are unavailable (standalone mongod)
+    the shorter fallback TTL bounds staleness instead.
+    """
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 3600.0, fallback_ttl_seconds: float = 60.0):
+        self.max_entries = max_entries
+        self.watch_ttl_seconds = ttl_seconds
+        self.fallback_ttl_seconds = fallback_ttl_seconds
+        # Until the change stream is confirmed, assume writes can go unseen.
+        self.ttl_seconds = fallback_ttl_seconds
+        self.watching = False
+
+        self._entries = OrderedDict()  # key -> (customer, cached_at)
+        self._keys_by_id = {}          # customer _id -> {keys}
+        self._lock = threading.Lock()
+
+        self.hits = metrics.counter("profile_cache_hit")
+        self.misses = metrics.counter("profile_cache_miss")
+        self.invalidations = metrics.counter("profile_cache_invalidated")
+        self.age_ms = metrics.histogram("profile_cache_age_ms", buckets=(100, 1000, 5000, 15000, 60000, 300000, 900000, 3600000))
+
+    @staticmethod
+    def keys_for(phone_e164: str = None, name_key: str = None) -> list:
+        keys = []
+        if phone_e164:
+            keys.append(f"phone:{phone_e164}")
+        if name_key:
+            keys.append(f"name:{name_key}")
+        return keys
+
+    def get(self, keys: list, stale_ok: bool = False):
+        """
+        `stale_ok` also returns entries past their TTL: the degraded answer
+        when the database is unreachable. Expired entries are kept (until the
+        LRU bound or an invalidation removes them) for that reason.
+        """
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if now - entry[1] > self.ttl_seconds and not stale_ok:
+                    continue
+                self._entries.move_to_end(key)
+                self.hits.inc()
+                # Staleness: how old the served copy is.
+                self.age_ms.observe((now - entry[1]) * 1000)
+                return entry[0]
+        self.misses.inc()
+        return None
+
+    def put(self, customer: dict):
+        keys = self.keys_for(customer.get("phone_e164"), customer.get("name_key"))
+        if not keys:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._invalidate_locked(customer.get("_id"))
+            for key in keys:
+                self._entries[key] = (customer, now)
+                self._entries.move_to_end(key)
+            self._keys_by_id[customer.get("_id")] = set(keys)
+            while len(self._entries) > self.max_entries:
+                self._drop_locked(next(iter(self._entries)))
+
+    def invalidate(self, customer_id):
+        with self._lock:
+            if self._invalidate_locked(customer_id):
+                self.invalidations.inc()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_id.clear()
+
+    def _invalidate_locked(self, customer_id) -> bool:
+        keys = self._keys_by_id.pop(customer_id, None)
+        for key in keys or ():
+            self._entries.pop(key, None)
+        return bool(keys)
+
+    def _drop_locked(self, key: str):
+        customer, _ = self._entries.pop(key)
+        keys = self._keys_by_id.get(customer.get("_id"))
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_id[customer.get("_id")]
+
+    def hit_ratio(self):
+        total = self.hits.value + self.misses.value
+        return self.hits.value / total if total else None
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hit_ratio": self.hit_ratio(),
+            "watching": self.watching,
+            "ttl_seconds": self.ttl_seconds,
+            "age_ms": self.age_ms.snapshot()
+        }
+
+    async def watch(self, collection, on_change=None, retry_seconds: float = 5.0):
+        """
+        Tails the collection's change stream, invalidating by documentKey._id.
+        `on_change(change)` lets other in-process indexes follow the same stream.
+        Falls back to the short TTL (and keeps retrying) when streams fail.
+        """
+        resume_token = None
+        while True:
+            try:
+                async with collection.watch(full_document="updateLookup", resume_after=resume_token) as stream:
+                    self.watching = True
+                    self.ttl_seconds = self.watch_ttl_seconds
+                    logger.info("👀 Watching customers for profile cache invalidation")
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        self.invalidate(change["documentKey"]["_id"])
+                        if on_change is not None:
+                            on_change(change)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Standalone servers reject change streams: rely on the fallback TTL.
+                logger.warning(f"⚠️ Change stream unavailable ({e}); profile cache TTL is {self.fallback_ttl_seconds}s")
+            # Anything written while we weren't watching may already be cached.
+            self.watching = False
+            self.ttl_seconds = self.fallback_ttl_seconds
+            self.clear()
+            await asyncio.sleep(retry_seconds)
@@ -0,0 +1,121 @@
+import os
+import json
+import logging
+from functools import lru_cache
+
+import metrics
+
+logger = logging.getLogger("auralis-prompts")
+
+DEALERSHIP_NAME = os.getenv("DEALERSHIP_NAME", "Rolls-Royce")
+FACTS_MARKER = "SESSION FACTS"
+
+@lru_cache(maxsize=None)
+def static_instructions(dealership: str = DEALERSHIP_NAME) -> str:
+    """
+    The instruction block every call starts with. Built once per process and
+    byte-identical across calls and turns, so the provider's prefix cache can
+    reuse it; anything per-call (date, customer) belongs in `dynamic_context`.
+    """
+    return f"""
+    You are Auralis, the Front Desk for {dealership}.
+
+    --- CONTEXT & MEMORY ---
+    1. **Session Facts:** The SESSION FACTS message holds today's date and everything already known about this caller. Trust it over anything said earlier.
+    2. **Session Awareness:** Once `lookup_customer` succeeds, you KNOW the Name, Vehicle, and Phone. NEVER ask again.
+    3. **Vehicle Confirmation:** Always confirm the vehicle model found (e.g., "I see you have the Phantom...").
+
+    --- PROTOCOL: REQUEST QUEUE ---
+    **CRITICAL:** You CANNOT "confirm" bookings. You can only "submit requests".
+    - **Bad:** "I have booked your appointment."
+    - **Good:** "I have submitted your request for Tuesday. You will receive a confirmation once approved."
+
+    --- VOICE RULES ---
+    1. **Conciseness:** Keep responses under 10 words (unless explaining policy).
+    2. **Verbal Bridges:** Speak BEFORE tool usage.
+       - "Checking availability..." -> `check_availability`
+       - "Submitting your request..." -> `submit_booking_request`
+
+    --- WORKFLOW ---
+    1. **Identify:** Ask Name/Phone -> `lookup_customer` -> Confirm Vehicle.
+    2. **Service Check:** If user asks "Is X included?", run `consult_policy`.
+    3. **Schedule:** - Ask Date -> `check_availability`.
+       - If full -> `find_open_dates` once and offer those dates. Do NOT probe dates one by one.
+       - If open -> `submit_booking_request`.
+       - **Closing:** "Request submitted. We will notify you shortly."
+    """
+
+def dynamic_context(facts: dict) -> str:
+    """
+    The per-call block placed right after the static instructions: today's
+    date, the identified customer and any pending request.
+    """
+    return f"{FACTS_MARKER} (authoritative, never ask again): {json.dumps(facts, separators=(',', ':'))}"
+
+def is_dynamic_context(text: str) -> bool:
+    return text.startswith(FACTS_MARKER)
+
+class PromptCacheMonitor:
+    """
+    Records how many prompt tokens the provider served from its prefix cache
+    on each turn (`usage.prompt_tokens_details.cached_tokens`), which the
+    LiveKit OpenAI plugin drops when it builds its own usage metrics.
+    """
+    def __init__(self):
+        self.cached_tokens = metrics.histogram("llm_cached_prompt_tokens", buckets=(0, 256, 512, 1024, 2048, 4096, 8192))
+        self.cached_ratio = metrics.histogram("llm_cached_prompt_ratio", buckets=(0.1, 0.25, 0.5, 0.75, 0.9, 1.0))
+        self.turns = 0
+
+    def observe(self, usage):
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        if not prompt_tokens:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", 0) or 0
+        self.turns += 1
+        self.cached_tokens.observe(cached)
+        self.cached_ratio.observe(cached / prompt_tokens)
+        logger.info(f"🧠 Prompt tokens: {prompt_tokens} ({cached} cached, {prompt_tokens - cached} uncached)")
+
+    def instrument(self, client):
+        """
+        Wraps `client.chat.completions.create` on an openai.AsyncClient so
+        streamed responses report their final usage chunk here.
+        """
+        completions = client.chat.completions
+        create = completions.create
+
+        async def create_observed(*args, **kwargs):
+            response = await create(*args, **kwargs)
+            return _UsageTapStream(response, self) if kwargs.get("stream") else response
+
+        completions.create = create_observed
+        return client
+
+class _UsageTapStream:
+    def __init__(self, inner, monitor: PromptCacheMonitor):
+        self._inner = inner
+        self._monitor = monitor
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        chunk = await self._inner.__anext__()
+        if getattr(chunk, "usage", None) is not None:
+            try:
+                self._monitor.observe(chunk.usage)
+            except Exception:
+                # Measurement must never break the response stream.
+                pass
+        return chunk
+
+    async def __aenter__(self):
+        await self._inner.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc):
+        return await self._inner.__aexit__(*exc)
@@ -0,0 +1,112 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from collections import deque
+
+import metrics
+
+logger = logging.getLogger("auralis-publisher")
+
+PUBLISH_QUEUE_SIZE = int(os.getenv("PUBLISH_QUEUE_SIZE", "256"))
+PUBLISH_COALESCE_MS = int(os.getenv("PUBLISH_COALESCE_MS", "40"))
+# LiveKit rejects reliable data packets above ~15 KiB.
+MAX_PACKET_BYTES = 14000
+# Only the latest value of these types matters to the client.
+COALESCED_TYPES = ("state",)
+
+def encode_batch(messages: list) -> list:
+    """
+    Packs messages into as few packets as fit under MAX_PACKET_BYTES. A lone
+    message keeps its original {"type", "data"} shape; several become
+    {"type": "batch", "data": [...]} in publish order.
+    """
+    packets, batch, size = [], [], 0
+    for message in messages:
+        encoded = json.dumps(message)
+        if batch and size + len(encoded) + 32 > MAX_PACKET_BYTES:
+            packets.append(batch)
+            batch, size = [], 0
+        batch.append((message, encoded))
+        size += len(encoded) + 2
+    if batch:
+        packets.append(batch)
+    return [b[0][1] if len(b) == 1 else json.dumps({"type": "batch", "data": [m for m, _ in b]}) for b in packets]
+
+class RoomPublisher:
+    """
+    One ordered sender per room for transcripts and agent state. `publish`
+    never blocks the event handler: messages go into a bounded queue that a
+    single task drains, coalescing superseded `state` updates within
+    `coalesce_ms` and batching the rest into one packet per window. When a
+    slow client lets the queue fill, the oldest message is dropped (and
+    counted) instead of piling up tasks on the worker.
+    """
+    def __init__(self, participant, max_queue: int = PUBLISH_QUEUE_SIZE, coalesce_ms: int = PUBLISH_COALESCE_MS):
+        self.participant = participant
+        self.max_queue = max_queue
+        self.coalesce_ms = coalesce_ms
+        self._queue = deque()  # (message, enqueued_at)
+        self._ready = asyncio.Event()
+        self._closed = False
+        self._task = None
+        self.latency_ms = metrics.histogram("publish_latency_ms")
+        self.dropped = metrics.counter("publish_dropped")
+        self.coalesced = metrics.counter("publish_coalesced")
+        self.packets = metrics.counter("publish_packets")
+        self.depth = metrics.gauge("publish_queue_depth")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return self
+
+    def publish(self, type: str, data: dict):
+        if self._closed:
+            return
+        if type in COALESCED_TYPES:
+            before = len(self._queue)
+            self._queue = deque(item for item in self._queue if item[0]["type"] != type)
+            if len(self._queue) < before:
+                self.coalesced.inc(before - len(self._queue))
+        if len(self._queue) >= self.max_queue:
+            self._queue.popleft()
+            self.dropped.inc()
+        self._queue.append(({"type": type, "data": data}, time.perf_counter()))
+        self.depth.set(len(self._queue))
+        self._ready.set()
+
+    async def _run(self):
+        while not (self._closed and not self._queue):
+            await self._ready.wait()
+            if self.coalesce_ms and not self._closed:
+                # Let a burst (state flapping, transcript + state) land in one packet.
+                await asyncio.sleep(self.coalesce_ms / 1000)
+            self._ready.clear()
+            await self._drain()
+
+    async def _drain(self):
+        items = list(self._queue)
+        self._queue.clear()
+        self.depth.set(0)
+        if not items:
+            return
+        for packet in encode_batch([message for message, _ in items]):
+            try:
+                await self.participant.publish_data(packet, reliable=True)
+                self.packets.inc()
+            except Exception as e:
+                logger.warning(f"Data publish failed: {e}")
+        sent = time.perf_counter()
+        for _, enqueued in items:
+            self.latency_ms.observe((sent - enqueued) * 1000)
+
+    async def aclose(self):
+        """
+        Sends whatever is still queued, then stops.
+        """
+        self._closed = True
+        self._ready.set()
+        if self._task is not None:
+            await self._task
@@ -0,0 +1,132 @@
+import re
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+
+class SemanticQueryCache:
+    """
+    Two-level cache in front of KnowledgeBase lookups.
+    L1: exact match on normalized query text (skips the embedder).
+    L2: cosine similarity to a cached query embedding (skips the index query).
+    Bounded LRU with TTL; cleared whenever the index generation changes, and
+    entries are tagged with the generation they were computed against.
+    """
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600.0, similarity_threshold: float = 0.95):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.generation = None
+
+        # normalized text -> (unit vector, result, created_at, generation)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.exact_misses = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return re.sub(r"\s+", " ", re.sub(r"[^\w\s%]", " ", query.lower())).strip()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return now - created_at > self.ttl_seconds
+
+    def get_exact(self, query: str):
+        key = self.normalize(query)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.exact_misses += 1
+                return None
+            if self._expired(entry[2], now):
+                del self._entries[key]
+                self.evictions += 1
+                self.exact_misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.exact_hits += 1
+            return entry[1]
+
+    def get_similar(self, vector):
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return None
+        query = query / norm
+
+        now = time.monotonic()
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if self._expired(e[2], now)]:
+                del self._entries[key]
+                self.evictions += 1
+
+            keys = [k for k, e in self._entries.items() if e[0] is not None]
+            if not keys:
+                self.misses += 1
+                return None
+
+            scores = np.stack([self._entries[k][0] for k in keys]) @ query
+            best = int(np.argmax(scores))
+
+            if scores[best] < self.similarity_threshold:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(keys[best])
+            self.semantic_hits += 1
+            return self._entries[keys[best]][1]
+
+    def put(self, query: str, vector, result: str, generation):
+        """
+        `generation` is the value of `self.generation` when the lookup started;
+        results computed against an older knowledge base are dropped.
+        """
+        # vector=None stores an exact-text (L1) entry only, e.g. for BM25 answers.
+        unit = None
+        if vector is not None:
+            unit = np.asarray(vector, dtype=np.float32)
+            norm = np.linalg.norm(unit)
+            if norm:
+                unit = unit / norm
+
+        with self._lock:
+            if generation != self.generation:
+                return
+            key = self.normalize(query)
+            self._entries[key] = (unit, result, time.monotonic(), generation)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def sync_generation(self, generation):
+        """
+        Drops every entry when the knowledge base has been re-seeded.
+        """
+        with self._lock:
+            if generation == self.generation:
+                return
+            self._entries.clear()
+            self.generation = generation
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        # Every lookup starts at L1, so L1 probes count lookups; L2 only sees the L1 misses.
+        lookups = self.exact_hits + self.exact_misses
+        return {
+            "entries": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "exact_misses": self.exact_misses,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0
+        }
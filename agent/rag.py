@@ -1,58 +1,318 @@
 import os
+import time
+import asyncio
 import logging
-from pinecone import Pinecone
-from sentence_transformers import SentenceTransformer
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
+from vector_store import LocalVectorIndex, read_remote_generation
+from query_cache import SemanticQueryCache
+from embedding_service import EmbeddingBatcher
+from embedders import load_embedder
+from bm25 import BM25Index, reciprocal_rank_fusion
+import metrics
+from tracing import traced
+
 load_dotenv()
 logger = logging.getLogger("auralis-rag")
 
-class KnowledgeBase:
+class RetrievalRuntime:
+    """
+    Process-wide retrieval resources (embedder + index client).
+    Loaded once per worker in `prewarm` and shared by every session on it.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
     def __init__(self):
         self.api_key = os.getenv("PINECONE_API_KEY")
         self.index_name = os.getenv("PINECONE_INDEX", "dealership-knowledge")
+        # "pinecone" (remote) or "local" (in-process, offline)
+        self.backend = os.getenv("RAG_BACKEND", "pinecone").lower()
+        self.local_index_dir = os.getenv("RAG_LOCAL_INDEX_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "local_index"))
+        self.embedder = None
+        self.batcher = None
         self.pc = None
         self.index = None
-        
+        self.load_seconds = 0.0
+        self.generation_check_seconds = float(os.getenv("RAG_GENERATION_CHECK_SECONDS", "5"))
+        self.last_generation_check = float("-inf")
+
+        # Bounded pools keep CPU-bound encodes and blocking index I/O off the event loop.
+        self.encode_workers = int(os.getenv("RAG_ENCODE_WORKERS", "2"))
+        self.query_workers = int(os.getenv("RAG_QUERY_WORKERS", "4"))
+        self.encode_executor = ThreadPoolExecutor(max_workers=self.encode_workers, thread_name_prefix="rag-encode")
+        self.query_executor = ThreadPoolExecutor(max_workers=self.query_workers, thread_name_prefix="rag-query")
+
+        # BM25 fast path over the same chunks; RAG_LEXICAL=0 turns it off.
+        self.lexical = None
+        self.lexical_enabled = os.getenv("RAG_LEXICAL", "1") == "1"
+        self.lexical_min_score = float(os.getenv("RAG_LEXICAL_MIN_SCORE", "1.2"))
+        self.lexical_margin = float(os.getenv("RAG_LEXICAL_MARGIN", "1.5"))
+
+        self.cache = SemanticQueryCache(
+            max_entries=int(os.getenv("RAG_CACHE_SIZE", "256")),
+            ttl_seconds=float(os.getenv("RAG_CACHE_TTL_SECONDS", "3600")),
+            similarity_threshold=float(os.getenv("RAG_CACHE_SIMILARITY", "0.95"))
+        )
+
+        started = time.perf_counter()
+
         try:
             logger.info("Loading local embedding model...")
-            self.embedder = SentenceTransformer('all-MiniLM-L6-v2')
-            logger.info("Embedding model loaded.")
+            self.embedder = load_embedder()
+            logger.info(f"Embedding model loaded ({self.embedder.name} backend).")
         except Exception as e:
             logger.error(f"Failed to load embedding model: {e}")
-            self.embedder = None
 
-        if self.api_key:
+        # Concurrent sessions share one batched forward pass; 0 disables batching.
+        batch_wait_ms = float(os.getenv("RAG_BATCH_WAIT_MS", "3"))
+        if self.embedder is not None and batch_wait_ms > 0:
+            self.batcher = EmbeddingBatcher(
+                self.embedder,
+                max_batch_size=int(os.getenv("RAG_BATCH_MAX_SIZE", "32")),
+                max_wait_ms=batch_wait_ms
+            )
+
+        if self.backend == "local":
+            self.index = LocalVectorIndex(self.local_index_dir)
+        elif self.api_key:
             try:
+                from pinecone import Pinecone
                 self.pc = Pinecone(api_key=self.api_key)
                 self.index = self.pc.Index(self.index_name)
                 logger.info("Connected to Pinecone.")
             except Exception as e:
                 logger.error(f"Pinecone connection failed: {e}")
 
+        self.rebuild_lexical()
+        self.load_seconds = time.perf_counter() - started
+
+    @classmethod
+    def load(cls):
+        """
+        Returns the shared runtime, building it on first use (cold start).
+        """
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+                logger.info(f"🧊 Retrieval cold start: loaded in {cls._instance.load_seconds:.2f}s")
+            return cls._instance
+
+    def index_generation(self):
+        # Local indexes keep a GENERATION file; seeders stamp a marker record into Pinecone.
+        if self.index is None:
+            return None
+        if hasattr(self.index, "generation"):
+            return self.index.generation()
+        try:
+            return read_remote_generation(self.index)
+        except Exception as e:
+            # A transient fetch failure must not flush a healthy cache.
+            logger.warning(f"Could not read index generation: {e}")
+            return self.cache.generation
+
+    def generation_check_due(self):
+        return time.monotonic() - self.last_generation_check >= self.generation_check_seconds
+
+    def refresh_generation(self):
+        """
+        Picks up re-seeds (may touch disk or network): call off the event loop.
+        """
+        self.last_generation_check = time.monotonic()
+        generation = self.index_generation()
+        if generation != self.cache.generation:
+            self.rebuild_lexical()
+        self.cache.sync_generation(generation)
+
+    def lexical_documents(self):
+        if isinstance(self.index, LocalVectorIndex):
+            return [(doc_id, meta.get("text", "")) for doc_id, meta in zip(self.index.ids, self.index.metadata)]
+        # Pinecone can't be scanned cheaply; rebuild the same chunks from the bundled manuals.
+        from ingest import load_chunks
+        return [(chunk.id, chunk.text) for chunk in load_chunks()]
+
+    def rebuild_lexical(self):
+        if not self.lexical_enabled:
+            return
+        try:
+            documents = self.lexical_documents()
+            self.lexical = BM25Index(documents) if documents else None
+        except Exception as e:
+            logger.error(f"BM25 index build failed: {e}")
+            self.lexical = None
+
+    @classmethod
+    def is_loaded(cls):
+        return cls._instance is not None
+
+class KnowledgeBase:
+    def __init__(self, runtime: RetrievalRuntime = None):
+        started = time.perf_counter()
+        self.warm_start = runtime is not None or RetrievalRuntime.is_loaded()
+        self.runtime = runtime or RetrievalRuntime.load()
+        self.timeout = float(os.getenv("RAG_TIMEOUT_SECONDS", "2.0"))
+        self.last_path = None
+        self.startup_seconds = time.perf_counter() - started
+
+        if self.warm_start:
+            logger.info(f"🔥 Retrieval warm start: attached in {self.startup_seconds * 1000:.2f}ms")
+
+    @property
+    def embedder(self):
+        return self.runtime.embedder
+
+    @property
+    def index(self):
+        return self.runtime.index
+
+    def _ready(self):
+        # An empty-but-configured index answers "No specific policies found."
+        return self.index is not None and self.embedder is not None
+
+    def _encode(self, query: str):
+        # .tolist() is required because Pinecone expects a list, not a numpy array
+        return self.embedder.encode(query).tolist()
+
+    def _query(self, vector: list):
+        # Over-fetch a little so fusion with BM25 has candidates to reorder.
+        return self.index.query(
+            vector=vector,
+            top_k=5 if self.runtime.lexical is not None else 3,
+            include_metadata=True
+        )
+
+    def _format(self, texts: list):
+        if not texts:
+            return "No specific policies found."
+
+        return "\n".join(texts[:3])
+
+    def _served(self, path: str):
+        # cache | lexical | hybrid | vector: shows how much embedder/index traffic is avoided.
+        self.last_path = path
+        metrics.counter(f"rag_served_{path}").inc()
+        logger.info(f"📚 RAG served by {path}")
+
+    def _lexical(self, query: str, bm25, hits: list):
+        """
+        Keyword fast path: returns an answer without touching the embedder or
+        the index when BM25 is confident, else None.
+        """
+        if bm25 is None or not bm25.confident(query, hits, self.runtime.lexical_min_score, self.runtime.lexical_margin):
+            return None
+        return self._format([bm25.texts[i] for i, _, _ in hits])
+
+    def _fuse(self, results, lexical_texts: list):
+        vector_texts = [match['metadata']['text'] for match in results['matches'] if 'text' in match['metadata']]
+
+        if not lexical_texts:
+            self._served("vector")
+            return self._format(vector_texts)
+
+        self._served("hybrid")
+        return self._format(reciprocal_rank_fusion([vector_texts, lexical_texts]))
+
+    def _lookup(self, query: str):
+        """
+        Cache -> BM25 -> semantic cache -> index + fusion, shared by `search`
+        and `_asearch`. A generator: it yields the two blocking steps it needs,
+        ("encode", query) then ("query", vector), and gets their results back
+        through send(); the callers only differ in how they run those steps.
+        """
+        cache = self.runtime.cache
+        generation = cache.generation
+        cached = cache.get_exact(query)
+        if cached is not None:
+            self._served("cache")
+            return cached
+
+        # One BM25 pass feeds both the keyword fast path and the fusion.
+        bm25 = self.runtime.lexical
+        hits = bm25.search(query, top_k=5) if bm25 is not None else []
+        lexical = self._lexical(query, bm25, hits)
+        if lexical is not None:
+            cache.put(query, None, lexical, generation)
+            self._served("lexical")
+            return lexical
+
+        vector = yield "encode", query
+        cached = cache.get_similar(vector)
+        if cached is not None:
+            cache.put(query, vector, cached, generation)
+            self._served("cache")
+            return cached
+
+        results = yield "query", vector
+        result = self._fuse(results, [bm25.texts[i] for i, _, _ in hits])
+        cache.put(query, vector, result, generation)
+        return result
+
     def search(self, query: str):
         """
-        Generates local embedding and searches Pinecone.
+        Generates local embedding and searches the configured index.
+        Blocking: use `asearch` from async code.
         """
-        if not self.index or not self.embedder:
+        if not self._ready():
             return "I currently don't have access to the detailed policy manuals."
 
         try:
-            xb = self.embedder.encode(query).tolist()
+            # Re-seeds bump the index generation, which also flushes the query cache.
+            if self.runtime.generation_check_due():
+                self.runtime.refresh_generation()
 
-            results = self.index.query(
-                vector=xb,
-                top_k=3,
-                include_metadata=True
-            )
+            steps = self._lookup(query)
+            try:
+                step, arg = next(steps)
+                while True:
+                    step, arg = steps.send(self._encode(arg) if step == "encode" else self._query(arg))
+            except StopIteration as done:
+                return done.value
+        except Exception as e:
+            logger.error(f"RAG Error: {e}")
+            return "Information currently unavailable."
 
-            matches = [match['metadata']['text'] for match in results['matches'] if 'text' in match['metadata']]
-            
-            if not matches:
-                return "No specific policies found."
-                
-            return "\n".join(matches)
+    @traced("rag.search")
+    async def asearch(self, query: str, timeout: float = None, strict: bool = False):
+        """
+        Non-blocking search. Encoding and the index query run on the runtime's
+        bounded executors; the whole lookup is capped by `timeout` seconds.
+        Cancelling the caller abandons the lookup without stalling the loop.
+        `strict` re-raises timeouts and errors for callers that track them
+        (the circuit breaker in resilience.py).
+        """
+        if not self._ready():
+            return "I currently don't have access to the detailed policy manuals."
 
+        try:
+            return await asyncio.wait_for(self._asearch(query), self.timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⏱️ RAG lookup timed out: {query}")
+            if strict: raise
+            return "Information currently unavailable."
         except Exception as e:
             logger.error(f"RAG Error: {e}")
-            return "Information currently unavailable."
\ No newline at end of file
+            if strict: raise
+            return "Information currently unavailable."
+
+    async def _asearch(self, query: str):
+        loop = asyncio.get_running_loop()
+        if self.runtime.generation_check_due():
+            await loop.run_in_executor(self.runtime.query_executor, self.runtime.refresh_generation)
+
+        steps = self._lookup(query)
+        try:
+            step, arg = next(steps)
+            while True:
+                if step == "encode" and self.runtime.batcher is not None:
+                    value = await self.runtime.batcher.encode(arg)
+                elif step == "encode":
+                    value = await loop.run_in_executor(self.runtime.encode_executor, self._encode, arg)
+                elif getattr(self.index, "in_process", False):
+                    value = self._query(arg)
+                else:
+                    value = await loop.run_in_executor(self.runtime.query_executor, self._query, arg)
+                step, arg = steps.send(value)
+        except StopIteration as done:
+            return done.value
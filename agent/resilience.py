@@ -0,0 +1,162 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+
+import metrics
+
+logger = logging.getLogger("auralis-resilience")
+
+# Deadline per tool call, in ms; a tool that misses it answers in degraded mode.
+DEFAULT_BUDGETS_MS = {
+    "lookup_customer": 800,
+    "check_availability": 600,
+    "find_open_dates": 800,
+    "consult_policy": 1500,
+    "submit_booking_request": 1200,
+}
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "10"))
+# Idempotent reads get a second attempt after this long (0 disables hedging).
+HEDGE_AFTER_MS = float(os.getenv("HEDGE_AFTER_MS", "250"))
+
+def tool_budgets(spec: str = None) -> dict:
+    """
+    DEFAULT_BUDGETS_MS overridden by TOOL_BUDGETS_MS, e.g. "lookup_customer=500,consult_policy=2000".
+    """
+    budgets = dict(DEFAULT_BUDGETS_MS)
+    for item in (spec if spec is not None else os.getenv("TOOL_BUDGETS_MS", "")).split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value.strip():
+            budgets[name.strip()] = float(value)
+    return budgets
+
+class DependencyUnavailable(Exception):
+    """
+    Raised instead of waiting: the dependency's breaker is open, the call
+    missed its deadline, or it failed. `reason` is "open", "timeout" or "error".
+    """
+    def __init__(self, dependency: str, reason: str):
+        super().__init__(f"{dependency} unavailable ({reason})")
+        self.dependency = dependency
+        self.reason = reason
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive failures; while open,
+    calls are refused immediately. After `reset_seconds` one probe call is let
+    through (half-open): success closes the breaker, failure re-opens it.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURES, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.open_gauge = metrics.gauge(f"breaker_{name}_open")
+        self.rejected = metrics.counter(f"breaker_{name}_rejected")
+        self.open_gauge.set(0)
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+        self.rejected.inc()
+        return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"✅ Circuit {self.name} closed")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+            self.open_gauge.set(0)
+
+    def abandon(self):
+        # A cancelled probe proved nothing; let the next call probe instead.
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"🔌 Circuit {self.name} open after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._probing = False
+                self.open_gauge.set(1)
+
+# One breaker per dependency per process, shared by every call.
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def breaker(dependency: str) -> CircuitBreaker:
+    with _breakers_lock:
+        if dependency not in _breakers:
+            _breakers[dependency] = CircuitBreaker(dependency)
+        return _breakers[dependency]
+
+async def _hedged(factory, hedge_after: float):
+    tasks = [asyncio.ensure_future(factory())]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if not done:
+            metrics.counter("hedged_requests").inc()
+            tasks.append(asyncio.ensure_future(factory()))
+        pending, error = set(tasks), None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+async def guarded(dependency: str, factory, budget_ms: float, hedge: bool = False, hedge_after_ms: float = HEDGE_AFTER_MS):
+    """
+    Runs `factory()` (a coroutine function) against `dependency` within
+    `budget_ms`. Refuses at once while the breaker is open; timeouts and
+    errors count against it. With `hedge`, an idempotent read is re-issued
+    once if the first attempt hasn't answered after `hedge_after_ms`.
+    """
+    circuit = breaker(dependency)
+    if not circuit.allow():
+        raise DependencyUnavailable(dependency, "open")
+    try:
+        if hedge and hedge_after_ms and hedge_after_ms < budget_ms:
+            result = await asyncio.wait_for(_hedged(factory, hedge_after_ms / 1000), budget_ms / 1000)
+        else:
+            result = await asyncio.wait_for(factory(), budget_ms / 1000)
+    except asyncio.TimeoutError:
+        circuit.record_failure()
+        metrics.counter(f"deadline_exceeded_{dependency}").inc()
+        logger.warning(f"⏱️ {dependency} missed its {budget_ms:.0f}ms budget")
+        raise DependencyUnavailable(dependency, "timeout")
+    except asyncio.CancelledError:
+        circuit.abandon()
+        raise
+    except Exception as e:
+        circuit.record_failure()
+        logger.warning(f"{dependency} call failed: {e}")
+        raise DependencyUnavailable(dependency, "error") from e
+    circuit.record_success()
+    return result
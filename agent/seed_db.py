@@ -3,6 +3,8 @@ from pymongo import MongoClient
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 
+from identity import customer_keys
+
 load_dotenv()
 
 # Connect
@@ -55,15 +57,23 @@ def seed():
             "vip_status": True
         }
     ]
+    for customer in customers:
+        customer.update(customer_keys(customer))
     db.customers.insert_many(customers)
+    db.customers.create_index("phone_e164", name="phone_e164")
+    db.customers.create_index("name_key", name="name_key")
 
     print("📅 Seeding Schedule...")
-    today = datetime.now().strftime("%Y-%m-%d")
-    tomorrow = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+    capacity = int(os.getenv("DAILY_CAPACITY", "2"))
+    days = [(datetime.now() + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(30)]
+    db.availability.insert_many([
+        {"_id": day, "date": day, "slot": None, "capacity": capacity, "reserved": 0}
+        for day in days
+    ])
     
     print("✅ Database Seeded!")
     print(f"👉 Setup: {len(customers)} customers created.")
-    print(f"👉 Rule: Max capacity is set to 1 booking per day.")
+    print(f"👉 Rule: Max capacity is set to {capacity} bookings per day for the next {len(days)} days.")
 
 if __name__ == "__main__":
     seed()
\ No newline at end of file
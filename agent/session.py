@@ -1,6 +1,8 @@
 from dataclasses import dataclass
 import re
 
+from dates import DateResolver
+
 @dataclass
 class CustomerProfile:
     name: str
@@ -13,14 +15,49 @@ class SessionManager:
         # Explicit State
         self.customer: CustomerProfile = None
         self.interaction_id: str = None
+        # "Tomorrow" means the day after this call started, in the dealership's timezone.
+        self.dates = DateResolver()
+        # Speculative lookups started from live transcripts (see prefetch.py), by lookup key.
+        self.prefetched = {}
+        self.pending_request: dict = None
+        # Write-behind persistence (see session_store.py), attached on job start.
+        self._store = None
     
-    def set_customer(self, data: dict):
+    def attach_store(self, store, interaction_id: str):
+        self._store = store
+        self.interaction_id = interaction_id
+
+    def detach_store(self):
+        # The call is over: later changes (a tool finishing after hang-up) aren't saved.
+        self._store = None
+
+    def _changed(self):
+        if self._store is not None:
+            self._store.mark_dirty(self)
+
+    def set_customer(self, data: dict, persist: bool = True):
         self.customer = CustomerProfile(
             name=data['name'],
             phone=data['phone'],
             vehicle=data['vehicle'],
             is_identified=True
         )
+        if persist: self._changed()
+
+    def set_pending_request(self, request: dict):
+        self.pending_request = request
+        self._changed()
+
+    def facts(self) -> dict:
+        """
+        What the agent must not lose or re-ask for, pinned into every prompt.
+        """
+        facts = {"today": self.dates.today, "weekday": self.dates.now.strftime("%A")}
+        if self.customer:
+            facts["customer"] = {"name": self.customer.name, "vehicle": self.customer.vehicle, "phone": self.customer.phone}
+        if self.pending_request:
+            facts["pending_request"] = self.pending_request
+        return facts
 
     def normalize_phone(self, raw_input: str) -> str:
         """
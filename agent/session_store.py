@@ -0,0 +1,169 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from datetime import datetime
+
+import metrics
+
+logger = logging.getLogger("auralis-sessions")
+
+SESSION_STORE = os.getenv("SESSION_STORE", "memory").lower()
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "3600"))
+SESSION_FLUSH_MS = int(os.getenv("SESSION_FLUSH_MS", "200"))
+KEY_PREFIX = "auralis:session:"
+FORMAT_VERSION = 1
+
+def serialize(session) -> bytes:
+    """
+    The state a re-dispatched call needs, as compact JSON: who the caller is,
+    what was already submitted, and when the call started ("tomorrow" must
+    keep meaning the same day).
+    """
+    customer = session.customer
+    state = {"v": FORMAT_VERSION, "s": session.dates.now.isoformat()}
+    if customer is not None and customer.is_identified:
+        state["c"] = [customer.name, customer.phone, customer.vehicle]
+    if session.pending_request:
+        state["p"] = session.pending_request
+    return json.dumps(state, separators=(",", ":")).encode("utf-8")
+
+def restore(session, data: bytes) -> bool:
+    state = json.loads(data)
+    if state.get("v") != FORMAT_VERSION:
+        return False
+    if state.get("s"):
+        session.dates.now = datetime.fromisoformat(state["s"]).astimezone(session.dates.tz)
+    if state.get("c"):
+        name, phone, vehicle = state["c"]
+        session.set_customer({"name": name, "phone": phone, "vehicle": vehicle}, persist=False)
+    session.pending_request = state.get("p")
+    return True
+
+class MemorySessionBackend:
+    """
+    Per-process store: survives a dropped room re-dispatched to this worker,
+    not a worker restart.
+    """
+    def __init__(self):
+        self._data = {}  # key -> (expires_at, value)
+
+    async def get(self, key: str):
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            self._data.pop(key, None)
+            return None
+        return entry[1]
+
+    async def set_many(self, items: dict, ttl_seconds: int):
+        expires = time.monotonic() + ttl_seconds
+        for key, value in items.items():
+            self._data[key] = (expires, value)
+
+    async def delete(self, key: str):
+        self._data.pop(key, None)
+
+class RedisSessionBackend:
+    """
+    Any Redis-protocol server via redis.asyncio (or an injected client with the
+    same get/set/delete/pipeline calls). A flush is one pipelined round trip.
+    """
+    def __init__(self, client=None, url: str = REDIS_URL):
+        if client is None:
+            import redis.asyncio as redis
+            client = redis.from_url(url)
+        self.client = client
+
+    async def get(self, key: str):
+        return await self.client.get(key)
+
+    async def set_many(self, items: dict, ttl_seconds: int):
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.set(key, value, ex=ttl_seconds)
+        await pipe.execute()
+
+    async def delete(self, key: str):
+        await self.client.delete(key)
+
+class SessionStore:
+    """
+    Write-behind session persistence shared by every call on a worker.
+    `mark_dirty` only snapshots the session; one flush per `flush_ms` window
+    writes all changed sessions in a single batch, so tools never wait on it.
+    """
+    def __init__(self, backend, ttl_seconds: int = SESSION_TTL_SECONDS, flush_ms: int = SESSION_FLUSH_MS):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.flush_ms = flush_ms
+        self._dirty = {}
+        self._flush_task = None
+        self.rehydrate_ms = metrics.histogram("session_rehydrate_ms")
+        self.rehydrated = metrics.counter("session_rehydrated")
+        self.flushes = metrics.counter("session_flushes")
+        self.flush_errors = metrics.counter("session_flush_errors")
+
+    @staticmethod
+    def key(interaction_id: str) -> str:
+        return f"{KEY_PREFIX}{interaction_id}"
+
+    async def rehydrate(self, session, interaction_id: str) -> bool:
+        """
+        Restores a session saved under `interaction_id` and attaches it to this
+        store. Returns True when there was state to restore.
+        """
+        started = time.perf_counter()
+        session.attach_store(self, interaction_id)
+        try:
+            data = await self.backend.get(self.key(interaction_id))
+        except Exception as e:
+            logger.warning(f"Session rehydrate failed for {interaction_id}: {e}")
+            return False
+        restored = data is not None and restore(session, data)
+        self.rehydrate_ms.observe((time.perf_counter() - started) * 1000)
+        if restored:
+            self.rehydrated.inc()
+            logger.info(f"♻️ Rehydrated session {interaction_id} (customer: {session.customer.name if session.customer else 'unknown'})")
+        return restored
+
+    def mark_dirty(self, session):
+        self._dirty[self.key(session.interaction_id)] = serialize(session)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_ms / 1000)
+        await self.flush()
+
+    async def flush(self):
+        if not self._dirty:
+            return
+        batch, self._dirty = self._dirty, {}
+        try:
+            await self.backend.set_many(batch, self.ttl_seconds)
+            self.flushes.inc()
+        except Exception as e:
+            self.flush_errors.inc()
+            logger.warning(f"Session flush failed ({len(batch)} sessions), retrying next window: {e}")
+            # Newer snapshots taken meanwhile win over the failed batch.
+            self._dirty = {**batch, **self._dirty}
+            if self._flush_task is None or self._flush_task.done() or self._flush_task is asyncio.current_task():
+                self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def forget(self, interaction_id: str):
+        """
+        Drops a finished call's state so a reused room name starts fresh.
+        """
+        self._dirty.pop(self.key(interaction_id), None)
+        await self.backend.delete(self.key(interaction_id))
+
+def create_session_store() -> SessionStore:
+    """
+    SESSION_STORE=redis uses REDIS_URL; anything else keeps sessions in process.
+    """
+    if SESSION_STORE == "redis":
+        logger.info(f"🗄️ Session store: redis ({REDIS_URL.rsplit('@', 1)[-1]})")
+        return SessionStore(RedisSessionBackend())
+    return SessionStore(MemorySessionBackend())
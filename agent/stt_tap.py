@@ -0,0 +1,63 @@
+from livekit.agents import stt
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, APIConnectOptions
+
+class TranscriptTapSTT(stt.STT):
+    """
+    Pass-through STT that also hands every interim/final transcript to
+    `on_transcript(text, is_final)`. VoicePipelineAgent keeps interim text
+    private, so this is where speculative work can see it.
+    """
+    def __init__(self, inner: stt.STT, on_transcript):
+        super().__init__(capabilities=inner.capabilities)
+        self._inner = inner
+        self._on_transcript = on_transcript
+        self._label = inner.label
+
+        @inner.on("metrics_collected")
+        def _forward_metrics(*args, **kwargs):
+            self.emit("metrics_collected", *args, **kwargs)
+
+    async def _recognize_impl(self, buffer, *, language, conn_options: APIConnectOptions):
+        return await self._inner.recognize(buffer, language=language, conn_options=conn_options)
+
+    def stream(self, *, language: str = None, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS):
+        return _TapStream(self._inner.stream(language=language, conn_options=conn_options), self._on_transcript)
+
+    async def aclose(self):
+        await self._inner.aclose()
+
+class _TapStream:
+    def __init__(self, inner, on_transcript):
+        self._inner = inner
+        self._on_transcript = on_transcript
+
+    def push_frame(self, frame):
+        self._inner.push_frame(frame)
+
+    def flush(self):
+        self._inner.flush()
+
+    def end_input(self):
+        self._inner.end_input()
+
+    async def aclose(self):
+        await self._inner.aclose()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        ev = await self._inner.__anext__()
+        if ev.type in (stt.SpeechEventType.INTERIM_TRANSCRIPT, stt.SpeechEventType.FINAL_TRANSCRIPT) and ev.alternatives:
+            try:
+                self._on_transcript(ev.alternatives[0].text, ev.type == stt.SpeechEventType.FINAL_TRANSCRIPT)
+            except Exception:
+                # Speculation must never break recognition.
+                pass
+        return ev
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
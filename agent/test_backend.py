@@ -1,49 +1,60 @@
+import os
+import asyncio
 import logging
-from database import DealershipDB
-from knowledge import KnowledgeBase
+import pytest
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from database import DatabaseManager
+from dates import DateResolver
 
 # Configure simple logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("test-suite")
 
+needs_mongo = pytest.mark.skipif(not os.getenv("MONGO_URI"), reason="MONGO_URI not set")
+needs_pinecone = pytest.mark.skipif(not os.getenv("PINECONE_API_KEY"), reason="PINECONE_API_KEY not set")
+
+@needs_pinecone
 def test_rag():
     print("\n--- TESTING RAG (Vector Search) ---")
+    from rag import KnowledgeBase
     kb = KnowledgeBase()
     
     # query matches one of the sentences we just seeded
     query = "What are your financing rates?"
     print(f"Query: {query}")
     
-    result = kb.search(query)
+    result = asyncio.run(kb.asearch(query))
     print(f"Result:\n{result}")
-    
-    if "2.9%" in result:
-        print("✅ SUCCESS: Retrieved correct financing info.")
-    else:
-        print("❌ FAILURE: Could not find financing info.")
+    assert "2.9%" in result, "Could not find financing info."
 
+@needs_mongo
 def test_db():
     print("\n--- TESTING MONGODB (Booking System) ---")
-    db = DealershipDB()
-    
-    # 1. Test Availability
-    date = "tomorrow at 10am"
-    service = "Oil Change"
-    is_free = db.check_availability(service, date)
-    print(f"Slot '{date}' available? {is_free}")
-    
-    # 2. Test Booking (Write to DB)
-    if is_free:
-        booking_id = db.create_booking("Test User", "555-0199", service, date)
-        print(f"Booking created with ID: {booking_id}")
-        
-        if booking_id and "mock" not in booking_id:
-             print("✅ SUCCESS: Wrote to MongoDB Atlas.")
-        elif "mock" in booking_id:
-             print("⚠️ NOTE: Running in mock mode (Check MONGO_URI).")
-        else:
-             print("❌ FAILURE: Could not create booking.")
+
+    async def run():
+        db = DatabaseManager()
+        resolved = DateResolver().resolve("tomorrow at 10am")
+
+        # 1. Test Availability
+        is_free = await db.check_availability(resolved.date)
+        print(f"Slot '{resolved.key}' available? {is_free}")
+
+        # 2. Test Request Queue (Write to DB)
+        result = await db.queue_booking_request({
+            "name": "Test User", "phone": "5550199000", "vehicle": "Test Vehicle",
+            "requested_date": resolved.date, "requested_slot": resolved.slot, "requested_service": "Oil Change"
+        })
+        print(f"Request queued: {result}")
+        if result.get("success"):
+            from bson import ObjectId
+            await db.db.pending_requests.delete_one({"_id": ObjectId(result["reference_id"])})
+        return result
+
+    assert asyncio.run(run())["success"], "Could not queue the request."
 
 if __name__ == "__main__":
     test_rag()
-    test_db()
\ No newline at end of file
+    test_db()
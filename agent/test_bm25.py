@@ -0,0 +1,34 @@
+from bm25 import BM25Index, reciprocal_rank_fusion, tokenize
+from ingest import load_chunks
+
+def manuals_index():
+    return BM25Index([(c.id, c.text) for c in load_chunks()])
+
+def test_tokenize_stems_and_drops_stopwords():
+    assert tokenize("Can I cancel? It was cancelled.") == ["cancel", "cancel"]
+    assert tokenize("rates rate 2.9% APR") == ["rat", "rat", "2.9%", "apr"]
+
+def test_keyword_query_is_confident():
+    index = manuals_index()
+    for query, expected in [("What are your financing rates?", "2.9% APR"), ("Is there a fee to cancel?", "cancelled"), ("APR", "2.9% APR")]:
+        hits = index.search(query)
+        assert expected in index.texts[hits[0][0]]
+        assert index.confident(query, hits, min_score=1.2, margin=1.5)
+
+def test_paraphrase_without_keywords_is_not_confident():
+    index = manuals_index()
+    assert not index.confident("Is the oil change included?", index.search("Is the oil change included?"), 1.2, 1.5)
+    # Two weak, competing matches: leave it to the vector path.
+    assert not index.confident("what are your hours on sunday", index.search("what are your hours on sunday"), 1.2, 1.5)
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]])
+    assert fused[0] == "b"
+    assert set(fused) == {"a", "b", "c", "d"}
+
+if __name__ == "__main__":
+    test_tokenize_stems_and_drops_stopwords()
+    test_keyword_query_is_confident()
+    test_paraphrase_without_keywords_is_not_confident()
+    test_reciprocal_rank_fusion_rewards_agreement()
+    print("✅ BM25 tests passed.")
@@ -0,0 +1,112 @@
+import os
+import json
+import asyncio
+
+import resilience
+from call_recorder import BREAKER, CallRecorder
+from fakes import InMemoryDatabase
+
+def test_events_are_written_in_batches(tmp_path):
+    async def run():
+        db = InMemoryDatabase()
+        recorder = CallRecorder(db, batch_size=3, flush_ms=10_000, spill_path=str(tmp_path / "spill.jsonl"))
+        call = recorder.call("room-a")
+        for i in range(7):
+            call.event("user", text=f"utterance {i}")
+        await asyncio.sleep(0.01)
+        # A full batch is written without waiting for the timer, along with whatever queued behind it.
+        written_before_end = len(db.call_events.docs)
+        await call.end("anonymous", customer=None)
+        return db, call, written_before_end
+
+    resilience._breakers.clear()
+    db, call, written_before_end = asyncio.run(run())
+    assert written_before_end == 7
+    assert [d["seq"] for d in db.call_events.docs.values()] == list(range(1, 8))
+    summary = db.call_records.docs[call.call_id]
+    assert summary["outcome"] == "anonymous" and summary["events"] == 7 and summary["counts"] == {"user": 7}
+
+def test_timer_flushes_a_partial_batch(tmp_path):
+    async def run():
+        db = InMemoryDatabase()
+        recorder = CallRecorder(db, batch_size=100, flush_ms=20, spill_path=str(tmp_path / "spill.jsonl"))
+        recorder.call("room-a").event("agent", text="Hello!")
+        await asyncio.sleep(0.05)
+        return db
+
+    resilience._breakers.clear()
+    assert len(asyncio.run(run()).call_events.docs) == 1
+
+def test_spills_while_db_is_down_and_replays_once(tmp_path):
+    spill = tmp_path / "spill.jsonl"
+
+    async def run():
+        recorder = CallRecorder(None, batch_size=2, flush_ms=10_000, spill_path=str(spill))
+        call = recorder.call("room-a")
+        for i in range(5):
+            call.event("user", text=f"utterance {i}")
+        await call.end("identified")
+        spilled = spill.read_text().splitlines()
+
+        # MongoDB is back; one event had already landed before the outage.
+        recorder.db = InMemoryDatabase()
+        first = json.loads(spilled[0])["d"]
+        await recorder.db.call_events.insert_one(dict(first))
+        await recorder.flush()
+        return recorder.db, spilled
+
+    resilience._breakers.clear()
+    db, spilled = asyncio.run(run())
+    assert len(spilled) == 6
+    assert not os.path.exists(spill)
+    assert len(db.call_events.docs) == 5 and len(db.call_records.docs) == 1
+
+def test_slow_writes_leave_the_tools_breaker_alone(tmp_path):
+    async def run():
+        db = InMemoryDatabase()
+        recorder = CallRecorder(db, batch_size=1, flush_ms=10_000, spill_path=str(tmp_path / "spill.jsonl"))
+        original = db.call_events.insert_many
+
+        async def failing_insert_many(docs, ordered=True):
+            raise ConnectionError("socket timeout")
+
+        db.call_events.insert_many = failing_insert_many
+        call = recorder.call("room-a")
+        for i in range(resilience.BREAKER_FAILURES):
+            call.event("user", text=f"utterance {i}")
+            await recorder.flush()
+        db.call_events.insert_many = original
+        return resilience.breaker("mongo").state, resilience.breaker(BREAKER).state
+
+    resilience._breakers.clear()
+    tools, records = asyncio.run(run())
+    resilience._breakers.clear()
+    assert tools == resilience.CircuitBreaker.CLOSED
+    assert records == resilience.CircuitBreaker.OPEN
+
+def test_buffer_is_bounded(tmp_path):
+    spill = tmp_path / "spill.jsonl"
+
+    async def run():
+        recorder = CallRecorder(None, batch_size=2, flush_ms=10_000, max_buffer=5, spill_path=str(spill))
+        call = recorder.call("room-a")
+        sizes = []
+        for i in range(20):
+            call.event("user", text=f"utterance {i}")
+            sizes.append(len(recorder._buffer))
+        await asyncio.sleep(0.01)
+        return sizes
+
+    sizes = asyncio.run(run())
+    assert max(sizes) <= 5
+    # The oldest events went to disk, in order.
+    first = json.loads(spill.read_text().splitlines()[0])["d"]
+    assert first["seq"] == 1
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    for test in (test_events_are_written_in_batches, test_timer_flushes_a_partial_batch, test_spills_while_db_is_down_and_replays_once, test_slow_writes_leave_the_tools_breaker_alone, test_buffer_is_bounded):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("✅ Call recorder tests passed")
@@ -0,0 +1,97 @@
+import os
+import uuid
+import asyncio
+import pytest
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from database import DatabaseManager, is_iso_date, next_open_dates
+from fakes import InMemoryDatabase
+
+needs_mongo = pytest.mark.skipif(not os.getenv("MONGO_URI"), reason="MONGO_URI not set")
+
+async def _race(callers: int, capacity: int, db: DatabaseManager = None):
+    db = db or DatabaseManager()
+    # A far-future ISO date nobody will ever book (check_availability only accepts ISO), removed afterwards.
+    n = uuid.uuid4().int
+    date = f"{2900 + n % 100}-{1 + n % 12:02d}-{1 + n % 28:02d}"
+    try:
+        await db.set_capacity(date, capacity)
+        results = await asyncio.gather(*(db.reserve_capacity(date) for _ in range(callers)))
+        available = await db.check_availability(date)
+        await db.release_capacity(date)
+        reopened = await db.check_availability(date)
+        return results, available, reopened
+    finally:
+        await db.db.availability.delete_one({"_id": date})
+
+@needs_mongo
+def test_concurrent_reservations_never_overbook():
+    results, available, reopened = asyncio.run(_race(callers=20, capacity=2))
+    assert sum(results) == 2
+    assert available is False
+    assert reopened is True
+
+def test_concurrent_reservations_never_overbook_offline():
+    async def run():
+        db = DatabaseManager()
+        saved = db.db
+        # Every round trip yields, so the 20 reservations really interleave.
+        db.db = InMemoryDatabase(latency=0.001)
+        try:
+            return await _race(callers=20, capacity=2, db=db)
+        finally:
+            db.db = saved
+
+    results, available, reopened = asyncio.run(run())
+    assert sum(results) == 2
+    assert available is False
+    assert reopened is True
+
+def test_unopened_day_takes_default_capacity():
+    async def run():
+        db = DatabaseManager()
+        saved = db.db
+        db.db = InMemoryDatabase()
+        try:
+            taken = await db.reserve_capacity("2025-03-06", units=2)
+            return taken, await db.db.availability.find_one({"_id": "2025-03-06"})
+        finally:
+            db.db = saved
+
+    taken, doc = asyncio.run(run())
+    assert taken and doc["reserved"] == 2 and doc["date"] == "2025-03-06"
+
+def test_next_open_dates_skips_full_days():
+    # 2025-03-03 is a Monday.
+    assert next_open_dates("2025-03-03", {"2025-03-03", "2025-03-05"}, limit=3) == ["2025-03-04", "2025-03-06", "2025-03-07"]
+
+def test_next_open_dates_by_weekday():
+    assert next_open_dates("2025-03-03", {"2025-03-04"}, limit=2, weekday="Tuesday") == ["2025-03-11", "2025-03-18"]
+    # Nothing past the horizon.
+    assert next_open_dates("2025-03-03", set(), limit=5, weekday="friday", horizon_days=10) == ["2025-03-07"]
+
+def test_only_iso_dates_reach_the_calendar():
+    assert is_iso_date("2025-03-06")
+    for raw in ["tomorrow", "2 PM tomorrow", "06/03/2025", None]:
+        assert not is_iso_date(raw), raw
+
+def test_open_dates_cache_invalidation():
+    db = DatabaseManager()
+    db._open_dates_cache = {("2025-03-03", 3, "", ""): (float("inf"), ["2025-03-04", "2025-03-06"]), ("2025-03-10", 3, "", ""): (float("inf"), ["2025-03-10"])}
+    db.invalidate_open_dates("2025-03-06")
+    assert list(db._open_dates_cache) == [("2025-03-10", 3, "", "")]
+    db.invalidate_open_dates()
+    assert db._open_dates_cache == {}
+
+if __name__ == "__main__":
+    test_next_open_dates_skips_full_days()
+    test_next_open_dates_by_weekday()
+    test_only_iso_dates_reach_the_calendar()
+    test_open_dates_cache_invalidation()
+    test_concurrent_reservations_never_overbook_offline()
+    test_unopened_day_takes_default_capacity()
+    if os.getenv("MONGO_URI"):
+        test_concurrent_reservations_never_overbook()
+    print("✅ Capacity calendar tests passed.")
@@ -0,0 +1,74 @@
+import json
+from types import SimpleNamespace
+
+from livekit.agents.llm import ChatContext, ChatMessage
+
+from context_manager import FACTS_MARKER, ContextManager, collapse_tool_output, group_turns
+
+LOOKUP_RESULT = json.dumps({"status": "success", "data": {"name": "Meredith Grey", "vehicle": "Rolls-Royce Phantom", "phone": "9876543210"}})
+
+def _call(call_id: str, name: str = "lookup_customer"):
+    return SimpleNamespace(tool_call_id=call_id, function_info=SimpleNamespace(name=name), raw_arguments='{"identifier": "9876543210"}')
+
+def _history(turns: int):
+    ctx = ChatContext().append(role="system", text="You are Auralis, the Front Desk for Rolls-Royce.")
+    ctx.messages.append(ChatMessage(role="assistant", tool_calls=[_call("call_0")], content=""))
+    ctx.messages.append(ChatMessage(role="tool", name="lookup_customer", content=LOOKUP_RESULT, tool_call_id="call_0"))
+    for i in range(turns):
+        ctx.append(role="user", text=f"Question number {i} about servicing my car and what the warranty covers.")
+        ctx.append(role="assistant", text=f"Answer number {i}: the warranty covers scheduled servicing for four years.")
+    return ctx
+
+def test_calls_and_results_are_grouped():
+    units = group_turns(_history(1).messages[1:])
+    assert [len(u) for u in units] == [2, 1, 1]
+
+def test_budget_bounds_prompt_and_keeps_pairs_whole():
+    manager = ContextManager(token_budget=300)
+    sizes = []
+    for turns in (5, 50, 200):
+        ctx = _history(turns)
+        sizes.append(manager.compact(ctx, {"customer": {"name": "Meredith Grey", "vehicle": "Rolls-Royce Phantom"}}))
+        roles = [m.role for m in ctx.messages]
+        assert roles[:2] == ["system", "system"]
+        # Never a tool result without the call before it.
+        for i, role in enumerate(roles):
+            if role == "tool":
+                assert ctx.messages[i - 1].tool_calls
+        assert ctx.messages[-1].content.startswith(f"Answer number {turns - 1}")
+    assert max(sizes) <= 300
+    # Flat, not growing with call length.
+    assert abs(sizes[2] - sizes[1]) < 30
+
+def test_facts_survive_trimming():
+    ctx = _history(200)
+    ContextManager(token_budget=300).compact(ctx, {"customer": {"name": "Meredith Grey"}})
+    facts = ctx.messages[1].content
+    assert facts.startswith(FACTS_MARKER) and "Meredith Grey" in facts
+    # The lookup itself was trimmed, the facts block carries it.
+    assert not any(m.role == "tool" for m in ctx.messages)
+
+def test_old_tool_outputs_collapse():
+    assert collapse_tool_output(LOOKUP_RESULT) == '{"status": "success"} [collapsed]'
+    ctx = _history(1)
+    for i in (1, 2):
+        ctx.messages.append(ChatMessage(role="assistant", tool_calls=[_call(f"call_{i}", "check_availability")], content=""))
+        ctx.messages.append(ChatMessage(role="tool", content=json.dumps({"available": True, "date": "2025-03-06", "time": None}), tool_call_id=f"call_{i}"))
+    ContextManager(token_budget=5000, keep_tool_results=2).compact(ctx)
+    tool_contents = [m.content for m in ctx.messages if m.role == "tool"]
+    assert tool_contents[0].endswith("[collapsed]")
+    assert not any(c.endswith("[collapsed]") for c in tool_contents[1:])
+
+def test_stored_history_cap():
+    ctx = _history(200)
+    ContextManager(max_stored_messages=50).trim_stored(ctx)
+    assert len(ctx.messages) <= 50
+    assert ctx.messages[0].role == "system" and ctx.messages[1].role != "tool"
+
+if __name__ == "__main__":
+    test_calls_and_results_are_grouped()
+    test_budget_bounds_prompt_and_keeps_pairs_whole()
+    test_facts_survive_trimming()
+    test_old_tool_outputs_collapse()
+    test_stored_history_cap()
+    print("✅ Context manager tests passed.")
@@ -0,0 +1,105 @@
+import os
+import json
+import asyncio
+
+from customer_matcher import CustomerMatcher, name_signatures, plate_key
+from database import DatabaseManager
+from fakes import FakeKnowledgeBase, InMemoryDatabase
+from identity import customer_keys
+from prefetch import LookupPrefetcher
+from profile_cache import ProfileCache
+from session import SessionManager
+from tools import build_function_context
+from tracing import TurnTracer
+
+CUSTOMERS = [
+    {"_id": 1, "name": "Meredith Grey", "phone": "9876543210", "vehicle": "Tesla Model 3", "vehicle_no": "KA-01-AB-1234"},
+    {"_id": 2, "name": "Derek Shepherd", "phone": "9876543211", "vehicle": "Audi Q5", "vehicle_no": "KA-02-CD-5678"},
+    {"_id": 3, "name": "Mark Sloan", "phone": "9876543212", "vehicle": "BMW X5", "vehicle_no": "MH-12-EF-9012"},
+]
+
+def _matcher():
+    matcher = CustomerMatcher()
+    matcher.add_many(CUSTOMERS)
+    return matcher
+
+def test_misheard_names_match():
+    matcher = _matcher()
+    for query, expected in [("Meredith Gray", "Meredith Grey"), ("Derik Shepard", "Derek Shepherd"), ("mark slone", "Mark Sloan")]:
+        results = matcher.match(query)
+        assert results and results[0]["customer"]["name"] == expected, query
+        assert results[0]["matched_on"] == "name"
+
+def test_exact_name_is_confident():
+    results = _matcher().match("Meredith Grey")
+    assert results[0]["confidence"] >= 0.85
+
+def test_vehicle_number_matches_despite_formatting():
+    assert plate_key("ka 01 ab 1234") == "KA01AB1234"
+    results = _matcher().match("KA01 AB 1234")
+    assert results[0]["customer"]["_id"] == 1
+    assert results[0]["matched_on"] == "vehicle_no"
+
+def test_unrelated_query_returns_nothing():
+    assert _matcher().match("Quentin Zyx") == []
+    assert _matcher().match("") == []
+
+def test_add_replaces_and_remove_tombstones():
+    matcher = _matcher()
+    matcher.add({"_id": 3, "name": "Mark Sloane", "phone": "9876543212", "vehicle": "BMW X7", "vehicle_no": "MH-12-EF-9012"})
+    assert len(matcher) == 3
+    assert matcher.match("Mark Sloan")[0]["customer"]["vehicle"] == "BMW X7"
+    matcher.remove(3)
+    assert all(r["customer"]["_id"] != 3 for r in matcher.match("Mark Sloan"))
+
+def test_updates_compact_tombstones():
+    matcher = CustomerMatcher(min_compact=10)
+    matcher.add_many(CUSTOMERS)
+    # A change stream re-adding the same customers over and over.
+    for i in range(100):
+        matcher.add(dict(CUSTOMERS[i % 3], vehicle=f"Car {i}"))
+    assert len(matcher) == 3
+    # Slots (and the postings pointing at them) stay bounded instead of growing per update.
+    assert len(matcher.docs) < 20 and matcher.tombstones < 10
+    assert matcher.match("Meredith Gray")[0]["customer"]["vehicle"] == "Car 99"
+
+def test_fuzzy_lookup_waits_for_confirmation():
+    async def run():
+        db_manager = DatabaseManager()
+        saved = {k: getattr(db_manager, k) for k in ("db", "profiles", "matcher", "_matcher_task")}
+        db_manager.db, db_manager.profiles, db_manager.matcher, db_manager._matcher_task = InMemoryDatabase(), ProfileCache(), CustomerMatcher(), None
+        try:
+            for doc in CUSTOMERS:
+                await db_manager.db.customers.insert_one(dict(doc, **customer_keys(doc)))
+            await db_manager.load_matcher()
+            session = SessionManager()
+            fnc_ctx = build_function_context(session, db_manager, FakeKnowledgeBase(), LookupPrefetcher(db_manager, session), TurnTracer("room", path=os.devnull))
+            lookup = fnc_ctx.ai_functions["lookup_customer"].callable
+            misheard = json.loads(await lookup(identifier="Meredith Gray"))
+            authenticated_before = session.is_authenticated
+            # The caller said yes: the agent looks the exact name up.
+            confirmed = json.loads(await lookup(identifier=misheard["candidate"]["name"]))
+            return misheard, authenticated_before, confirmed, session
+        finally:
+            for key, value in saved.items():
+                setattr(db_manager, key, value)
+
+    misheard, authenticated_before, confirmed, session = asyncio.run(run())
+    assert misheard["status"] == "confirm" and misheard["candidate"]["name"] == "Meredith Grey"
+    assert "phone" not in misheard["candidate"]
+    assert not authenticated_before
+    assert confirmed["status"] == "success" and session.is_authenticated
+
+def test_signatures_cover_every_token():
+    assert all(len(signature.split()) == 2 for signature in name_signatures("meredith grey"))
+
+if __name__ == "__main__":
+    test_misheard_names_match()
+    test_exact_name_is_confident()
+    test_vehicle_number_matches_despite_formatting()
+    test_unrelated_query_returns_nothing()
+    test_add_replaces_and_remove_tombstones()
+    test_updates_compact_tombstones()
+    test_fuzzy_lookup_waits_for_confirmation()
+    test_signatures_cover_every_token()
+    print("✅ Customer matcher tests passed.")
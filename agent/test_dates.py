@@ -0,0 +1,76 @@
+from datetime import datetime
+
+from dates import DateResolver, ResolvedDate
+
+# Call placed on Wednesday 5 March 2025, 11:30 at the dealership.
+RESOLVER = DateResolver(datetime(2025, 3, 5, 11, 30))
+
+CORPUS = {
+    "tomorrow": ResolvedDate("2025-03-06"),
+    "Tomorrow.": ResolvedDate("2025-03-06"),
+    "Friday at 3 p.m.": ResolvedDate("2025-03-07", "15:00"),
+    "tomorrow at 10 AM": ResolvedDate("2025-03-06", "10:00"),
+    "2 PM tomorrow": ResolvedDate("2025-03-06", "14:00"),
+    "tomorrow 2:30 p.m.": ResolvedDate("2025-03-06", "14:30"),
+    "tomorrow morning": ResolvedDate("2025-03-06", "09:00"),
+    "today": ResolvedDate("2025-03-05"),
+    "tonight": ResolvedDate("2025-03-05", "17:00"),
+    "day after tomorrow": ResolvedDate("2025-03-07"),
+    "in 3 days": ResolvedDate("2025-03-08"),
+    "in two weeks": ResolvedDate("2025-03-19"),
+    "friday": ResolvedDate("2025-03-07"),
+    "on Friday afternoon": ResolvedDate("2025-03-07", "14:00"),
+    "this friday": ResolvedDate("2025-03-07"),
+    "next friday": ResolvedDate("2025-03-14"),
+    "wednesday": ResolvedDate("2025-03-12"),
+    "next week": ResolvedDate("2025-03-10"),
+    "March 10th": ResolvedDate("2025-03-10"),
+    "the 4th of March": ResolvedDate("2026-03-04"),
+    "12 april at 16:00": ResolvedDate("2025-04-12", "16:00"),
+    "Sept 1, 2025": ResolvedDate("2025-09-01"),
+    "2025-03-20": ResolvedDate("2025-03-20"),
+    "20/3": ResolvedDate("2025-03-20"),
+    "12 AM tomorrow": ResolvedDate("2025-03-06", "00:00"),
+    "tomorrow at 10": ResolvedDate("2025-03-06", "10:00"),
+    "Friday at 3": ResolvedDate("2025-03-07", "15:00"),
+    "friday at 3:30": ResolvedDate("2025-03-07", "15:30"),
+    "next Monday at 9": ResolvedDate("2025-03-10", "09:00"),
+    "tomorrow at 10 o'clock": ResolvedDate("2025-03-06", "10:00"),
+    "the 10th": ResolvedDate("2025-03-10"),
+    "the 3rd": ResolvedDate("2025-04-03"),
+    "Tuesday the 11th": ResolvedDate("2025-03-11"),
+    "ten AM tomorrow": ResolvedDate("2025-03-06", "10:00"),
+    "tomorrow at ten thirty": ResolvedDate("2025-03-06", "10:30"),
+    "Friday at four": ResolvedDate("2025-03-07", "16:00"),
+    "2 PM": ResolvedDate("2025-03-05", "14:00"),
+    # Already past at 11:30: the next day.
+    "10 AM": ResolvedDate("2025-03-06", "10:00"),
+    "today at 10 AM": None,
+    "Monday the 11th": None,
+    "2025-02-01": None,
+    "31 february": None,
+    "13 pm tomorrow": None,
+    "whenever works": None,
+    "": None,
+}
+
+def test_spoken_date_corpus():
+    for phrase, expected in CORPUS.items():
+        assert RESOLVER.resolve(phrase) == expected, phrase
+
+def test_slot_key_matches_capacity_ids():
+    assert RESOLVER.resolve("tomorrow").key == "2025-03-06"
+    assert RESOLVER.resolve("tomorrow at 10 AM").key == "2025-03-06#10:00"
+
+def test_anchor_uses_dealership_timezone():
+    # 20:00 UTC on the 5th is already the 6th in Asia/Kolkata.
+    from datetime import timezone
+    resolver = DateResolver(datetime(2025, 3, 5, 20, 0, tzinfo=timezone.utc), tz="Asia/Kolkata")
+    assert resolver.today == "2025-03-06"
+    assert resolver.resolve("tomorrow").date == "2025-03-07"
+
+if __name__ == "__main__":
+    test_spoken_date_corpus()
+    test_slot_key_matches_capacity_ids()
+    test_anchor_uses_dealership_timezone()
+    print("✅ Date resolution tests passed.")
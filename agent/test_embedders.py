@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+import pytest
+
+from ingest import load_chunks
+
+MODEL_DIR = os.getenv("RAG_ONNX_MODEL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "minilm-onnx"))
+
+knowledge_base = [chunk.text for chunk in load_chunks()]
+
+QUERIES = [
+    "What are your financing rates?",
+    "When is the showroom open on Sunday?",
+    "Can I cancel my service appointment?",
+    "How long is the warranty?",
+]
+
+def cosine_rows(a, b):
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+@pytest.mark.parametrize("model_file, min_cosine", [("model.onnx", 0.999), ("model_quantized.onnx", 0.98)])
+def test_onnx_parity_with_reference(model_file, min_cosine):
+    pytest.importorskip("sentence_transformers")
+    pytest.importorskip("onnxruntime")
+    if not os.path.exists(os.path.join(MODEL_DIR, model_file)):
+        pytest.skip(f"{model_file} missing (python embedders.py download/quantize {MODEL_DIR})")
+
+    from embedders import OnnxEmbedder, SentenceTransformerEmbedder
+
+    reference = SentenceTransformerEmbedder()
+    candidate = OnnxEmbedder(MODEL_DIR, model_file=model_file)
+    texts = knowledge_base + QUERIES
+
+    agreement = cosine_rows(np.asarray(reference.encode(texts)), candidate.encode(texts))
+    print(f"{model_file}: min cosine {agreement.min():.4f}, mean {agreement.mean():.4f}")
+    assert agreement.min() >= min_cosine
+
+    # Retrieval must pick the same policy sentence for every query.
+    corpus_ref, queries_ref = np.asarray(reference.encode(knowledge_base)), np.asarray(reference.encode(QUERIES))
+    corpus_onnx, queries_onnx = candidate.encode(knowledge_base), candidate.encode(QUERIES)
+    assert list((queries_ref @ corpus_ref.T).argmax(axis=1)) == list((queries_onnx @ corpus_onnx.T).argmax(axis=1))
+
+def test_onnx_single_text_returns_unit_vector():
+    pytest.importorskip("onnxruntime")
+    if not os.path.exists(os.path.join(MODEL_DIR, "model.onnx")):
+        pytest.skip("ONNX model missing")
+
+    from embedders import OnnxEmbedder
+
+    vector = OnnxEmbedder(MODEL_DIR).encode("Is the oil change included?")
+    assert vector.shape == (384,)
+    assert abs(np.linalg.norm(vector) - 1.0) < 1e-4
+
+if __name__ == "__main__":
+    test_onnx_parity_with_reference("model.onnx", 0.999)
+    test_onnx_parity_with_reference("model_quantized.onnx", 0.98)
+    test_onnx_single_text_returns_unit_vector()
+    print("✅ ONNX embedder parity tests passed.")
@@ -0,0 +1,75 @@
+import time
+import asyncio
+import threading
+
+import numpy as np
+
+from embedding_service import EmbeddingBatcher
+
+class RecordingEmbedder:
+    """
+    Encodes text to [len(text), 0] and remembers every batch it was given.
+    """
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def encode(self, texts):
+        with self._lock:
+            self.batches.append(list(texts))
+        time.sleep(self.delay)
+        if self.fail:
+            raise ValueError("model exploded")
+        return np.array([[float(len(t)), 0.0] for t in texts], dtype=np.float32)
+
+def test_concurrent_requests_share_one_batch():
+    embedder = RecordingEmbedder()
+    batcher = EmbeddingBatcher(embedder, max_batch_size=32, max_wait_ms=50)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.encode("x" * n) for n in range(1, 9)))
+
+    vectors = asyncio.run(scenario())
+    batcher.close()
+
+    assert [v[0] for v in vectors] == [float(n) for n in range(1, 9)]
+    assert len(embedder.batches) == 1
+    assert batcher.batch_sizes.snapshot()["count"] >= 1
+
+def test_batch_is_capped_at_max_size():
+    embedder = RecordingEmbedder()
+    batcher = EmbeddingBatcher(embedder, max_batch_size=3, max_wait_ms=50)
+    futures = [batcher.submit(f"q{i}") for i in range(7)]
+    for future in futures:
+        future.result(timeout=2)
+    batcher.close()
+
+    assert max(len(batch) for batch in embedder.batches) <= 3
+    assert sum(len(batch) for batch in embedder.batches) == 7
+
+def test_lone_request_waits_at_most_max_wait():
+    batcher = EmbeddingBatcher(RecordingEmbedder(), max_wait_ms=20)
+    started = time.perf_counter()
+    batcher.submit("only one").result(timeout=2)
+    batcher.close()
+    assert time.perf_counter() - started < 0.5
+
+def test_encode_errors_reach_every_caller():
+    batcher = EmbeddingBatcher(RecordingEmbedder(fail=True), max_wait_ms=20)
+    futures = [batcher.submit("a"), batcher.submit("b")]
+    for future in futures:
+        try:
+            future.result(timeout=2)
+            assert False, "expected failure"
+        except ValueError:
+            pass
+    batcher.close()
+
+if __name__ == "__main__":
+    test_concurrent_requests_share_one_batch()
+    test_batch_is_capped_at_max_size()
+    test_lone_request_waits_at_most_max_wait()
+    test_encode_errors_reach_every_caller()
+    print("✅ Embedding batcher tests passed.")
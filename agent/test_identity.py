@@ -0,0 +1,26 @@
+from identity import customer_keys, name_key, to_e164
+
+def test_phone_forms_normalize_to_e164():
+    for raw in ["9876543210", "98765 43210", "+91-98765-43210", "0091 9876543210", "09876543210", "919876543210"]:
+        assert to_e164(raw) == "+919876543210", raw
+    assert to_e164("+1 (415) 555-0100") == "+14155550100"
+
+def test_non_phones_are_rejected():
+    for raw in ["", None, "123", "Meredith Grey", "+1234"]:
+        assert to_e164(raw) is None, raw
+
+def test_name_key_folds_case_accents_and_punctuation():
+    assert name_key("MEREDITH   grey") == "meredith grey"
+    assert name_key("Zoë O'Brien") == "zoe o brien"
+    # Regex metacharacters are just text now.
+    assert name_key("^.*$") is None
+
+def test_customer_keys():
+    assert customer_keys({"name": "Mark Sloan", "phone": "9876543212"}) == {"phone_e164": "+919876543212", "name_key": "mark sloan"}
+
+if __name__ == "__main__":
+    test_phone_forms_normalize_to_e164()
+    test_non_phones_are_rejected()
+    test_name_key_folds_case_accents_and_punctuation()
+    test_customer_keys()
+    print("✅ Identity normalization tests passed.")
@@ -0,0 +1,73 @@
+import tempfile
+
+import numpy as np
+
+from ingest import apply, chunk_document, chunk_id, existing_ids, load_chunks, plan
+from vector_store import LocalVectorIndex
+
+class FakeModel:
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts):
+        self.encoded.extend(texts)
+        return np.array([[float(len(t)), 1.0, 0.0] for t in texts], dtype=np.float32)
+
+DOC = """# Policies
+
+## Financing
+
+We offer financing rates starting at 2.9% APR.
+
+- Oil changes are included for 3 years.
+- Valet pick-up is complimentary.
+"""
+
+def test_chunking_keeps_sections_and_splits_lists():
+    chunks = chunk_document("policies.md", DOC)
+    assert [c.text for c in chunks] == [
+        "We offer financing rates starting at 2.9% APR.",
+        "Oil changes are included for 3 years.",
+        "Valet pick-up is complimentary.",
+    ]
+    assert all(c.section == "Financing" for c in chunks)
+
+def test_long_paragraphs_split_on_sentences():
+    chunks = chunk_document("a.md", "One sentence here. " * 40, max_chars=100)
+    assert len(chunks) > 1
+    assert all(len(c.text) <= 100 for c in chunks)
+
+def test_ids_are_content_hashes():
+    assert chunk_id("Same  text") == chunk_id("Same text")
+    assert chunk_id("Same text") != chunk_id("Other text")
+
+def test_reingest_only_embeds_changes_and_deletes_removed():
+    index = LocalVectorIndex(tempfile.mkdtemp())
+    model = FakeModel()
+
+    first = chunk_document("p.md", DOC)
+    apply(index, plan(first, existing_ids(index)), model)
+    assert len(index) == 3
+    assert len(model.encoded) == 3
+
+    # No edits: nothing to embed or delete.
+    unchanged = plan(first, existing_ids(index))
+    assert not unchanged.to_embed and not unchanged.to_delete and unchanged.unchanged == 3
+
+    edited = chunk_document("p.md", DOC.replace("2.9%", "3.1%").replace("- Valet pick-up is complimentary.\n", ""))
+    model.encoded.clear()
+    apply(index, plan(edited, existing_ids(index)), model, upsert_batch=1)
+
+    assert model.encoded == ["We offer financing rates starting at 3.1% APR."]
+    assert sorted(index.ids) == sorted(c.id for c in edited)
+
+def test_bundled_manuals_load():
+    assert any("2.9% APR" in c.text for c in load_chunks())
+
+if __name__ == "__main__":
+    test_chunking_keeps_sections_and_splits_lists()
+    test_long_paragraphs_split_on_sentences()
+    test_ids_are_content_hashes()
+    test_reingest_only_embeds_changes_and_deletes_removed()
+    test_bundled_manuals_load()
+    print("✅ Ingestion tests passed.")
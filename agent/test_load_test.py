@@ -0,0 +1,41 @@
+import asyncio
+
+from database import DatabaseManager
+from load_test import load_scenarios, parse_args, regressions, run_level, scenario_for
+
+def _args(**overrides):
+    args = parse_args(["--filler-customers", "200", "--stt-ms", "0", "--llm-ttft-ms", "0", "--tts-ms", "0", "--db-ms", "0", "--rag-ms", "0"])
+    for key, value in overrides.items():
+        setattr(args, key, value)
+    return args
+
+def test_scenarios_come_from_seed_files():
+    scenarios = load_scenarios()
+    assert {s["name"] for s in scenarios} >= {"Meredith Gray", "Jean Du"}
+    # Callers past the scripted ones ask for other days.
+    assert scenario_for(len(scenarios), scenarios)["date"] != scenarios[0]["date"]
+
+def test_concurrent_sessions_complete_offline():
+    db_manager = DatabaseManager()
+    saved = {k: getattr(db_manager, k) for k in ("db", "profiles", "matcher", "_matcher_task", "_open_dates_cache")}
+    try:
+        report = asyncio.run(run_level(concurrency=8, rounds=2, args=_args(), scenarios=load_scenarios()))
+    finally:
+        for key, value in saved.items():
+            setattr(db_manager, key, value)
+    assert report["sessions"] == 16 and report["errors"] == 0
+    assert report["requests_submitted"] == 16
+    # "tomorrow" is seeded full, so those callers exercise find_open_dates.
+    assert {"lookup_customer", "consult_policy", "check_availability", "find_open_dates", "submit_booking_request"} <= set(report["tool_ms"])
+    assert report["turns_per_second"] > 0 and report["loop_lag_ms"]["p95"] is not None
+
+def test_regressions_flag_thresholds():
+    report = {"concurrency": 10, "errors": 0, "tool_ms": {"lookup_customer": {"p95": 80.0}}, "loop_lag_ms": {"p95": 3.0}}
+    assert regressions([report], max_tool_p95_ms=100, max_loop_lag_ms=10) == []
+    assert len(regressions([report], max_tool_p95_ms=50, max_loop_lag_ms=2)) == 2
+
+if __name__ == "__main__":
+    test_scenarios_come_from_seed_files()
+    test_concurrent_sessions_complete_offline()
+    test_regressions_flag_thresholds()
+    print("✅ Load test harness tests passed.")
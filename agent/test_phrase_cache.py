@@ -0,0 +1,34 @@
+import tempfile
+
+from phrase_cache import PhraseAudioCache, normalize_phrase
+
+PCM = bytes(range(256)) * 10
+
+def test_normalized_exact_match_only():
+    cache = PhraseAudioCache()
+    cache.put("aura-asteria-en", "Checking availability...", PCM, 24000, 1)
+    assert normalize_phrase("  Checking   AVAILABILITY. ") == "checking availability"
+    assert cache.get("aura-asteria-en", "checking availability") == (PCM, 24000, 1)
+    assert cache.get("aura-asteria-en", "Checking availability for Tuesday") is None
+    # Keyed by voice too.
+    assert cache.get("aura-luna-en", "Checking availability...") is None
+
+def test_disk_cache_survives_restart():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        PhraseAudioCache(cache_dir).put("aura-asteria-en", "Rolls-Royce Service. How may I assist you?", PCM, 24000, 1)
+        restarted = PhraseAudioCache(cache_dir)
+        assert restarted.get("aura-asteria-en", "Rolls-Royce Service. How may I assist you?") == (PCM, 24000, 1)
+
+def test_prefix_matching_for_streamed_text():
+    cache = PhraseAudioCache()
+    cache.register("aura-asteria-en", "Submitting your request...")
+    assert cache.could_match("aura-asteria-en", "Submitting")
+    assert cache.could_match("aura-asteria-en", "Submitting your request.")
+    assert not cache.could_match("aura-asteria-en", "Submitting your request for Friday")
+    assert not cache.could_match("aura-luna-en", "Submitting")
+
+if __name__ == "__main__":
+    test_normalized_exact_match_only()
+    test_disk_cache_survives_restart()
+    test_prefix_matching_for_streamed_text()
+    print("✅ Phrase cache tests passed.")
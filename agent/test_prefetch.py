@@ -0,0 +1,82 @@
+import asyncio
+
+from prefetch import LookupPrefetcher, name_candidate, phone_candidate, spoken_digits
+from session import SessionManager
+
+MEREDITH = {"_id": 1, "name": "Meredith Grey", "phone": "9876543210", "vehicle": "Rolls-Royce Phantom"}
+
+class SlowDB:
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.calls = []
+
+    async def get_customer_by_lookup(self, identifier: str):
+        self.calls.append(identifier)
+        await asyncio.sleep(self.delay)
+        return MEREDITH if identifier in ("9876543210", "Meredith Grey") else None
+
+def test_phone_candidates_from_transcripts():
+    normalize = SessionManager().normalize_phone
+    assert phone_candidate("yeah it's 98765 43210", normalize) == "9876543210"
+    assert spoken_digits("nine eight seven six five four three two one zero") == "9876543210"
+    assert spoken_digits("nine eight double seven") == "9877"
+    assert phone_candidate("nine eight seven six five four three two one oh", normalize) == "9876543210"
+    # Still being spoken.
+    assert phone_candidate("my number is 98765", normalize) is None
+
+def test_name_candidates():
+    assert name_candidate("Hi, this is Meredith Grey calling about my car") == "Meredith Grey"
+    assert name_candidate("my name is Derek Shepherd") == "Derek Shepherd"
+    assert name_candidate("this is Meredith") is None
+    assert name_candidate("I need a service") is None
+
+def test_interim_phone_is_prefetched_and_reused():
+    async def run():
+        db, session = SlowDB(), SessionManager()
+        prefetcher = LookupPrefetcher(db, session)
+        # The histogram is process-wide; other tests may have observed into it.
+        before = prefetcher.saved_ms.snapshot()["count"]
+        prefetcher.on_transcript("my number is 98765", False)
+        prefetcher.on_transcript("my number is 98765 43210", False)
+        prefetcher.on_transcript("my number is 98765 43210.", True)
+        # The LLM's tool call arrives after the lookup already finished.
+        await asyncio.sleep(0.1)
+        found, customer = await prefetcher.take("+91 98765 43210")
+        return db.calls, found, customer, prefetcher.saved_ms.snapshot()["count"] - before
+
+    calls, found, customer, saved = asyncio.run(run())
+    assert calls == ["9876543210"]
+    assert found and customer["name"] == "Meredith Grey"
+    assert saved == 1
+
+def test_names_only_from_final_transcripts():
+    async def run():
+        db, session = SlowDB(delay=0), SessionManager()
+        prefetcher = LookupPrefetcher(db, session)
+        prefetcher.on_transcript("this is Meredith Grey", False)
+        interim_calls = list(db.calls)
+        prefetcher.on_transcript("this is Meredith Grey", True)
+        return interim_calls, await prefetcher.take("meredith grey")
+
+    interim_calls, (found, customer) = asyncio.run(run())
+    assert interim_calls == []
+    assert found and customer["_id"] == 1
+
+def test_unprefetched_or_missing_falls_back():
+    async def run():
+        db, session = SlowDB(delay=0), SessionManager()
+        prefetcher = LookupPrefetcher(db, session)
+        prefetcher.on_transcript("it's 91234 56789", True)
+        return await prefetcher.take("Mark Sloan"), await prefetcher.take("9123456789")
+
+    not_started, not_found = asyncio.run(run())
+    assert not_started == (False, None)
+    assert not_found == (False, None)
+
+if __name__ == "__main__":
+    test_phone_candidates_from_transcripts()
+    test_name_candidates()
+    test_interim_phone_is_prefetched_and_reused()
+    test_names_only_from_final_transcripts()
+    test_unprefetched_or_missing_falls_back()
+    print("✅ Prefetch tests passed.")
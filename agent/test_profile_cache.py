@@ -0,0 +1,118 @@
+import asyncio
+
+from customer_matcher import CustomerMatcher
+from database import DatabaseManager
+from fakes import InMemoryDatabase
+from identity import customer_keys
+from profile_cache import ProfileCache
+
+def _customer(name: str, phone: str, **extra):
+    doc = {"name": name, "phone": phone, "vehicle": "Rolls-Royce Phantom", **extra}
+    doc.update(customer_keys(doc))
+    return doc
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_lookups_read_through_the_cache():
+    async def run():
+        db_manager = DatabaseManager()
+        original_db, original_profiles = db_manager.db, db_manager.profiles
+        db_manager.db, db_manager.profiles = InMemoryDatabase(), ProfileCache()
+        try:
+            await db_manager.db.customers.insert_one(_customer("Meredith Grey", "9876543210"))
+            first = await db_manager.get_customer_by_lookup("98765 43210")
+            # Same customer by name, then by phone again: no further reads.
+            second = await db_manager.get_customer_by_lookup("meredith GREY")
+            third = await db_manager.get_customer_by_lookup("+91 98765 43210")
+            return first, second, third, db_manager.db.customers.reads
+        finally:
+            db_manager.db, db_manager.profiles = original_db, original_profiles
+
+    first, second, third, reads = asyncio.run(run())
+    assert first["name"] == second["name"] == third["name"] == "Meredith Grey"
+    assert reads == 1
+
+def test_cache_and_watcher_outlive_each_job():
+    async def run():
+        db_manager = DatabaseManager()
+        saved = (db_manager.db, db_manager.profiles, db_manager.matcher, db_manager._matcher_task, db_manager._watch_task)
+        db_manager.db, db_manager.profiles = InMemoryDatabase(), ProfileCache()
+        db_manager.matcher, db_manager._matcher_task, db_manager._watch_task = CustomerMatcher(), None, None
+        try:
+            await db_manager.db.customers.insert_one(_customer("Mark Sloan", "9876543212", _id=7))
+            # What entrypoint does on every job this worker runs.
+            reads = []
+            for _ in range(3):
+                await db_manager.load_matcher()
+                db_manager.watch_customers()
+                await db_manager.get_customer_by_lookup("98765 43212")
+                reads.append(db_manager.db.customers.reads)
+            await _settle()
+            watch_task = db_manager._watch_task
+            await db_manager.db.customers.update_one({"_id": 7}, {"$set": {"vehicle": "Rolls-Royce Cullinan"}})
+            await _settle()
+            cached = db_manager.profiles.get(ProfileCache.keys_for("+919876543212"))
+            watch_task.cancel()
+            return watch_task, db_manager._watch_task, reads, cached
+        finally:
+            db_manager.db, db_manager.profiles, db_manager.matcher, db_manager._matcher_task, db_manager._watch_task = saved
+
+    first_task, last_task, reads, cached = asyncio.run(run())
+    assert first_task is last_task
+    # Later jobs are served from the profile cache the first one filled.
+    assert reads[0] == reads[-1]
+    assert cached is None
+
+def test_change_stream_invalidates_by_id():
+    async def run():
+        db = InMemoryDatabase()
+        cache = ProfileCache()
+        await db.customers.insert_one(_customer("Mark Sloan", "9876543212", _id=7))
+        cache.put(await db.customers.find_one({"_id": 7}))
+        seen = []
+        task = asyncio.create_task(cache.watch(db.customers, on_change=seen.append))
+        await _settle()
+        watching = cache.watching
+        await db.customers.update_one({"_id": 7}, {"$set": {"vehicle": "Rolls-Royce Cullinan"}})
+        await _settle()
+        task.cancel()
+        return watching, cache.get(ProfileCache.keys_for("+919876543212")), seen
+
+    watching, cached, seen = asyncio.run(run())
+    assert watching
+    assert cached is None
+    assert seen[0]["fullDocument"]["vehicle"] == "Rolls-Royce Cullinan"
+
+def test_ttl_fallback_without_change_streams():
+    async def run():
+        cache = ProfileCache(ttl_seconds=3600, fallback_ttl_seconds=0.05)
+        task = asyncio.create_task(cache.watch(InMemoryDatabase(supports_change_streams=False).customers, retry_seconds=60))
+        await _settle()
+        cache.put(_customer("Owen Hunt", "9876543215", _id=1))
+        fresh = cache.get(ProfileCache.keys_for(name_key="owen hunt"))
+        await asyncio.sleep(0.1)
+        stale = cache.get(ProfileCache.keys_for(name_key="owen hunt"))
+        task.cancel()
+        return cache.watching, fresh, stale
+
+    watching, fresh, stale = asyncio.run(run())
+    assert not watching
+    assert fresh is not None and stale is None
+
+def test_bounded_lru():
+    cache = ProfileCache(max_entries=4)
+    for i in range(5):
+        cache.put(_customer(f"Customer {i}", f"98765432{i:02d}", _id=i))
+    assert len(cache._entries) == 4
+    assert cache.get(ProfileCache.keys_for(name_key="customer 0")) is None
+    assert cache.get(ProfileCache.keys_for(name_key="customer 4"))["_id"] == 4
+
+if __name__ == "__main__":
+    test_lookups_read_through_the_cache()
+    test_cache_and_watcher_outlive_each_job()
+    test_change_stream_invalidates_by_id()
+    test_ttl_fallback_without_change_streams()
+    test_bounded_lru()
+    print("✅ Profile cache tests passed.")
@@ -0,0 +1,76 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+from livekit.agents.llm import ChatContext
+
+from context_manager import ContextManager
+from dates import DateResolver
+from prompts import PromptCacheMonitor, dynamic_context, static_instructions
+from session import SessionManager
+
+def _usage(prompt_tokens: int, cached: int):
+    return SimpleNamespace(prompt_tokens=prompt_tokens, prompt_tokens_details=SimpleNamespace(cached_tokens=cached))
+
+class _FakeStream:
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self.closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.closed = True
+
+    async def __anext__(self):
+        try:
+            return next(self._chunks)
+        except StopIteration:
+            raise StopAsyncIteration
+
+def _fake_client(chunks):
+    async def create(**kwargs):
+        return _FakeStream(chunks)
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+def test_static_prompt_is_identical_across_calls():
+    first = static_instructions()
+    assert first is static_instructions()
+    # Nothing per-call may leak into the cacheable prefix.
+    for day in ("2025-03-05", "2026-10-17"):
+        assert day not in first and "Today is" not in first
+
+def test_dynamic_block_follows_static_prefix():
+    prompts = []
+    for day in (5, 6):
+        session = SessionManager()
+        session.dates = DateResolver(now=datetime(2025, 3, day, 9))
+        ctx = ChatContext().append(role="system", text=static_instructions())
+        ctx.append(role="user", text="Book me in tomorrow.")
+        ContextManager().compact(ctx, session.facts())
+        prompts.append(ctx.messages)
+    assert prompts[0][0].content == prompts[1][0].content
+    assert prompts[0][1].content == dynamic_context({"today": "2025-03-05", "weekday": "Wednesday"})
+    assert '"today":"2025-03-06"' in prompts[1][1].content
+
+def test_cached_tokens_are_recorded():
+    monitor = PromptCacheMonitor()
+    chunks = [SimpleNamespace(usage=None), SimpleNamespace(usage=_usage(1400, 1152))]
+    client = monitor.instrument(_fake_client(chunks))
+    observed = monitor.cached_tokens.count
+
+    async def consume():
+        stream = await client.chat.completions.create(model="gpt-4o-mini", messages=[], stream=True)
+        async with stream:
+            return [chunk async for chunk in stream]
+
+    assert len(asyncio.run(consume())) == 2
+    assert monitor.turns == 1
+    assert monitor.cached_tokens.count == observed + 1
+
+if __name__ == "__main__":
+    test_static_prompt_is_identical_across_calls()
+    test_dynamic_block_follows_static_prefix()
+    test_cached_tokens_are_recorded()
+    print("✅ Prompt tests passed.")
@@ -0,0 +1,71 @@
+import json
+import asyncio
+
+from publisher import MAX_PACKET_BYTES, RoomPublisher, encode_batch
+
+class _Participant:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.packets = []
+
+    async def publish_data(self, payload, reliable=True):
+        await asyncio.sleep(self.delay)
+        self.packets.append(json.loads(payload))
+
+def _messages(packets):
+    out = []
+    for packet in packets:
+        out.extend(packet["data"] if packet["type"] == "batch" else [packet])
+    return out
+
+def test_single_message_keeps_shape():
+    assert json.loads(encode_batch([{"type": "state", "data": {"status": "speaking"}}])[0]) == {"type": "state", "data": {"status": "speaking"}}
+
+def test_batches_respect_packet_size():
+    messages = [{"type": "agent_transcript", "data": {"text": "x" * 3000}} for _ in range(10)]
+    packets = encode_batch(messages)
+    assert len(packets) > 1 and all(len(p) <= MAX_PACKET_BYTES for p in packets)
+    assert _messages([json.loads(p) for p in packets]) == messages
+
+def test_state_flapping_coalesces_in_order():
+    async def run():
+        participant = _Participant()
+        publisher = RoomPublisher(participant, coalesce_ms=20).start()
+        publisher.publish("user_transcript", {"text": "Hello"})
+        for status in ("listening", "thinking", "speaking", "listening", "thinking"):
+            publisher.publish("state", {"status": status})
+        publisher.publish("agent_transcript", {"text": "Hi there"})
+        await publisher.aclose()
+        return participant.packets
+
+    packets = asyncio.run(run())
+    assert len(packets) == 1
+    assert _messages(packets) == [
+        {"type": "user_transcript", "data": {"text": "Hello"}},
+        {"type": "state", "data": {"status": "thinking"}},
+        {"type": "agent_transcript", "data": {"text": "Hi there"}},
+    ]
+
+def test_slow_client_is_bounded():
+    async def run():
+        participant = _Participant(delay=0.05)
+        publisher = RoomPublisher(participant, max_queue=8, coalesce_ms=0).start()
+        dropped = publisher.dropped.value
+        for i in range(100):
+            publisher.publish("user_transcript", {"text": str(i)})
+            assert len(publisher._queue) <= 8
+        await publisher.aclose()
+        return participant.packets, publisher.dropped.value - dropped
+
+    packets, dropped = asyncio.run(run())
+    texts = [m["data"]["text"] for m in _messages(packets)]
+    assert dropped == 100 - len(texts)
+    # Whatever survives arrives in publish order, ending with the newest.
+    assert [int(t) for t in texts] == sorted(int(t) for t in texts) and texts[-1] == "99"
+
+if __name__ == "__main__":
+    test_single_message_keeps_shape()
+    test_batches_respect_packet_size()
+    test_state_flapping_coalesces_in_order()
+    test_slow_client_is_bounded()
+    print("✅ Publisher tests passed.")
@@ -0,0 +1,81 @@
+import time
+
+from query_cache import SemanticQueryCache
+
+def test_exact_hit_ignores_case_and_punctuation():
+    cache = SemanticQueryCache()
+    cache.put("Is the oil change included?", [1.0, 0.0, 0.0], "R1", cache.generation)
+    assert cache.get_exact("is the OIL change included") == "R1"
+    assert cache.stats()["exact_hits"] == 1
+
+def test_semantic_hit_above_threshold_only():
+    cache = SemanticQueryCache(similarity_threshold=0.9)
+    cache.put("what are your hours", [1.0, 0.0, 0.0], "R1", cache.generation)
+    assert cache.get_similar([0.99, 0.05, 0.0]) == "R1"
+    assert cache.get_similar([0.0, 1.0, 0.0]) is None
+    stats = cache.stats()
+    assert stats["semantic_hits"] == 1
+    assert stats["misses"] == 1
+
+def test_exact_misses_count_against_hit_ratio():
+    cache = SemanticQueryCache(similarity_threshold=0.9)
+    cache.put("what are your hours", [1.0, 0.0, 0.0], "R1", cache.generation)
+    assert cache.get_exact("what are your hours") == "R1"
+    # Answered from L2 after missing L1: still one lookup, and a hit.
+    assert cache.get_exact("when are you open") is None
+    assert cache.get_similar([0.99, 0.05, 0.0]) == "R1"
+    # Served by BM25 without ever reaching L2.
+    assert cache.get_exact("is the oil change included") is None
+    stats = cache.stats()
+    assert stats["exact_misses"] == 2
+    assert stats["hit_ratio"] == 2 / 3
+
+def test_lru_eviction_keeps_recently_used():
+    cache = SemanticQueryCache(max_entries=2)
+    cache.put("a", [1.0, 0.0, 0.0], "A", cache.generation)
+    cache.put("b", [0.0, 1.0, 0.0], "B", cache.generation)
+    assert cache.get_exact("a") == "A"
+    cache.put("c", [0.0, 0.0, 1.0], "C", cache.generation)
+
+    assert cache.get_exact("b") is None
+    assert cache.get_exact("a") == "A"
+    assert cache.get_exact("c") == "C"
+    assert cache.stats()["evictions"] == 1
+
+def test_ttl_expiry():
+    cache = SemanticQueryCache(ttl_seconds=0.05)
+    cache.put("a", [1.0, 0.0, 0.0], "A", cache.generation)
+    time.sleep(0.1)
+    assert cache.get_exact("a") is None
+    assert cache.get_similar([1.0, 0.0, 0.0]) is None
+
+def test_generation_change_invalidates():
+    cache = SemanticQueryCache()
+    cache.sync_generation(1)
+    cache.put("a", [1.0, 0.0, 0.0], "A", 1)
+    cache.sync_generation(1)
+    assert cache.get_exact("a") == "A"
+
+    cache.sync_generation(2)
+    assert cache.get_exact("a") is None
+    assert cache.stats()["entries"] == 0
+
+def test_stale_put_from_older_generation_is_dropped():
+    cache = SemanticQueryCache()
+    cache.sync_generation(1)
+    started_at = cache.generation
+
+    # Re-seed lands while the lookup is still in flight.
+    cache.sync_generation(2)
+    cache.put("a", [1.0, 0.0, 0.0], "stale", started_at)
+    assert cache.get_exact("a") is None
+
+if __name__ == "__main__":
+    test_exact_hit_ignores_case_and_punctuation()
+    test_semantic_hit_above_threshold_only()
+    test_exact_misses_count_against_hit_ratio()
+    test_lru_eviction_keeps_recently_used()
+    test_ttl_expiry()
+    test_generation_change_invalidates()
+    test_stale_put_from_older_generation_is_dropped()
+    print("✅ Query cache tests passed.")
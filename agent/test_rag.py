@@ -0,0 +1,159 @@
+import time
+import asyncio
+import tempfile
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from rag import KnowledgeBase
+from query_cache import SemanticQueryCache
+from vector_store import LocalVectorIndex
+from bm25 import BM25Index
+
+logging.basicConfig(level=logging.INFO)
+
+class StubEmbedder:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    def encode(self, query):
+        time.sleep(self.delay)
+        return np.array([1.0, 0.0, 0.0], dtype=np.float32)
+
+class StubIndex:
+    def query(self, vector, top_k=3, include_metadata=True):
+        return {"matches": [{"id": "vec_0", "score": 1.0, "metadata": {"text": "Financing starts at 2.9% APR."}}]}
+
+class StubRuntime:
+    """
+    Offline stand-in for RetrievalRuntime (no model download, no Pinecone).
+    """
+    def __init__(self, delay: float = 0.0):
+        self.embedder = StubEmbedder(delay)
+        self.batcher = None
+        self.lexical = None
+        self.lexical_min_score = 1.2
+        self.lexical_margin = 1.5
+        self.index = StubIndex()
+        self.encode_executor = ThreadPoolExecutor(max_workers=1)
+        self.query_executor = ThreadPoolExecutor(max_workers=1)
+        self.cache = SemanticQueryCache()
+
+    def generation_check_due(self):
+        return False
+
+    def refresh_generation(self):
+        pass
+
+def test_asearch_returns_matches():
+    kb = KnowledgeBase(runtime=StubRuntime())
+    result = asyncio.run(kb.asearch("What are your financing rates?"))
+    assert "2.9%" in result
+
+def test_empty_local_index_is_not_reported_as_missing():
+    runtime = StubRuntime()
+    runtime.index = LocalVectorIndex(tempfile.mkdtemp())
+    kb = KnowledgeBase(runtime=runtime)
+    assert asyncio.run(kb.asearch("anything")) == "No specific policies found."
+
+class ExplodingEmbedder:
+    def encode(self, query):
+        raise AssertionError("keyword fast path must not embed")
+
+def test_keyword_query_skips_embedder():
+    runtime = StubRuntime()
+    runtime.embedder = ExplodingEmbedder()
+    runtime.lexical = BM25Index([("a", "Financing starts at 2.9% APR."), ("b", "The showroom opens at 9 AM.")])
+    kb = KnowledgeBase(runtime=runtime)
+
+    assert "2.9%" in asyncio.run(kb.asearch("What is the APR on financing?"))
+    assert kb.last_path == "lexical"
+
+def test_non_keyword_query_fuses_lexical_and_vector():
+    runtime = StubRuntime()
+    runtime.lexical = BM25Index([("a", "Financing starts at 2.9% APR."), ("b", "The showroom opens at 9 AM.")])
+    kb = KnowledgeBase(runtime=runtime)
+
+    result = asyncio.run(kb.asearch("showroom financing"))
+    assert kb.last_path == "hybrid"
+    assert "2.9%" in result
+
+class CountingBM25(BM25Index):
+    searches = 0
+
+    def search(self, query, top_k=3):
+        self.searches += 1
+        return super().search(query, top_k)
+
+def test_sync_and_async_search_share_one_bm25_pass():
+    runtime = StubRuntime()
+    runtime.lexical = CountingBM25([("a", "Financing starts at 2.9% APR."), ("b", "The showroom opens at 9 AM.")])
+    kb = KnowledgeBase(runtime=runtime)
+
+    assert "2.9%" in kb.search("showroom financing")
+    assert kb.last_path == "hybrid"
+    runtime.cache.invalidate()
+    assert "2.9%" in asyncio.run(kb.asearch("showroom financing"))
+    assert kb.last_path == "hybrid"
+    assert runtime.lexical.searches == 2
+
+def test_asearch_times_out():
+    kb = KnowledgeBase(runtime=StubRuntime(delay=0.5))
+    started = time.perf_counter()
+    result = asyncio.run(kb.asearch("slow question", timeout=0.05))
+    assert result == "Information currently unavailable."
+    assert time.perf_counter() - started < 0.4
+
+def test_asearch_explicit_zero_timeout_is_respected():
+    kb = KnowledgeBase(runtime=StubRuntime(delay=0.2))
+    kb.timeout = 10.0
+    result = asyncio.run(kb.asearch("anything", timeout=0))
+    assert result == "Information currently unavailable."
+
+def test_asearch_does_not_block_loop():
+    kb = KnowledgeBase(runtime=StubRuntime(delay=0.2))
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await kb.asearch("blocking encode")
+        task.cancel()
+        return ticks
+
+    # A blocking encode on the loop would leave the ticker at ~0.
+    assert asyncio.run(scenario()) >= 5
+
+def test_asearch_cancellation_propagates():
+    kb = KnowledgeBase(runtime=StubRuntime(delay=0.3))
+
+    async def scenario():
+        task = asyncio.create_task(kb.asearch("cancel me"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            return True
+        return False
+
+    assert asyncio.run(scenario())
+
+if __name__ == "__main__":
+    test_asearch_returns_matches()
+    test_empty_local_index_is_not_reported_as_missing()
+    test_keyword_query_skips_embedder()
+    test_non_keyword_query_fuses_lexical_and_vector()
+    test_sync_and_async_search_share_one_bm25_pass()
+    test_asearch_times_out()
+    test_asearch_explicit_zero_timeout_is_respected()
+    test_asearch_does_not_block_loop()
+    test_asearch_cancellation_propagates()
+    print("✅ RAG async search tests passed.")
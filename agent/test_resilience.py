@@ -0,0 +1,152 @@
+import os
+import time
+import json
+import asyncio
+
+from bson import ObjectId
+
+import resilience
+from call_recorder import CallRecorder
+from database import DatabaseManager
+from fakes import FakeKnowledgeBase, InMemoryDatabase
+from identity import customer_keys
+from prefetch import LookupPrefetcher
+from profile_cache import ProfileCache
+from resilience import CircuitBreaker, DependencyUnavailable, guarded, tool_budgets
+from session import SessionManager
+from tools import build_function_context
+from tracing import TurnTracer
+
+def test_breaker_opens_and_probes_once():
+    circuit = CircuitBreaker("test-probe", failure_threshold=2, reset_seconds=0.05)
+    circuit.record_failure()
+    assert circuit.allow()
+    circuit.record_failure()
+    assert not circuit.allow()
+    time.sleep(0.06)
+    # Half-open: exactly one probe goes through.
+    assert circuit.allow() and not circuit.allow()
+    circuit.record_failure()
+    assert circuit.state == CircuitBreaker.OPEN
+    time.sleep(0.06)
+    assert circuit.allow()
+    circuit.record_success()
+    assert circuit.state == CircuitBreaker.CLOSED and circuit.allow()
+
+def test_budgets_from_env_spec():
+    budgets = tool_budgets("lookup_customer=300, consult_policy=2500")
+    assert budgets["lookup_customer"] == 300 and budgets["consult_policy"] == 2500
+    assert budgets["check_availability"] == resilience.DEFAULT_BUDGETS_MS["check_availability"]
+
+def test_deadline_and_hedging():
+    calls = []
+
+    async def slow_then_fast():
+        calls.append(time.perf_counter())
+        await asyncio.sleep(1.0 if len(calls) == 1 else 0.01)
+        return len(calls)
+
+    async def run():
+        started = time.perf_counter()
+        hedged = await guarded("test-hedge", slow_then_fast, budget_ms=500, hedge=True, hedge_after_ms=50)
+        hedged_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        try:
+            await guarded("test-deadline", lambda: asyncio.sleep(1.0), budget_ms=50)
+            reason = None
+        except DependencyUnavailable as e:
+            reason = e.reason
+        return hedged, hedged_ms, reason, (time.perf_counter() - started) * 1000
+
+    hedged, hedged_ms, reason, deadline_ms = asyncio.run(run())
+    assert hedged == 2 and hedged_ms < 200
+    assert reason == "timeout" and deadline_ms < 200
+
+def _customer(name: str, phone: str):
+    doc = {"name": name, "phone": phone, "vehicle": "Rolls-Royce Phantom"}
+    doc.update(customer_keys(doc))
+    return doc
+
+def test_tools_degrade_within_budget(tmp_path):
+    async def run():
+        db_manager = DatabaseManager()
+        saved = {k: getattr(db_manager, k) for k in ("db", "profiles")}
+        db_manager.db, db_manager.profiles = InMemoryDatabase(), ProfileCache(ttl_seconds=0)
+        resilience._breakers.clear()
+        os.environ["TOOL_BUDGETS_MS"] = "lookup_customer=100,check_availability=100,consult_policy=100,submit_booking_request=100"
+        try:
+            await db_manager.db.customers.insert_one(_customer("Meredith Grey", "9876543210"))
+            session = SessionManager()
+            outbox = CallRecorder(db_manager.db, write_budget_ms=100, spill_path=str(tmp_path / "spill.jsonl"))
+            fnc_ctx = build_function_context(session, db_manager, FakeKnowledgeBase(latency=2.0), LookupPrefetcher(db_manager, session), TurnTracer("room", path=os.devnull), outbox=outbox)
+            tools = {name: info.callable for name, info in fnc_ctx.ai_functions.items()}
+            # Seen once while the database was healthy...
+            await tools["lookup_customer"](identifier="9876543210")
+            # ...then every round trip stalls for two seconds.
+            db_manager.db.customers.latency = db_manager.db.availability.latency = db_manager.db.pending_requests.latency = 2.0
+
+            started = time.perf_counter()
+            results = {
+                "lookup": json.loads(await tools["lookup_customer"](identifier="98765 43210")),
+                "availability": json.loads(await tools["check_availability"](date="tomorrow")),
+                "policy": await tools["consult_policy"](topic="oil change"),
+                "submit": json.loads(await tools["submit_booking_request"](date="tomorrow", service_type="oil change")),
+            }
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            # The deferred request is on disk; once MongoDB recovers it is replayed under the same id.
+            await asyncio.sleep(0.2)
+            spilled = (tmp_path / "spill.jsonl").exists()
+            db_manager.db.pending_requests.latency = 0.0
+            await outbox.aclose()
+            queued = list(db_manager.db.pending_requests.docs.values())
+            return results, elapsed_ms, session, spilled, queued
+        finally:
+            del os.environ["TOOL_BUDGETS_MS"]
+            resilience._breakers.clear()
+            for key, value in saved.items():
+                setattr(db_manager, key, value)
+
+    results, elapsed_ms, session, spilled, queued = asyncio.run(run())
+    assert results["lookup"]["status"] == "success" and results["lookup"]["data"]["name"] == "Meredith Grey"
+    assert results["availability"]["available"] is None and results["availability"]["degraded"]
+    assert "advisor will confirm" in results["policy"]
+    assert results["submit"]["deferred"] and session.pending_request["reference_id"] == results["submit"]["reference_id"]
+    # Four tools against a dead database and index, each bounded by its budget.
+    assert elapsed_ms < 1000
+    assert spilled
+    assert [str(r["_id"]) for r in queued] == [results["submit"]["reference_id"]]
+    assert queued[0]["status"] == "pending_validation" and isinstance(queued[0]["_id"], ObjectId)
+
+def test_submission_fails_honestly_without_an_outbox():
+    async def run():
+        db_manager = DatabaseManager()
+        saved = {k: getattr(db_manager, k) for k in ("db", "profiles")}
+        db_manager.db, db_manager.profiles = InMemoryDatabase(), ProfileCache()
+        resilience._breakers.clear()
+        os.environ["TOOL_BUDGETS_MS"] = "submit_booking_request=50"
+        try:
+            session = SessionManager()
+            session.set_customer({"name": "Meredith Grey", "phone": "9876543210", "vehicle": "Rolls-Royce Phantom"})
+            fnc_ctx = build_function_context(session, db_manager, FakeKnowledgeBase(), LookupPrefetcher(db_manager, session), TurnTracer("room", path=os.devnull))
+            db_manager.db.pending_requests.latency = 1.0
+            result = json.loads(await fnc_ctx.ai_functions["submit_booking_request"].callable(date="tomorrow", service_type="oil change"))
+            return result, session
+        finally:
+            del os.environ["TOOL_BUDGETS_MS"]
+            resilience._breakers.clear()
+            for key, value in saved.items():
+                setattr(db_manager, key, value)
+
+    result, session = asyncio.run(run())
+    assert not result["success"] and session.pending_request is None
+
+if __name__ == "__main__":
+    test_breaker_opens_and_probes_once()
+    test_budgets_from_env_spec()
+    test_deadline_and_hedging()
+    import tempfile
+    from pathlib import Path
+    with tempfile.TemporaryDirectory() as tmp:
+        test_tools_degrade_within_budget(Path(tmp))
+    test_submission_fails_honestly_without_an_outbox()
+    print("✅ Resilience tests passed.")
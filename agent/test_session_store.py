@@ -0,0 +1,113 @@
+import asyncio
+from datetime import datetime
+
+from dates import DateResolver
+from fakes import FakeRedis
+from session import SessionManager
+from session_store import MemorySessionBackend, RedisSessionBackend, SessionStore, restore, serialize
+
+MEREDITH = {"name": "Meredith Grey", "phone": "9876543210", "vehicle": "Rolls-Royce Phantom"}
+
+def _identified(store: SessionStore, room: str) -> SessionManager:
+    session = SessionManager()
+    session.dates = DateResolver(now=datetime(2025, 3, 5, 23, 50))
+    session.attach_store(store, room)
+    session.set_customer(MEREDITH)
+    session.set_pending_request({"date": "2025-03-06", "time": None, "service": "oil change", "reference_id": "abc"})
+    return session
+
+def test_serialized_session_round_trips():
+    session = SessionManager()
+    session.dates = DateResolver(now=datetime(2025, 3, 5, 23, 50))
+    session.set_customer(MEREDITH)
+    data = serialize(session)
+    assert len(data) < 200
+
+    restored = SessionManager()
+    assert restore(restored, data)
+    assert restored.is_authenticated and restored.customer.vehicle == "Rolls-Royce Phantom"
+    # Re-dispatched just after midnight, "tomorrow" still means the 6th.
+    assert restored.dates.resolve("tomorrow").date == "2025-03-06"
+
+def test_writes_are_batched_behind_the_call():
+    async def run():
+        redis = FakeRedis()
+        store = SessionStore(RedisSessionBackend(redis), ttl_seconds=60, flush_ms=20)
+        for room in ("room-a", "room-b", "room-c"):
+            _identified(store, room)
+        writes_before_flush = redis.round_trips
+        await asyncio.sleep(0.05)
+        return writes_before_flush, redis.round_trips, redis
+
+    before, after, redis = asyncio.run(run())
+    # Six updates across three calls, one pipelined write.
+    assert before == 0 and after == 1
+    assert len(redis._data) == 3
+
+def test_new_worker_rehydrates_the_call():
+    async def run():
+        redis = FakeRedis()
+        old_worker = SessionStore(RedisSessionBackend(redis), flush_ms=0)
+        _identified(old_worker, "room-a")
+        await old_worker.flush()
+
+        new_worker = SessionStore(RedisSessionBackend(redis))
+        session = SessionManager()
+        restored = await new_worker.rehydrate(session, "room-a")
+        fresh = await new_worker.rehydrate(SessionManager(), "room-z")
+        return restored, fresh, session
+
+    restored, fresh, session = asyncio.run(run())
+    assert restored and not fresh
+    assert session.interaction_id == "room-a"
+    assert session.customer.name == "Meredith Grey" and session.pending_request["reference_id"] == "abc"
+
+def test_finished_call_is_forgotten():
+    async def run():
+        store = SessionStore(MemorySessionBackend(), flush_ms=0)
+        session = _identified(store, "sip-room")
+        await store.flush()
+        # The caller hangs up; a tool finishing afterwards changes the session again.
+        session.detach_store()
+        await store.forget("sip-room")
+        session.set_pending_request({"date": "2025-03-07", "time": None, "service": "detailing", "reference_id": "def"})
+        await store.flush()
+        next_caller = SessionManager()
+        return await store.rehydrate(next_caller, "sip-room"), next_caller
+
+    restored, next_caller = asyncio.run(run())
+    assert not restored and not next_caller.is_authenticated
+
+def test_failed_flush_is_retried_and_ttl_expires():
+    async def run():
+        redis = FakeRedis()
+        redis.down = True
+        store = SessionStore(RedisSessionBackend(redis), ttl_seconds=1, flush_ms=10)
+        _identified(store, "room-a")
+        await asyncio.sleep(0.03)
+        redis.down = False
+        await asyncio.sleep(0.05)
+        saved = await redis.get(SessionStore.key("room-a"))
+        redis._data = {k: (0, v) for k, (_, v) in redis._data.items()}
+        expired = await redis.get(SessionStore.key("room-a"))
+        return saved, expired
+
+    saved, expired = asyncio.run(run())
+    assert saved is not None and expired is None
+
+def test_memory_backend_expires():
+    async def run():
+        backend = MemorySessionBackend()
+        await backend.set_many({"k": b"v"}, ttl_seconds=0)
+        return await backend.get("k")
+
+    assert asyncio.run(run()) is None
+
+if __name__ == "__main__":
+    test_serialized_session_round_trips()
+    test_writes_are_batched_behind_the_call()
+    test_new_worker_rehydrates_the_call()
+    test_finished_call_is_forgotten()
+    test_failed_flush_is_retried_and_ttl_expires()
+    test_memory_backend_expires()
+    print("✅ Session store tests passed.")
@@ -0,0 +1,80 @@
+import json
+import time
+import asyncio
+import urllib.request
+
+from livekit.agents import llm
+from livekit.agents.metrics import PipelineLLMMetrics
+
+from tracing import TurnTracer, serve_metrics, traced
+
+@traced("db.test_lookup")
+async def _lookup(identifier: str):
+    await asyncio.sleep(0.01)
+    return {"name": "Meredith Grey"}
+
+def _llm_metrics(ttft: float, duration: float):
+    return PipelineLLMMetrics(request_id="r1", timestamp=time.time(), ttft=ttft, duration=duration, label="openai", cancelled=False,
+                              completion_tokens=12, prompt_tokens=900, total_tokens=912, tokens_per_second=40.0, error=None, sequence_id="s1")
+
+def test_tools_keep_their_schema():
+    tracer = TurnTracer("room")
+    fnc_ctx = llm.FunctionContext()
+
+    @fnc_ctx.ai_callable()
+    @tracer.tool
+    async def check_availability(date: str):
+        """Check if a date is open."""
+        return date
+
+    info = fnc_ctx.ai_functions["check_availability"]
+    assert info.description == "Check if a date is open." and list(info.arguments) == ["date"]
+
+def test_turn_timeline_is_written(tmp_path):
+    path = tmp_path / "turns.jsonl"
+    tracer = TurnTracer("room-1", path=str(path))
+
+    @tracer.tool
+    async def lookup_customer(identifier: str):
+        return await _lookup(identifier)
+
+    async def turn():
+        tracer.begin_turn()
+        tracer.mark("stt_final")
+        tracer.on_metrics(_llm_metrics(0.25, 0.4))
+        await lookup_customer("9876543210")
+        tracer.mark("playout_start", once=True)
+        tracer.mark("playout_start", once=True)
+        tracer.end_turn()
+        await asyncio.sleep(0.05)
+
+    asyncio.run(turn())
+    record = json.loads(path.read_text().strip())
+    assert record["room"] == "room-1" and record["turn"] == 1
+    names = [c["name"] for c in record["children"]]
+    assert names == ["stt_final", "llm", "tool.lookup_customer", "playout_start"]
+    tool = record["children"][2]
+    assert tool["children"][0]["name"] == "db.test_lookup" and tool["children"][0]["duration_ms"] >= 10
+    assert record["children"][1]["ttft_ms"] == 250.0
+
+def test_untraced_calls_only_record_latency():
+    tracer = TurnTracer("room")
+    assert asyncio.run(_lookup("x")) == {"name": "Meredith Grey"}
+    assert tracer.turn is None
+
+def test_metrics_endpoint_serves_percentiles():
+    server = serve_metrics(port=18931)
+    try:
+        asyncio.run(_lookup("x"))
+        body = json.loads(urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics").read())
+        assert body["span_db.test_lookup_ms"]["p95"] is not None
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_tools_keep_their_schema()
+    test_turn_timeline_is_written(pathlib.Path(tempfile.mkdtemp()))
+    test_untraced_calls_only_record_latency()
+    test_metrics_endpoint_serves_percentiles()
+    print("✅ Tracing tests passed.")
@@ -0,0 +1,138 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from pymongo.errors import AutoReconnect
+
+from database import DatabaseManager
+from fakes import InMemoryDatabase
+from validation_worker import CLAIMED, MAX_ATTEMPTS, PENDING, ValidationWorker, booking_from_request, claimable
+
+REQUEST = {
+    "_id": "req-1",
+    "name": "Meredith Grey",
+    "phone": "9876543210",
+    "vehicle": "Rolls-Royce Phantom",
+    "requested_date": "2025-03-06",
+    "requested_slot": "10:00",
+    "requested_service": "oil change"
+}
+
+def test_booking_keeps_phone_date_idempotency_key():
+    booking = booking_from_request(REQUEST)
+    assert booking["_id"] == "9876543210_2025-03-06"
+    assert booking["date"] == "2025-03-06" and booking["slot"] == "10:00"
+    # Lets a retried attempt recognise its own earlier write.
+    assert booking["request_id"] == "req-1"
+
+def test_claim_filter_reclaims_only_expired_leases():
+    now = datetime(2025, 3, 5, 12, 0)
+    pending, expired = claimable(now)["$or"]
+    assert pending == {"status": PENDING}
+    assert expired["status"] == CLAIMED
+    assert expired["lease_until"] == {"$lt": now}
+    assert expired["attempts"] == {"$lt": MAX_ATTEMPTS}
+
+CALLERS = [("Meredith Grey", "9876543210"), ("Derek Shepherd", "9876543211"), ("Mark Sloan", "9876543212")]
+
+async def _queue(capacity: int = 2, callers=CALLERS):
+    """
+    A worker on a fresh in-memory database with one request per caller for 2025-03-06.
+    Returns (worker, db_manager, saved db) — the caller restores db_manager.db.
+    """
+    db_manager = DatabaseManager()
+    saved = db_manager.db
+    db_manager.db = InMemoryDatabase()
+    await db_manager.set_capacity("2025-03-06", capacity)
+    for i, (name, phone) in enumerate(callers):
+        await db_manager.queue_booking_request({"_id": f"req-{i}", "name": name, "phone": phone, "vehicle": "Audi Q5",
+                                                "requested_date": "2025-03-06", "requested_service": "oil change"})
+    return ValidationWorker(db_manager, batch_size=10), db_manager, saved
+
+async def _reserved(db_manager) -> int:
+    return (await db_manager.db.availability.find_one({"_id": "2025-03-06"}))["reserved"]
+
+def test_claim_reserve_insert():
+    async def run():
+        worker, db_manager, saved = await _queue()
+        try:
+            batch = await worker.claim()
+            claimed = [(r["status"], r["attempts"]) for r in batch]
+            outcomes = await worker.process(batch)
+            requests = {r["_id"]: r async for r in db_manager.db.pending_requests.find()}
+            return claimed, outcomes, requests, len(db_manager.db.bookings.docs), await _reserved(db_manager), await worker.claim()
+        finally:
+            db_manager.db = saved
+
+    claimed, outcomes, requests, bookings, reserved, next_batch = asyncio.run(run())
+    assert claimed == [(CLAIMED, 1)] * 3
+    # First come, first served: the third request finds the day full.
+    assert outcomes == {"req-0": ("confirmed", None), "req-1": ("confirmed", None), "req-2": ("rejected", "FULLY_BOOKED")}
+    assert requests["req-0"]["status"] == "confirmed" and "lease_until" not in requests["req-0"]
+    assert bookings == 2 and reserved == 2
+    assert next_batch == []
+
+def test_expired_lease_is_reclaimed_and_fenced():
+    async def run():
+        stuck, db_manager, saved = await _queue()
+        try:
+            stale = await stuck.claim()
+            # The first consumer stalls past its lease; another one takes the batch over.
+            await db_manager.db.pending_requests.update_many({}, {"$set": {"lease_until": datetime.utcnow() - timedelta(seconds=1)}})
+            rescuer = ValidationWorker(db_manager, batch_size=10)
+            fresh = await rescuer.claim()
+            await rescuer.process(fresh)
+            # The stalled consumer wakes up: its writes are fenced off by the claim token.
+            await stuck.process(stale)
+            requests = {r["_id"]: r async for r in db_manager.db.pending_requests.find()}
+            return fresh, requests, len(db_manager.db.bookings.docs), await _reserved(db_manager)
+        finally:
+            db_manager.db = saved
+
+    fresh, requests, bookings, reserved = asyncio.run(run())
+    assert [r["attempts"] for r in fresh] == [2, 2, 2]
+    assert all(r["claim_token"] == fresh[0]["claim_token"] for r in requests.values())
+    assert requests["req-2"]["reason"] == "FULLY_BOOKED"
+    assert bookings == 2 and reserved == 2
+
+def test_failed_insert_releases_capacity():
+    async def run():
+        worker, db_manager, saved = await _queue(callers=CALLERS[:2])
+        bookings = db_manager.db.bookings
+        insert_many = bookings.insert_many
+
+        async def flaky_insert_many(docs, ordered=True):
+            # The first booking lands, then the connection drops.
+            await insert_many(docs[:1], ordered=ordered)
+            raise AutoReconnect("connection reset")
+
+        try:
+            bookings.insert_many = flaky_insert_many
+            batch = await worker.claim()
+            try:
+                await worker.process(batch)
+                failed = False
+            except AutoReconnect:
+                failed = True
+            after_failure = await _reserved(db_manager)
+
+            bookings.insert_many = insert_many
+            await db_manager.db.pending_requests.update_many({}, {"$set": {"lease_until": datetime.utcnow() - timedelta(seconds=1)}})
+            outcomes = await worker.process(await worker.claim())
+            return failed, after_failure, outcomes, await _reserved(db_manager)
+        finally:
+            db_manager.db = saved
+
+    failed, after_failure, outcomes, reserved = asyncio.run(run())
+    assert failed
+    # Only the booking that was written keeps its unit.
+    assert after_failure == 1
+    assert outcomes == {"req-0": ("confirmed", None), "req-1": ("confirmed", None)}
+    assert reserved == 2
+
+if __name__ == "__main__":
+    test_booking_keeps_phone_date_idempotency_key()
+    test_claim_filter_reclaims_only_expired_leases()
+    test_claim_reserve_insert()
+    test_expired_lease_is_reclaimed_and_fenced()
+    test_failed_insert_releases_capacity()
+    print("✅ Validation worker tests passed.")
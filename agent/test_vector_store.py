@@ -0,0 +1,66 @@
+import tempfile
+
+import numpy as np
+
+from vector_store import LocalVectorIndex
+
+def seeded_index():
+    index = LocalVectorIndex(tempfile.mkdtemp())
+    index.upsert(vectors=[
+        {"id": "a", "values": [1.0, 0.0, 0.0], "metadata": {"text": "A"}},
+        {"id": "b", "values": [0.0, 2.0, 0.0], "metadata": {"text": "B"}},
+        {"id": "c", "values": [1.0, 1.0, 0.0], "metadata": {"text": "C"}},
+    ])
+    return index
+
+def test_empty_index_returns_no_matches():
+    index = LocalVectorIndex(tempfile.mkdtemp())
+    assert len(index) == 0
+    assert index.query([1.0, 0.0, 0.0]) == {"matches": []}
+    assert index.generation() is None
+
+def test_rows_are_normalized_float32():
+    index = seeded_index()
+    assert index.matrix.dtype == np.float32
+    assert np.allclose(np.linalg.norm(index.matrix, axis=1), 1.0)
+
+def test_top_k_ordering():
+    index = seeded_index()
+    matches = index.query([1.0, 0.2, 0.0], top_k=2)["matches"]
+    assert [m["id"] for m in matches] == ["a", "c"]
+    assert matches[0]["score"] >= matches[1]["score"]
+    assert matches[0]["metadata"]["text"] == "A"
+
+def test_top_k_larger_than_index():
+    index = seeded_index()
+    assert len(index.query([0.0, 1.0, 0.0], top_k=10)["matches"]) == 3
+
+def test_upsert_overwrites_and_delete_removes():
+    index = seeded_index()
+    index.upsert(vectors=[{"id": "a", "values": [0.0, 0.0, 1.0], "metadata": {"text": "A2"}}])
+    assert len(index) == 3
+    assert index.query([0.0, 0.0, 1.0], top_k=1)["matches"][0]["metadata"]["text"] == "A2"
+
+    index.delete(ids=["a", "b"])
+    assert index.ids == ["c"]
+
+def test_generation_is_monotonic_and_seen_by_other_readers():
+    index = seeded_index()
+    reader = LocalVectorIndex(index.path)
+    first = reader.generation()
+
+    index.delete(ids=["c"])
+    index.delete(ids=["b"])
+
+    # Two writes inside the same mtime tick still produce distinct generations.
+    assert reader.generation() == first + 2
+    assert reader.ids == ["a"]
+
+if __name__ == "__main__":
+    test_empty_index_returns_no_matches()
+    test_rows_are_normalized_float32()
+    test_top_k_ordering()
+    test_top_k_larger_than_index()
+    test_upsert_overwrites_and_delete_removes()
+    test_generation_is_monotonic_and_seen_by_other_readers()
+    print("✅ Local vector index tests passed.")
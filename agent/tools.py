@@ -0,0 +1,168 @@
+import json
+import logging
+
+from bson import ObjectId
+from livekit.agents import llm
+
+from database import as_pending_request
+from resilience import DependencyUnavailable, guarded, tool_budgets
+
+logger = logging.getLogger("auralis-tools")
+
+def build_function_context(session, db_manager, knowledge_base, prefetcher, tracer, outbox=None) -> llm.FunctionContext:
+    """
+    The tools the LLM can call for one session. Kept out of `entrypoint` so
+    tests and load_test.py can drive them without a LiveKit room.
+
+    Every tool runs its database / RAG calls under a deadline and a circuit
+    breaker (resilience.py) and answers in a degraded mode instead of
+    leaving the caller in silence. `outbox` (a CallRecorder) durably takes
+    booking requests that miss their budget; without one they fail honestly.
+    """
+    budgets = tool_budgets()
+    fnc_ctx = llm.FunctionContext()
+
+    @fnc_ctx.ai_callable()
+    @tracer.tool
+    async def lookup_customer(identifier: str):
+        """
+        Search for a customer profile by Name or Phone. 
+        RETURNS: JSON with 'name', 'vehicle', 'phone'.
+        """ 
+        logger.info(f"🔎 LOOKUP REQUEST: {identifier}")
+        clean_id = session.normalize_phone(identifier)
+        query = clean_id if clean_id else identifier 
+
+        async def find():
+            # Usually already fetched while the caller was still speaking.
+            found, user_data = await prefetcher.take(query)
+            return user_data if found else await db_manager.get_customer_by_lookup(query)
+
+        degraded = False
+        try:
+            user_data = await guarded("mongo", find, budgets["lookup_customer"], hedge=True)
+        except DependencyUnavailable:
+            # Last known profile, even past its TTL; then the in-memory fuzzy index below.
+            degraded = True
+            user_data = db_manager.cached_customer(query)
+        
+        if user_data:
+            session.set_customer(user_data)
+            return json.dumps({
+                "status": "success", 
+                "data": {
+                    "name": user_data['name'], 
+                    "vehicle": user_data['vehicle'],
+                    "phone": user_data.get('phone', 'Unknown')
+                }
+            })
+
+        # STT slips ("Gray" for "Grey"): one fuzzy pass instead of a spelling round trip.
+        candidates = await db_manager.match_customers(identifier)
+        if candidates and candidates[0]["confidence"] >= 0.85 and (len(candidates) == 1 or candidates[0]["confidence"] - candidates[1]["confidence"] >= 0.1):
+            best = candidates[0]["customer"]
+            # Not authenticated until the caller confirms and the exact name is looked up.
+            return json.dumps({
+                "status": "confirm",
+                "message": f"Closest match. Ask the caller to confirm the name '{best['name']}', then call lookup_customer again with that exact name.",
+                "candidate": {"name": best['name'], "vehicle": best['vehicle']}
+            })
+        if candidates:
+            return json.dumps({
+                "status": "candidates",
+                "message": "No exact match. Ask which of these is the caller, then call lookup_customer again with that exact name.",
+                "candidates": [{"name": c["customer"]["name"], "vehicle": c["customer"]["vehicle"], "confidence": c["confidence"]} for c in candidates]
+            })
+        if degraded:
+            return json.dumps({"status": "degraded", "message": "Customer records are temporarily unavailable. Apologize briefly and try the lookup again in a moment."})
+        return json.dumps({"status": "not_found", "message": "User not found. Ask for spelling or phone number."})
+
+    @fnc_ctx.ai_callable()
+    @tracer.tool
+    async def check_availability(date: str):
+        """
+        Check if a date is POTENTIALLY available. 
+        Note: Availability is not guaranteed until validated by the manager.
+        """
+        resolved = session.dates.resolve(date)
+        if resolved is None:
+            return json.dumps({"status": "error", "message": f"Could not understand the date '{date}'. Ask for a specific day."})
+        try:
+            is_open = await guarded("mongo", lambda: db_manager.check_availability(resolved.date), budgets["check_availability"], hedge=True)
+        except DependencyUnavailable:
+            return json.dumps({"available": None, "date": resolved.date, "time": resolved.slot, "degraded": True,
+                               "message": "Availability can't be checked right now. Offer to submit the request; the manager confirms it."})
+        return json.dumps({"available": is_open, "date": resolved.date, "time": resolved.slot})
+    
+    @fnc_ctx.ai_callable()
+    @tracer.tool
+    async def find_open_dates(count: int = 3, weekday: str = "", service_type: str = ""):
+        """
+        List the next open dates in ONE call, e.g. when the requested date is full.
+        Optional: weekday ('tuesday') and service_type.
+        """
+        try:
+            dates = await guarded("mongo", lambda: db_manager.find_open_dates(limit=max(1, min(count, 7)), start=session.dates.today, weekday=weekday or None, service_type=service_type or None), budgets["find_open_dates"], hedge=True)
+        except DependencyUnavailable:
+            return json.dumps({"open_dates": [], "degraded": True, "message": "The calendar can't be read right now. Ask for a preferred date and submit it for approval."})
+        return json.dumps({"open_dates": dates})
+
+    @fnc_ctx.ai_callable()
+    @tracer.tool
+    async def consult_policy(topic: str):
+        """Search Knowledge Base for policies (e.g., 'oil change included?')."""
+        logger.info(f"📚 RAG LOOKUP: {topic}")
+        try:
+            return await guarded("rag", lambda: knowledge_base.asearch(topic, strict=True), budgets["consult_policy"])
+        except DependencyUnavailable:
+            return "The policy manuals can't be reached right now. Say a service advisor will confirm this when the request is reviewed."
+
+    @fnc_ctx.ai_callable()
+    @tracer.tool
+    async def submit_booking_request(date: str, service_type: str):
+        """
+        Submit a service request to the validation queue.
+        DO NOT say 'Confirmed'. Say 'Submitted for approval'.
+        """
+        if not session.is_authenticated:
+            return json.dumps({"status": "error", "message": "Authentication required. Identify customer first."})
+        
+        resolved = session.dates.resolve(date)
+        if resolved is None:
+            return json.dumps({"status": "error", "message": f"Could not understand the date '{date}'. Ask for a specific day."})
+
+        request_payload = {
+            "name": session.customer.name,
+            "phone": session.customer.phone,
+            "vehicle": session.customer.vehicle,
+            "requested_date": resolved.date,
+            "requested_slot": resolved.slot,
+            "requested_date_text": date,
+            "requested_service": service_type,
+            # Assigned here so a retry of a write that did land is not queued twice.
+            "_id": ObjectId()
+        }
+
+        async def submit():
+            result = await db_manager.queue_booking_request(dict(request_payload))
+            if result.get("error") == "QUEUE_FAILURE":
+                raise RuntimeError("queue write failed")
+            return result
+
+        try:
+            result = await guarded("mongo", submit, budgets["submit_booking_request"])
+        except DependencyUnavailable:
+            if outbox is None:
+                result = {"success": False, "error": "QUEUE_UNAVAILABLE",
+                          "message": "The request could not be submitted right now. Apologize and offer to try again in a moment."}
+            else:
+                # Spilled to disk until MongoDB takes it; the same _id makes a late duplicate a no-op.
+                outbox.persist("pending_requests", as_pending_request(dict(request_payload)))
+                logger.warning(f"📨 Request {request_payload['_id']} deferred to the outbox")
+                result = {"success": True, "deferred": True, "reference_id": str(request_payload["_id"]),
+                          "message": "Say you'll submit the request and it will be confirmed once recorded."}
+        if result.get("success"):
+            session.set_pending_request({"date": resolved.date, "time": resolved.slot, "service": service_type, "reference_id": result.get("reference_id")})
+        return json.dumps(result)
+
+    return fnc_ctx
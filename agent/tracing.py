@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+import functools
+import contextvars
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import metrics
+
+logger = logging.getLogger("auralis-trace")
+
+TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "traces", "turns.jsonl"))
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+# Job processes on one worker each try the next port up if theirs is taken.
+METRICS_PORT_RANGE = 16
+
+# The span a tool/db/rag call runs under, so nested calls land under it.
+_current_span = contextvars.ContextVar("auralis_span", default=None)
+
+class Span:
+    def __init__(self, name: str, start: float, parent=None, **attrs):
+        self.name = name
+        self.start = start
+        self.end = None
+        self.attrs = attrs
+        self.children = []
+        if parent is not None:
+            parent.children.append(self)
+
+    @property
+    def duration_ms(self):
+        return None if self.end is None else (self.end - self.start) * 1000
+
+    def to_dict(self, origin: float) -> dict:
+        out = {"name": self.name, "start_ms": round((self.start - origin) * 1000, 1)}
+        if self.end is not None:
+            out["duration_ms"] = round(self.duration_ms, 1)
+        out.update(self.attrs)
+        if self.children:
+            out["children"] = [c.to_dict(origin) for c in self.children]
+        return out
+
+def traced(name: str):
+    """
+    Times an async call into `span_<name>_ms` and, when it runs inside a
+    traced tool, records it as a child span of that tool.
+    """
+    histogram = metrics.histogram(f"span_{name}_ms")
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            parent = _current_span.get()
+            span = Span(name, time.time(), parent)
+            token = _current_span.set(span)
+            try:
+                return await fn(*args, **kwargs)
+            except BaseException as e:
+                span.attrs["error"] = type(e).__name__
+                raise
+            finally:
+                span.end = time.time()
+                _current_span.reset(token)
+                histogram.observe(span.duration_ms)
+        return wrapper
+    return decorate
+
+class TurnTracer:
+    """
+    Builds one span tree per user turn from VoicePipelineAgent events and
+    the pipeline's own metrics, and appends it to a JSONL timeline:
+    VAD end-of-speech (t=0) -> end-of-utterance / STT final -> LLM TTFT ->
+    tools (with their db/rag calls) -> TTS first audio -> playout start.
+    """
+    def __init__(self, room: str, path: str = TRACE_LOG_PATH, on_turn=None):
+        self.room = room
+        self.path = path
+        # Also handed each finished turn record (e.g. CallLog.turn).
+        self.on_turn = on_turn
+        self.turn = None
+        self.turn_count = 0
+        self.stage_ms = {stage: metrics.histogram(f"turn_{stage}_ms") for stage in ("eou", "stt_final", "llm_ttft", "tts_ttfb", "playout_start", "total")}
+
+    def attach(self, agent):
+        agent.on("user_stopped_speaking", lambda *_: self.begin_turn())
+        agent.on("user_speech_committed", lambda *_: self.mark("stt_final"))
+        agent.on("agent_started_speaking", lambda *_: self.mark("playout_start", once=True))
+        agent.on("agent_speech_committed", lambda *_: self.end_turn())
+        agent.on("agent_speech_interrupted", lambda *_: self.end_turn(interrupted=True))
+        agent.on("metrics_collected", self.on_metrics)
+        return self
+
+    def begin_turn(self):
+        if self.turn is not None:
+            # The user spoke again before a reply was committed.
+            self.end_turn(superseded=True)
+        self.turn_count += 1
+        self.turn = Span("turn", time.time(), turn=self.turn_count)
+
+    def mark(self, name: str, once: bool = False, **attrs):
+        turn = self.turn
+        if turn is None or (once and any(c.name == name for c in turn.children)):
+            return
+        span = Span(name, time.time(), turn, **attrs)
+        span.end = span.start
+        self._observe(name, span.start - turn.start)
+
+    def on_metrics(self, m):
+        # Imported here so database.py / the validation worker can use `traced` without LiveKit.
+        from livekit.agents import metrics as lk_metrics
+        turn = self.turn
+        if turn is None:
+            return
+        if isinstance(m, lk_metrics.PipelineEOUMetrics):
+            span = Span("eou", m.timestamp - m.end_of_utterance_delay, turn, transcription_delay_ms=round(m.transcription_delay * 1000, 1))
+            span.end = m.timestamp
+            self._observe("eou", m.timestamp - turn.start)
+        elif isinstance(m, lk_metrics.PipelineLLMMetrics):
+            span = Span("llm", m.timestamp - m.duration, turn, ttft_ms=round(m.ttft * 1000, 1), prompt_tokens=m.prompt_tokens, completion_tokens=m.completion_tokens)
+            span.end = m.timestamp
+            if m.ttft > 0:
+                self._observe("llm_ttft", m.ttft)
+        elif isinstance(m, lk_metrics.PipelineTTSMetrics):
+            span = Span("tts", m.timestamp - m.duration, turn, ttfb_ms=round(m.ttfb * 1000, 1))
+            span.end = m.timestamp
+            if m.ttfb > 0:
+                self._observe("tts_ttfb", m.ttfb)
+
+    def tool(self, fn):
+        """
+        Wraps an ai_callable so it becomes a span of the current turn and any
+        `traced` db/rag call it makes nests under it.
+        """
+        histogram = metrics.histogram(f"tool_{fn.__name__}_ms")
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            span = Span(f"tool.{fn.__name__}", time.time(), self.turn)
+            token = _current_span.set(span)
+            try:
+                return await fn(*args, **kwargs)
+            except BaseException as e:
+                span.attrs["error"] = type(e).__name__
+                raise
+            finally:
+                span.end = time.time()
+                _current_span.reset(token)
+                histogram.observe(span.duration_ms)
+        return wrapper
+
+    def end_turn(self, interrupted: bool = False, superseded: bool = False):
+        turn, self.turn = self.turn, None
+        if turn is None:
+            return
+        turn.end = time.time()
+        if interrupted:
+            turn.attrs["interrupted"] = True
+        if superseded:
+            turn.attrs["superseded"] = True
+        self._observe("total", turn.end - turn.start)
+        record = {"room": self.room, "started_at": datetime.fromtimestamp(turn.start, timezone.utc).isoformat(), **turn.to_dict(turn.start)}
+        record.pop("start_ms")
+        if self.on_turn is not None:
+            self.on_turn(record)
+        try:
+            asyncio.get_running_loop().run_in_executor(None, self._write, json.dumps(record))
+        except RuntimeError:
+            self._write(json.dumps(record))
+
+    def _observe(self, stage: str, seconds: float):
+        if stage in self.stage_ms:
+            self.stage_ms[stage].observe(seconds * 1000)
+
+    def _write(self, line: str):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            logger.warning(f"Could not write turn trace: {e}")
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") not in ("", "/metrics"):
+            self.send_error(404)
+            return
+        body = json.dumps(metrics.snapshot()).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def serve_metrics(port: int = METRICS_PORT, host: str = "127.0.0.1"):
+    """
+    Serves `metrics.snapshot()` (counts, p50/p95/p99, buckets) as JSON on
+    GET /metrics from a daemon thread. Returns the server, or None when
+    disabled (port 0) or no port in range was free.
+    """
+    if not port:
+        return None
+    for candidate in range(port, port + METRICS_PORT_RANGE):
+        try:
+            server = ThreadingHTTPServer((host, candidate), _MetricsHandler)
+        except OSError:
+            continue
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        logger.info(f"📈 Metrics endpoint on http://{host}:{candidate}/metrics")
+        return server
+    logger.warning(f"No free metrics port in {port}-{port + METRICS_PORT_RANGE - 1}")
+    return None
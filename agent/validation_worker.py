@@ -0,0 +1,291 @@
+"""
+Consumes the `pending_requests` queue written by `queue_booking_request`.
+
+Each consumer claims a batch atomically (status + lease + claim token), checks
+the requests against the capacity calendar in FIFO order, bulk-inserts the
+confirmed `bookings` under the existing `phone_date` idempotency key and
+records the outcome on every request. Leases that expire (a crashed or stuck
+worker) are reclaimed by the next claim, up to VALIDATION_MAX_ATTEMPTS.
+
+    python validation_worker.py --concurrency 4 --batch-size 50
+"""
+import os
+import time
+import uuid
+import asyncio
+import logging
+import argparse
+from collections import defaultdict
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+load_dotenv()
+
+import metrics
+from database import DatabaseManager, is_iso_date
+
+logger = logging.getLogger("auralis-validation")
+
+PENDING = "pending_validation"
+CLAIMED = "validating"
+LEASE_SECONDS = float(os.getenv("VALIDATION_LEASE_SECONDS", "60"))
+MAX_ATTEMPTS = int(os.getenv("VALIDATION_MAX_ATTEMPTS", "5"))
+LAG_MS_BUCKETS = (100, 500, 1000, 5000, 15000, 60000, 300000, 900000, 3600000)
+
+def claimable(now: datetime) -> dict:
+    # Fresh requests, plus claimed ones whose worker let the lease run out.
+    return {
+        "$or": [
+            {"status": PENDING},
+            {"status": CLAIMED, "lease_until": {"$lt": now}, "attempts": {"$lt": MAX_ATTEMPTS}}
+        ]
+    }
+
+def booking_from_request(request: dict) -> dict:
+    """
+    Same document (and `phone_date` _id) that DatabaseManager.create_booking writes.
+    """
+    return {
+        "_id": f"{request['phone']}_{request['requested_date']}",
+        "name": request.get("name"),
+        "phone": request["phone"],
+        "vehicle": request.get("vehicle"),
+        "date": request["requested_date"],
+        "slot": request.get("requested_slot"),
+        "service": request.get("requested_service"),
+        "request_id": request["_id"],
+        "created_at": datetime.utcnow()
+    }
+
+class ValidationWorker:
+    def __init__(self, db_manager: DatabaseManager = None, batch_size: int = 50, idle_seconds: float = 2.0):
+        self.db_manager = db_manager or DatabaseManager()
+        self.db = self.db_manager.db
+        self.batch_size = batch_size
+        self.idle_seconds = idle_seconds
+        self._stopping = asyncio.Event()
+
+        self.batch_ms = metrics.histogram("validation_batch_ms")
+        self.lag_ms = metrics.histogram("validation_lag_ms", buckets=LAG_MS_BUCKETS)
+        self.claimed = metrics.counter("validation_claimed")
+        self.reclaimed = metrics.counter("validation_reclaimed")
+        self.backlog = metrics.gauge("validation_backlog")
+
+    def stop(self):
+        self._stopping.set()
+
+    async def claim(self):
+        """
+        Claims up to batch_size requests for this consumer. The update re-checks
+        the claimable condition per document, so a request is only ever won by
+        one claim token even when several consumers race for the same ids.
+        """
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        ids = [doc["_id"] async for doc in self.db.pending_requests.find(claimable(now), {"_id": 1}).sort("submission_timestamp", 1).limit(self.batch_size)]
+        if not ids:
+            return []
+
+        await self.db.pending_requests.update_many(
+            {"_id": {"$in": ids}, **claimable(now)},
+            {"$set": {"status": CLAIMED, "claim_token": token, "lease_until": now + timedelta(seconds=LEASE_SECONDS)}, "$inc": {"attempts": 1}}
+        )
+        batch = await self.db.pending_requests.find({"claim_token": token}).sort("submission_timestamp", 1).to_list(length=self.batch_size)
+        self.claimed.inc(len(batch))
+        self.reclaimed.inc(sum(1 for r in batch if r.get("attempts", 1) > 1))
+        return batch
+
+    async def _reserve(self, requests: list):
+        """
+        Grants capacity per date in FIFO order. Returns (granted, full).
+        """
+        granted, full = [], []
+        by_date = defaultdict(list)
+        for request in requests:
+            by_date[request["requested_date"]].append(request)
+
+        try:
+            for date, group in by_date.items():
+                # Common case: the whole group fits in one conditional increment.
+                if await self.db_manager.reserve_capacity(date, units=len(group)):
+                    granted.extend(group)
+                    continue
+                for i, request in enumerate(group):
+                    if not await self.db_manager.reserve_capacity(date):
+                        full.extend(group[i:])
+                        break
+                    granted.append(request)
+        except Exception:
+            # The retry reserves again: hand back what this attempt already took.
+            await self._release(granted)
+            raise
+        return granted, full
+
+    async def _release(self, requests: list):
+        for request in requests:
+            try:
+                await self.db_manager.release_capacity(request["requested_date"])
+            except Exception as e:
+                logger.error(f"❌ Could not release capacity for {request['_id']} (rebuild_capacity repairs it): {e}")
+
+    async def _landed(self, requests: list) -> set:
+        """
+        Ids of the requests whose booking an earlier attempt already wrote.
+        """
+        if not requests:
+            return set()
+        requests_by_booking = {booking_from_request(r)["_id"]: r["_id"] for r in requests}
+        return {requests_by_booking[doc["_id"]] async for doc in self.db.bookings.find({"_id": {"$in": list(requests_by_booking)}}, {"request_id": 1})
+                if doc.get("request_id") == requests_by_booking[doc["_id"]]}
+
+    async def _release_unwritten(self, granted: list):
+        """
+        After an insert with an unknown outcome (network error, timeout): keeps
+        the reservations of bookings that landed and releases the rest.
+        """
+        try:
+            landed = await self._landed(granted)
+        except Exception as e:
+            logger.error(f"❌ Can't tell which of {len(granted)} bookings were written; reservations kept until rebuild_capacity: {e}")
+            return
+        await self._release([r for r in granted if r["_id"] not in landed])
+
+    async def _insert_bookings(self, granted: list):
+        """
+        Bulk insert; returns the set of request ids whose booking already existed.
+        Every reservation that did not produce a new booking is released.
+        """
+        if not granted:
+            return set()
+        try:
+            await self.db.bookings.insert_many([booking_from_request(r) for r in granted], ordered=False)
+            return set()
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+        except Exception:
+            # Left claimed for a retry, which reserves again.
+            await self._release_unwritten(granted)
+            raise
+
+        rejected = [granted[err["index"]] for err in errors]
+        await self._release(rejected)
+        if any(err.get("code") != 11000 for err in errors):
+            # Left claimed: the lease expires and another attempt picks the batch up.
+            raise RuntimeError(f"{len(rejected)} booking writes failed")
+
+        # A booking written by an earlier attempt of this same request is a success, not a duplicate.
+        booking_ids = {booking_from_request(r)["_id"]: r["_id"] for r in rejected}
+        written_by = {doc["_id"]: doc.get("request_id") async for doc in self.db.bookings.find({"_id": {"$in": list(booking_ids)}}, {"request_id": 1})}
+        return {request_id for booking_id, request_id in booking_ids.items() if written_by.get(booking_id) != request_id}
+
+    async def process(self, batch: list):
+        started = time.perf_counter()
+        valid = [r for r in batch if is_iso_date(r.get("requested_date")) and r.get("phone")]
+        valid_ids = {r["_id"] for r in valid}
+        outcomes = {r["_id"]: ("rejected", "INVALID_REQUEST") for r in batch if r["_id"] not in valid_ids}
+
+        # A retried request whose booking landed last time already holds its unit.
+        landed = await self._landed([r for r in valid if r.get("attempts", 1) > 1])
+        for request_id in landed:
+            outcomes[request_id] = ("confirmed", None)
+
+        granted, full = await self._reserve([r for r in valid if r["_id"] not in landed])
+        for request in full:
+            outcomes[request["_id"]] = ("rejected", "FULLY_BOOKED")
+
+        duplicates = await self._insert_bookings(granted)
+        for request in granted:
+            outcomes[request["_id"]] = ("rejected", "BOOKING_EXISTS") if request["_id"] in duplicates else ("confirmed", None)
+
+        now = datetime.utcnow()
+        # Fenced by the claim token: a request reclaimed after our lease expired is not overwritten.
+        await self.db.pending_requests.bulk_write([
+            UpdateOne(
+                {"_id": r["_id"], "claim_token": r["claim_token"]},
+                {"$set": {"status": outcomes[r["_id"]][0], "reason": outcomes[r["_id"]][1], "validated_at": now}, "$unset": {"lease_until": ""}}
+            )
+            for r in batch
+        ], ordered=False)
+
+        for request in batch:
+            status, _ = outcomes[request["_id"]]
+            metrics.counter(f"validation_{status}").inc()
+            submitted = request.get("submission_timestamp")
+            if submitted:
+                self.lag_ms.observe((now - submitted).total_seconds() * 1000)
+        self.batch_ms.observe((time.perf_counter() - started) * 1000)
+        return outcomes
+
+    async def run_consumer(self, name: str):
+        while not self._stopping.is_set():
+            try:
+                batch = await self.claim()
+                if batch:
+                    await self.process(batch)
+                    continue
+            except Exception as e:
+                logger.error(f"❌ Consumer {name} batch failed: {e}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.idle_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def fail_exhausted(self):
+        """
+        Requests that kept losing their lease are parked for a human instead of retried forever.
+        """
+        result = await self.db.pending_requests.update_many(
+            {"status": CLAIMED, "lease_until": {"$lt": datetime.utcnow()}, "attempts": {"$gte": MAX_ATTEMPTS}},
+            {"$set": {"status": "failed", "reason": "MAX_ATTEMPTS"}, "$unset": {"lease_until": ""}}
+        )
+        if result.modified_count:
+            logger.warning(f"⚠️ {result.modified_count} requests exceeded {MAX_ATTEMPTS} attempts")
+
+    async def report(self, interval: float = 30.0):
+        last_processed, last_time = 0, time.monotonic()
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.fail_exhausted()
+                oldest = await self.db.pending_requests.find_one({"status": PENDING}, {"submission_timestamp": 1}, sort=[("submission_timestamp", 1)])
+                backlog = await self.db.pending_requests.count_documents({"status": {"$in": [PENDING, CLAIMED]}})
+            except Exception as e:
+                logger.error(f"Queue stats failed: {e}")
+                continue
+            self.backlog.set(backlog)
+            age = (datetime.utcnow() - oldest["submission_timestamp"]).total_seconds() if oldest else 0.0
+            processed = sum(metrics.counter(f"validation_{s}").value for s in ("confirmed", "rejected"))
+            now = time.monotonic()
+            rate = (processed - last_processed) / (now - last_time)
+            last_processed, last_time = processed, now
+            lag = self.lag_ms.snapshot()
+            logger.info(f"📊 Queue: {backlog} open, oldest {age:.0f}s | {rate:.1f} req/s | lag p50={lag['p50']} p95={lag['p95']} ms")
+
+    async def run(self, concurrency: int = 1):
+        if self.db is None:
+            logger.error("❌ No database: set MONGO_URI")
+            return
+        await self.db_manager.ensure_indexes()
+        logger.info(f"🚚 Validation worker started: {concurrency} consumers, batch {self.batch_size}")
+        await asyncio.gather(self.report(), *(self.run_consumer(str(i)) for i in range(concurrency)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate queued booking requests against capacity.")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("VALIDATION_CONCURRENCY", "2")))
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("VALIDATION_BATCH_SIZE", "50")))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    worker = ValidationWorker(batch_size=args.batch_size)
+    try:
+        asyncio.run(worker.run(args.concurrency))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import os
+import json
+import time
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger("auralis-rag")
+
+# Pinecone has no change feed, so ingest.py stamps a marker record that workers poll.
+GENERATION_NAMESPACE = "__meta__"
+GENERATION_ID = "kb_generation"
+
+def read_remote_generation(index):
+    response = index.fetch(ids=[GENERATION_ID], namespace=GENERATION_NAMESPACE)
+    vectors = response.vectors if hasattr(response, "vectors") else response.get("vectors", {})
+    record = vectors.get(GENERATION_ID)
+    if record is None:
+        return None
+    metadata = record.metadata if hasattr(record, "metadata") else record.get("metadata", {})
+    return metadata.get("generation")
+
+def write_remote_generation(index, dimension: int):
+    # Pinecone rejects all-zero dense vectors, hence the single 1.0.
+    generation = str(time.time_ns())
+    index.upsert(
+        vectors=[{"id": GENERATION_ID, "values": [1.0] + [0.0] * (dimension - 1), "metadata": {"generation": generation}}],
+        namespace=GENERATION_NAMESPACE
+    )
+    return generation
+
+class LocalVectorIndex:
+    """
+    In-process vector index for small knowledge bases.
+    Embeddings are L2-normalized float32 rows in a memory-mapped .npy matrix,
+    with ids + metadata kept in a JSON sidecar. Speaks the subset of the
+    Pinecone Index API that KnowledgeBase and ingest.py use.
+    """
+    # Queries are sub-millisecond, so callers may run them inline on the loop.
+    in_process = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self.vectors_path = os.path.join(path, "vectors.npy")
+        self.meta_path = os.path.join(path, "metadata.json")
+        # Written last on every change; holds a monotonic counter.
+        self.generation_path = os.path.join(path, "GENERATION")
+        self._lock = threading.Lock()
+        # (ids, metadata, matrix, generation) swapped as one unit so readers never see a mix.
+        self._state = ([], [], np.zeros((0, 0), dtype=np.float32), 0)
+        self.reload()
+
+    @property
+    def ids(self):
+        return self._state[0]
+
+    @property
+    def metadata(self):
+        return self._state[1]
+
+    @property
+    def matrix(self):
+        return self._state[2]
+
+    def reload(self):
+        if not (os.path.exists(self.vectors_path) and os.path.exists(self.meta_path)):
+            logger.warning(f"Local index at {self.path} is empty. Run `python ingest.py --target local` first.")
+            return
+
+        with self._lock:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            matrix = np.load(self.vectors_path, mmap_mode="r")
+
+            if len(meta["ids"]) and matrix.shape[0] != len(meta["ids"]):
+                # Caught mid re-seed; keep serving the previous snapshot.
+                logger.warning("Local index files out of sync; keeping previous snapshot.")
+                return
+
+            self._state = (meta["ids"], meta["metadata"], matrix, meta.get("generation", 0))
+        logger.info(f"Local index loaded: {len(self.ids)} vectors (generation {self._state[3]}).")
+
+    def _read_generation(self):
+        try:
+            with open(self.generation_path, "r", encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return None
+
+    def generation(self):
+        """
+        Changes whenever the index is re-seeded on disk; picks up the new data.
+        """
+        on_disk = self._read_generation()
+        if on_disk is None:
+            return None
+        if on_disk != self._state[3]:
+            self.reload()
+        return self._state[3]
+
+    def __len__(self):
+        return len(self.ids)
+
+    @staticmethod
+    def _normalize(values) -> np.ndarray:
+        vectors = np.atleast_2d(np.asarray(values, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def query(self, vector, top_k: int = 3, include_metadata: bool = True, **_):
+        ids, metadata, matrix, _generation = self._state
+        if not ids:
+            return {"matches": []}
+
+        scores = matrix @ self._normalize(vector)[0]
+        k = min(top_k, len(scores))
+
+        # argpartition is O(n); only the k winners get fully sorted.
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return {
+            "matches": [
+                {
+                    "id": ids[i],
+                    "score": float(scores[i]),
+                    "metadata": metadata[i] if include_metadata else {}
+                }
+                for i in top
+            ]
+        }
+
+    def upsert(self, vectors: list, **_):
+        """
+        Accepts Pinecone-style records: {"id", "values", "metadata"}.
+        """
+        ids, metadata, matrix, _generation = self._state
+        rows = {vid: (np.asarray(matrix[i]), metadata[i]) for i, vid in enumerate(ids)}
+        for record in vectors:
+            rows[record["id"]] = (self._normalize(record["values"])[0], record.get("metadata", {}))
+        self._write(rows)
+        return {"upserted_count": len(vectors)}
+
+    def delete(self, ids: list, **_):
+        drop = set(ids)
+        current_ids, metadata, matrix, _generation = self._state
+        rows = {vid: (np.asarray(matrix[i]), metadata[i]) for i, vid in enumerate(current_ids) if vid not in drop}
+        self._write(rows)
+
+    def _write(self, rows: dict):
+        os.makedirs(self.path, exist_ok=True)
+        ids = list(rows.keys())
+        matrix = np.stack([rows[i][0] for i in ids]).astype(np.float32) if ids else np.zeros((0, 0), dtype=np.float32)
+        generation = max(self._state[3], self._read_generation() or 0) + 1
+
+        # Write-then-rename so a running worker never maps a half-written file.
+        tmp_vectors = self.vectors_path + ".tmp.npy"
+        tmp_meta = self.meta_path + ".tmp"
+        tmp_generation = self.generation_path + ".tmp"
+        np.save(tmp_vectors, matrix)
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump({"ids": ids, "metadata": [rows[i][1] for i in ids], "generation": generation}, f)
+        with open(tmp_generation, "w", encoding="utf-8") as f:
+            f.write(str(generation))
+        os.replace(tmp_vectors, self.vectors_path)
+        os.replace(tmp_meta, self.meta_path)
+        os.replace(tmp_generation, self.generation_path)
+
+        self.reload()